@@ -0,0 +1,86 @@
+"""Сравнение скомпилированного cron (битовые маски) с прежним перебором по дням
+
+Запуск: python -m benchmarks.cron_benchmark
+"""
+
+import timeit
+from datetime import datetime, timedelta
+
+from src.croner.cron_parser import CronParser
+
+EXPRESSIONS = [
+    "*/40 * * * *",
+    "30 */1 * * *",
+    "10 12 * * 1",
+    "0 9 * * 1-5",
+    "0 0 1 * *",
+    "0 0 29 2 *",
+]
+
+START = datetime(2026, 3, 15, 13, 37, 21)
+
+
+def _legacy_schedule(schedule):
+    """Расписание в прежнем формате: поле -> список значений"""
+    legacy = schedule.as_dict()
+    # Прежняя реализация сравнивала день недели с datetime.weekday()
+    legacy["day_of_week"] = [(day - 1) % 7 for day in legacy["day_of_week"]]
+    return legacy
+
+
+def legacy_next_run(cron_schedule, current_time):
+    """Прежний DAG._calculate_next_run: перебор дней и вложенные циклы"""
+    next_time = current_time.replace(microsecond=0) + timedelta(seconds=1)
+    days_checked = 0
+    while days_checked < 366:
+        if (
+            next_time.day in cron_schedule["day"]
+            and next_time.month in cron_schedule["month"]
+            and next_time.weekday() in cron_schedule["day_of_week"]
+        ):
+            for hour in sorted(cron_schedule["hour"]):
+                if hour < next_time.hour:
+                    continue
+                for minute in sorted(cron_schedule["minute"]):
+                    if hour == next_time.hour and minute < next_time.minute:
+                        continue
+                    for second in sorted(cron_schedule.get("second", [0])):
+                        candidate = next_time.replace(
+                            hour=hour, minute=minute, second=second
+                        )
+                        if candidate > current_time:
+                            return candidate
+        next_time = next_time.replace(
+            hour=0, minute=0, second=0, microsecond=0
+        ) + timedelta(days=1)
+        days_checked += 1
+    return None
+
+
+def main(number=2000):
+    print(f"{'выражение':<16}{'перебор, мкс':>14}{'маски, мкс':>12}{'ускорение':>11}")
+    for expression in EXPRESSIONS:
+        schedule = CronParser.parse(expression)
+        legacy = _legacy_schedule(schedule)
+        legacy_time = timeit.timeit(
+            lambda: legacy_next_run(legacy, START), number=number
+        )
+        compiled_time = timeit.timeit(
+            lambda: schedule.next_fire(START), number=number
+        )
+        print(
+            f"{expression:<16}{legacy_time / number * 1e6:>14.1f}"
+            f"{compiled_time / number * 1e6:>12.1f}"
+            f"{legacy_time / compiled_time:>10.1f}x"
+        )
+
+    schedule = CronParser.parse("*/5 * * * *")
+    count = 100_000
+    elapsed = timeit.timeit(
+        lambda: sum(1 for _ in schedule.iter_fires(START, count)), number=1
+    )
+    print(f"iter_fires: {count} срабатываний за {elapsed:.3f}с")
+
+
+if __name__ == "__main__":
+    main()
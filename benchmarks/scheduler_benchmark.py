@@ -0,0 +1,368 @@
+"""Нагрузочный бенчмарк планировщика на виртуальных часах и синтетических DAG
+
+Генерирует тысячи DAG со смешанными cron-выражениями (задачи - пустые или
+со sleep), загружает их в Croner и прогоняет заданный период по виртуальным
+часам: планировщик просыпается ровно в моменты запусков, поэтому сутки
+проходят за секунды, а измеряется только собственная работа планировщика.
+
+Отчет: задержка старта DAG от начала такта (p50/p90/p99/max), тактов в
+секунду, стоимость вычисления следующего запуска по выражениям, память на DAG.
+
+Запуск: python -m benchmarks.scheduler_benchmark --dags 2000 --hours 6
+    --execute          выполнять DAG в пуле потоков (иначе DAG завершается сразу)
+    --json out.json    сохранить цифры для сравнения между версиями
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import psutil
+
+from src.config import pg_logger
+from src.croner import clock
+from src.croner.admission import MemoryAdmission
+from src.croner.croner import Croner
+from src.croner.dag import DAG
+from src.croner.executors import DagExecutor, WorkerPoolExecutor
+from src.croner.state_store import StateStore
+
+# (выражение, доля DAG): частые, почасовые, рабочие часы, редкие
+SCHEDULES = [
+    ("* * * * *", 1),
+    ("*/5 * * * *", 3),
+    ("*/15 * * * *", 3),
+    ("15,45 * * * *", 2),
+    ("0 * * * *", 3),
+    ("0 */2 * * *", 2),
+    ("*/10 9-18 * * 1-5", 2),
+    ("30 9 * * 1-5", 2),
+    ("0 0 * * *", 2),
+    ("0 12 1 * *", 1),
+    ("*/30 * * * * *", 1),
+]
+
+START = datetime(2026, 3, 16)  # Понедельник
+DAGS_PER_FILE = 50
+
+
+def _schedule_for(index):
+    weights = [weight for _, weight in SCHEDULES]
+    slot = index % sum(weights)
+    for expression, weight in SCHEDULES:
+        if slot < weight:
+            return expression
+        slot -= weight
+    return SCHEDULES[-1][0]
+
+
+def generate_dags(folder, count, sleep_share=0.2, sleep_ms=5, tz_share=0.1):
+    """Пишет файлы синтетических DAG; каждый пятый из них - со sleep-задачами"""
+    folder = Path(folder)
+    sleep_every = round(1 / sleep_share) if sleep_share else 0
+    tz_every = round(1 / tz_share) if tz_share else 0
+    for file_index in range(0, count, DAGS_PER_FILE):
+        lines = ["import time", "", "from src.croner import DAG", ""]
+        for index in range(file_index, min(file_index + DAGS_PER_FILE, count)):
+            name = f"bench_{index:05d}"
+            tz = ', tz="Asia/Omsk"' if tz_every and index % tz_every == 0 else ""
+            lines.append(
+                f'{name} = DAG("{name}", schedule_interval="{_schedule_for(index)}"'
+                f"{tz})"
+            )
+            sleeps = sleep_every and index % sleep_every == 0
+            for task_index in range(1 + index % 3):
+                body = f"time.sleep({sleep_ms / 1000})" if sleeps else "pass"
+                lines += [
+                    "",
+                    f"@{name}.task",
+                    f"def {name}_t{task_index}():",
+                    f"    {body}",
+                ]
+            lines.append("")
+        path = folder / f"bench_{file_index // DAGS_PER_FILE:04d}.py"
+        path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class InstantExecutor(DagExecutor):
+    """Бэкенд без выполнения: DAG занимает слот и сразу завершается
+
+    Завершения отдаются планировщику после такта (finish_pending), как это
+    делает поток пула, а не изнутри try_submit.
+    """
+
+    def __init__(self, max_workers):
+        super().__init__(max_workers)
+        self._busy = 0
+        self._finished = deque()
+
+    def try_submit(self, job):
+        if self._busy >= self.max_workers:
+            return False
+        self._busy += 1
+        job.started_at = job.finished_at = time.monotonic()
+        self._finished.append(job)
+        return True
+
+    def free_slots(self):
+        return self.max_workers - self._busy
+
+    def finish_pending(self):
+        while self._finished:
+            job = self._finished.popleft()
+            self._busy -= 1
+            self.on_complete(job)
+
+    def shutdown(self, timeout=30):
+        self._finished.clear()
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    index = min(int(round(q / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+
+class SchedulerBenchmark:
+    def __init__(self, dags_folder, slots, execute=False, lazy=True):
+        self.virtual = clock.VirtualClock(START)
+        self.previous_clock = clock.set_clock(self.virtual)
+        if execute:
+            executor = WorkerPoolExecutor(max_workers=slots, name="bench-worker")
+        else:
+            executor = InstantExecutor(slots)
+        self.croner = Croner(
+            dags_folder,
+            executor=executor,
+            process_executor=InstantExecutor(slots),
+            state_store=StateStore(),
+            # Бюджет памяти не ограничивает: измеряется планирование, а не допуск
+            admission=MemoryAdmission(budget_mb=10**9),
+            metrics_port=0,
+        )
+        self.croner.dag_discovery = "lazy" if lazy else "eager"
+        # Бенчмарк не ходит в Postgres, даже если это включено в окружении
+        self.croner.leader = None
+        self.croner.distributed_mode = "off"
+        self.croner.running = True
+        self.execute = execute
+
+        self.tick_started = None
+        self.lags = []
+        on_complete = self.croner.on_dag_complete
+        create_job = self.croner.create_job
+
+        def stamped_job(*args, **kwargs):
+            job = create_job(*args, **kwargs)
+            job.tick_started = self.tick_started
+            return job
+
+        def record_lag(job):
+            tick_started = getattr(job, "tick_started", None)
+            if tick_started is not None and job.started_at is not None:
+                self.lags.append(job.started_at - tick_started)
+            on_complete(job)
+
+        self.croner.create_job = stamped_job
+        for dag_executor in self.croner.executors.values():
+            dag_executor.on_complete = record_lag
+
+    def load(self):
+        """Загружает DAG папки; возвращает (число DAG, байт на DAG по tracemalloc)"""
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        self.croner.scan_dags_folder()
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        count = len(self.croner.dags)
+        return count, (after - before) / max(count, 1)
+
+    def _wait_idle(self):
+        """Ждет завершения запусков такта (и запусков из очереди после них)"""
+        for dag_executor in self.croner.executors.values():
+            if isinstance(dag_executor, InstantExecutor):
+                dag_executor.finish_pending()
+        if not self.execute:
+            return
+        while self.croner.executor.busy_slots() or len(self.croner.dag_queue):
+            time.sleep(0.0005)
+
+    def simulate(self, hours):
+        """Прогоняет hours часов виртуального времени"""
+        end_ts = (START + timedelta(hours=hours)).timestamp()
+        heap = self.croner.schedule_heap
+        ticks = 0
+        schedule_time = 0.0
+        started = time.perf_counter()
+        while True:
+            due_ts = heap.peek_time()
+            if due_ts is None or due_ts > end_ts:
+                break
+            self.virtual.advance_to(datetime.fromtimestamp(due_ts))
+            self.tick_started = time.monotonic()
+            self.croner.run_scheduled_dags()
+            schedule_time += time.monotonic() - self.tick_started
+            self._wait_idle()
+            ticks += 1
+        return {
+            "ticks": ticks,
+            "wall_seconds": time.perf_counter() - started,
+            "schedule_seconds": schedule_time,
+        }
+
+    def close(self):
+        self.croner.running = False
+        for dag_executor in self.croner.executors.values():
+            dag_executor.shutdown(timeout=5)
+        self.croner.admission.stop()
+        clock.set_clock(self.previous_clock)
+
+
+def next_run_costs(number=2000):
+    """Микросекунд на вычисление следующего запуска по каждому выражению"""
+    costs = {}
+    for expression, _ in SCHEDULES:
+        for tz in (None, "Asia/Omsk"):
+            dag = DAG(f"next_run_{expression}", schedule_interval=expression, tz=tz)
+            elapsed = timeit.timeit(
+                lambda: dag._calculate_next_run(START), number=number
+            )
+            label = expression + (f" ({tz})" if tz else "")
+            costs[label] = elapsed / number * 1e6
+    return costs
+
+
+@contextlib.contextmanager
+def quiet_logs(enabled=True):
+    """Глушит логи планировщика: бенчмарк не пишет тысячи строк в Postgres"""
+    if not enabled:
+        yield
+        return
+    pg_logger.handler._closed = True
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def run(args):
+    rss = psutil.Process()
+    with tempfile.TemporaryDirectory(prefix="croner_bench_") as folder:
+        generate_dags(folder, args.dags, args.sleep_share, args.sleep_ms)
+        with quiet_logs(not args.log):
+            costs = next_run_costs()
+            benchmark = SchedulerBenchmark(
+                folder, args.slots or args.dags, args.execute, not args.eager
+            )
+            try:
+                load_started = time.perf_counter()
+                count, bytes_per_dag = benchmark.load()
+                load_seconds = time.perf_counter() - load_started
+                rss_before = rss.memory_info().rss
+                stats = benchmark.simulate(args.hours)
+                rss_after = rss.memory_info().rss
+            finally:
+                benchmark.close()
+
+    lags = sorted(lag * 1000 for lag in benchmark.lags)
+    runs = sum(benchmark.croner.get_run_counts().values())
+    return {
+        "dags": count,
+        "hours": args.hours,
+        "execute": args.execute,
+        "discovery": "eager" if args.eager else "lazy",
+        "load_seconds": round(load_seconds, 3),
+        "memory_per_dag_kb": round(bytes_per_dag / 1024, 2),
+        "rss_growth_mb": round((rss_after - rss_before) / 1024 / 1024, 1),
+        "runs": runs,
+        "ticks": stats["ticks"],
+        "wall_seconds": round(stats["wall_seconds"], 3),
+        "ticks_per_second": round(
+            stats["ticks"] / max(stats["schedule_seconds"], 1e-9)
+        ),
+        "runs_per_second": round(runs / max(stats["wall_seconds"], 1e-9)),
+        "lag_ms": {
+            "p50": round(_percentile(lags, 50), 3),
+            "p90": round(_percentile(lags, 90), 3),
+            "p99": round(_percentile(lags, 99), 3),
+            "max": round(lags[-1] if lags else 0.0, 3),
+        },
+        "next_run_us": {label: round(cost, 2) for label, cost in costs.items()},
+    }
+
+
+def print_report(result):
+    print(
+        f"DAG: {result['dags']} ({result['discovery']}), период {result['hours']} ч, "
+        f"выполнение задач: {'да' if result['execute'] else 'нет'}"
+    )
+    print(
+        f"Загрузка: {result['load_seconds']:.2f}с, "
+        f"память на DAG {result['memory_per_dag_kb']:.1f} KB, "
+        f"прирост RSS за прогон {result['rss_growth_mb']:.1f} MB"
+    )
+    print(
+        f"Запусков: {result['runs']}, тактов: {result['ticks']}, "
+        f"за {result['wall_seconds']:.2f}с "
+        f"({result['ticks_per_second']} тактов/с, "
+        f"{result['runs_per_second']} запусков/с)"
+    )
+    lag = result["lag_ms"]
+    print(
+        f"Задержка старта, мс: p50 {lag['p50']:.3f}  p90 {lag['p90']:.3f}  "
+        f"p99 {lag['p99']:.3f}  max {lag['max']:.3f}"
+    )
+    print()
+    print(f"{'следующий запуск':<34}{'мкс':>8}")
+    for label, cost in result["next_run_us"].items():
+        print(f"{label:<34}{cost:>8.1f}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.scheduler_benchmark",
+        description="Накладные расходы планировщика на синтетических DAG",
+    )
+    parser.add_argument("--dags", type=int, default=2000, help="число DAG")
+    parser.add_argument("--hours", type=float, default=6, help="виртуальный период")
+    parser.add_argument(
+        "--slots", type=int, default=0, help="слотов выполнения (0 - по числу DAG)"
+    )
+    parser.add_argument(
+        "--execute", action="store_true", help="выполнять задачи в пуле потоков"
+    )
+    parser.add_argument(
+        "--sleep-share", type=float, default=0.2, help="доля DAG со sleep-задачами"
+    )
+    parser.add_argument(
+        "--sleep-ms", type=float, default=5, help="длительность sleep-задачи, мс"
+    )
+    parser.add_argument(
+        "--eager", action="store_true", help="импортировать модули DAG при загрузке"
+    )
+    parser.add_argument("--log", action="store_true", help="не глушить логи")
+    parser.add_argument("--json", help="сохранить результат в JSON")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    result = run(args)
+    print_report(result)
+    if args.json:
+        Path(args.json).write_text(
+            json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,27 @@ import os
 
 from dotenv import load_dotenv
 
-from .config_models import Config, DbConfig, DirConfig
+from .config_models import Config, CronerConfig, DbConfig, DirConfig
 from .logger import PostgresLoggerConfig
 
 load_dotenv()
 
 
+def parse_pools(value):
+    """'postgres_write=2,google_api=1' -> {"postgres_write": 2, "google_api": 1}"""
+    pools = {}
+    for item in value.split(","):
+        if item.strip():
+            name, size = item.split("=")
+            pools[name.strip()] = int(size)
+    return pools
+
+
+def parse_bool(value):
+    """'1', 'true', 'yes', 'on' (без учета регистра) -> True"""
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
 def get_config() -> Config:
     db_host: str = os.environ.get("DB_HOST")
     db_name: str = os.environ.get("DB_NAME")
@@ -20,6 +35,42 @@ def get_config() -> Config:
     TG_TOKEN: str = os.environ.get("TG_TOKEN")
     CHAT_ID: str = os.environ.get("CHAT_ID")
     timepad_api: str = os.environ.get("timepad_api")
+    max_concurrent_dags: int = int(os.environ.get("CRONER_MAX_CONCURRENT_DAGS", 5))
+    max_process_workers: int = int(os.environ.get("CRONER_MAX_PROCESS_WORKERS", 2))
+    process_worker_max_runs: int = int(
+        os.environ.get("CRONER_PROCESS_WORKER_MAX_RUNS", 20)
+    )
+    process_worker_max_rss_mb: int = int(
+        os.environ.get("CRONER_PROCESS_WORKER_MAX_RSS_MB", 1024)
+    )
+    state_backend: str = os.environ.get("CRONER_STATE_BACKEND", "postgres")
+    state_sqlite_path: str = os.environ.get("CRONER_STATE_SQLITE_PATH", "croner_state.db")
+    state_create_schema: bool = parse_bool(
+        os.environ.get("CRONER_STATE_CREATE_SCHEMA", "false")
+    )
+    catchup: str = os.environ.get("CRONER_CATCHUP", "latest")
+    max_catchup_runs: int = int(os.environ.get("CRONER_MAX_CATCHUP_RUNS", 50))
+    queue_aging_per_minute: float = float(
+        os.environ.get("CRONER_QUEUE_AGING_PER_MINUTE", 1.0)
+    )
+    memory_budget_mb: int = int(os.environ.get("CRONER_MEMORY_BUDGET_MB", 0))
+    default_dag_peak_mb: int = int(os.environ.get("CRONER_DEFAULT_DAG_PEAK_MB", 100))
+    metrics_host: str = os.environ.get("CRONER_METRICS_HOST", "0.0.0.0")
+    metrics_port: int = int(os.environ.get("CRONER_METRICS_PORT", 8000))
+    profile_token: str = os.environ.get("CRONER_PROFILE_TOKEN", "")
+    dag_discovery: str = os.environ.get("CRONER_DAG_DISCOVERY", "lazy")
+    stagger_window: int = int(os.environ.get("CRONER_STAGGER_WINDOW", 0))
+    pools: dict = parse_pools(
+        os.environ.get("CRONER_POOLS", "postgres_write=2,google_api=1,timepad_api=3")
+    )
+    leader_lock: str = os.environ.get("CRONER_LEADER_LOCK", "")
+    leader_check_interval: int = int(os.environ.get("CRONER_LEADER_CHECK_INTERVAL", 5))
+    distributed_mode: str = os.environ.get("CRONER_DISTRIBUTED_MODE", "off")
+    distributed_max_runs: int = int(os.environ.get("CRONER_DISTRIBUTED_MAX_RUNS", 10))
+    worker_concurrency: int = int(os.environ.get("CRONER_WORKER_CONCURRENCY", 2))
+    worker_heartbeat_timeout: int = int(
+        os.environ.get("CRONER_WORKER_HEARTBEAT_TIMEOUT", 60)
+    )
 
     return Config(
         db_config=DbConfig(
@@ -43,6 +94,32 @@ def get_config() -> Config:
         dir_config=DirConfig(
             base_dir=base_flie_dir,
         ),
+        croner_config=CronerConfig(
+            max_concurrent_dags=max_concurrent_dags,
+            max_process_workers=max_process_workers,
+            process_worker_max_runs=process_worker_max_runs,
+            process_worker_max_rss_mb=process_worker_max_rss_mb,
+            state_backend=state_backend,
+            state_sqlite_path=state_sqlite_path,
+            state_create_schema=state_create_schema,
+            catchup=catchup,
+            max_catchup_runs=max_catchup_runs,
+            queue_aging_per_minute=queue_aging_per_minute,
+            memory_budget_mb=memory_budget_mb,
+            default_dag_peak_mb=default_dag_peak_mb,
+            metrics_host=metrics_host,
+            metrics_port=metrics_port,
+            profile_token=profile_token,
+            dag_discovery=dag_discovery,
+            stagger_window=stagger_window,
+            pools=pools,
+            leader_lock=leader_lock,
+            leader_check_interval=leader_check_interval,
+            distributed_mode=distributed_mode,
+            distributed_max_runs=distributed_max_runs,
+            worker_concurrency=worker_concurrency,
+            worker_heartbeat_timeout=worker_heartbeat_timeout,
+        ),
         API_KEY=API_KEY,
         TG_TOKEN=TG_TOKEN,
         CHAT_ID=CHAT_ID,
@@ -36,10 +36,44 @@ class DirConfig(BaseModel):
         return '/' + self.base_dir + "/ads"
 
 
+class CronerConfig(BaseModel):
+    max_concurrent_dags: int = 5
+    max_process_workers: int = 2
+    process_worker_max_runs: int = 20
+    process_worker_max_rss_mb: int = 1024
+    state_backend: str = "postgres"  # postgres, sqlite или none
+    state_sqlite_path: str = "croner_state.db"
+    # Создавать схему croner в рабочей базе самому; по умолчанию таблицы
+    # заводятся заранее скриптом src/sql/croner_state.sql
+    state_create_schema: bool = False
+    catchup: str = "latest"  # skip, latest или all
+    max_catchup_runs: int = 50
+    queue_aging_per_minute: float = 1.0  # Рост приоритета в очереди за минуту
+    memory_budget_mb: int = 0  # 0 - 80% лимита памяти контейнера
+    default_dag_peak_mb: int = 100  # Оценка пика памяти DAG без истории запусков
+    metrics_host: str = "0.0.0.0"
+    metrics_port: int = 8000  # /metrics и /health, 0 - не запускать сервер
+    # Токен для POST/DELETE /profile (tracemalloc), "" - управление отключено
+    profile_token: str = ""
+    dag_discovery: str = "lazy"  # lazy (по AST, импорт при запуске) или eager
+    stagger_window: int = 0  # Окно авторазнесения совпадающих стартов, 0 - выкл.
+    # Пулы слотов для задач с общим ресурсом: имя -> число слотов
+    pools: dict = {"postgres_write": 2, "google_api": 1, "timepad_api": 3}
+    # Имя блокировки ведущего для нескольких экземпляров, "" - один экземпляр
+    leader_lock: str = ""
+    leader_check_interval: int = 5  # Как часто резерв пробует стать ведущим, с
+    # Задачи через очередь в Postgres: off, dags (executor="distributed") или all
+    distributed_mode: str = "off"
+    distributed_max_runs: int = 10  # Одновременных запусков распределенных DAG
+    worker_concurrency: int = 2  # Потоков у воркера очереди
+    worker_heartbeat_timeout: int = 60  # Молчащий дольше воркер считается упавшим
+
+
 class Config(BaseModel):
     db_config: DbConfig
     logger_config: PostgresLoggerConfig
     dir_config: DirConfig
+    croner_config: CronerConfig
     API_KEY: str
     TG_TOKEN: str
     CHAT_ID: str
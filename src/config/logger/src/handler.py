@@ -129,6 +129,7 @@ class PostgresHandler:
         self._buffer: List[Dict[str, Any]] = []
         self._lock = threading.Lock()
         self._closed = False
+        self.failed_flushes = 0  # Пакеты, не записанные после всех попыток
         self.json_encoder = JSONEncoder()  # Создаем экземпляр encoder
 
         # Запускаем фоновый поток для периодической записи
@@ -307,6 +308,7 @@ class PostgresHandler:
                 }
 
                 if attempt == self.config.max_retries - 1:
+                    self.failed_flushes += 1
                     self.error_handler.log_error(
                         f"Не удалось записать логи после {self.config.max_retries} попыток",
                         exc_info=e,
@@ -322,6 +324,11 @@ class PostgresHandler:
                         context=error_context,
                     )
 
+    def buffer_size(self) -> int:
+        """Количество записей, ожидающих записи в базу"""
+        with self._lock:
+            return len(self._buffer)
+
     def _background_flush(self):
         """Фоновая периодическая запись логов"""
         while not self._closed:
@@ -1,2 +1,4 @@
+from .cancellation import CancelToken, TaskCancelled
 from .croner import Croner
-from .dag import DAG
\ No newline at end of file
+from .dag import DAG
+from .sensors import FileSensor
@@ -0,0 +1,213 @@
+import threading
+from collections import deque
+
+import psutil
+
+from src.config import logger
+
+
+def _read_int(path):
+    try:
+        with open(path) as f:
+            value = f.read().strip()
+    except OSError:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+def detect_memory_limit_mb():
+    """Лимит памяти контейнера (cgroup v2/v1) или объем памяти машины"""
+    limit = _read_int("/sys/fs/cgroup/memory.max") or _read_int(
+        "/sys/fs/cgroup/memory/memory.limit_in_bytes"
+    )
+    total = psutil.virtual_memory().total
+    # В cgroup v1 "без лимита" - огромное число
+    if not limit or limit >= total:
+        limit = total
+    return limit / 1024 / 1024
+
+
+class _TrackedRun:
+    """Запуск DAG, память которого отслеживается"""
+
+    def __init__(self, job, estimate_mb, baseline_mb):
+        self.job = job
+        self.estimate_mb = estimate_mb  # Ожидаемый пик прироста памяти
+        self.baseline_mb = baseline_mb  # RSS в момент старта
+        self.pid = None  # Процесс-воркер, если DAG выполняется в пуле процессов
+        self.peak_mb = 0.0  # Наблюдаемый пик прироста памяти
+
+    def remaining_mb(self):
+        """Сколько памяти запуск еще может занять сверх уже занятой"""
+        return max(self.estimate_mb - self.peak_mb, 0.0)
+
+
+class MemoryAdmission:
+    """Допуск DAG к запуску по прогнозу RSS
+
+    Прогноз: текущий RSS планировщика и процессов-воркеров + память, которую
+    еще могут занять выполняемые DAG + пик прироста памяти запускаемого DAG,
+    выученный на прошлых запусках. Пики снимаются фоновым потоком: для DAG
+    в пуле процессов по RSS его процесса-воркера, для DAG в потоках по общему
+    RSS (при параллельных запусках оценка получается завышенной, это безопасно).
+    """
+
+    def __init__(
+        self,
+        budget_mb=None,
+        default_peak_mb=100,
+        sample_interval=0.5,
+        history_size=5,
+    ):
+        self.budget_mb = budget_mb or detect_memory_limit_mb() * 0.8
+        self.default_peak_mb = default_peak_mb  # Оценка для DAG без истории
+        self.sample_interval = sample_interval
+        self.history_size = history_size
+        self._process = psutil.Process()
+        self._lock = threading.Lock()
+        self._running = {}  # id(job) -> _TrackedRun
+        self._peaks = {}  # dag_id -> deque пиков последних запусков
+        self._denied = set()  # DAG, которым уже отказали (чтобы не спамить в лог)
+        self.denied_total = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def current_rss_mb(self):
+        """RSS планировщика вместе с дочерними процессами"""
+        rss = self._process.memory_info().rss
+        for child in self._process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except psutil.Error:
+                pass
+        return rss / 1024 / 1024
+
+    def _pid_rss_mb(self, pid):
+        try:
+            return psutil.Process(pid).memory_info().rss / 1024 / 1024
+        except psutil.Error:
+            return None
+
+    def estimate_mb(self, dag_id):
+        """Ожидаемый пик прироста памяти DAG: максимум по последним запускам"""
+        peaks = self._peaks.get(dag_id)
+        if not peaks:
+            return self.default_peak_mb
+        return max(peaks)
+
+    def try_admit(self, job):
+        """Регистрирует запуск, если прогноз RSS укладывается в бюджет"""
+        estimate = self.estimate_mb(job.dag_id)
+        with self._lock:
+            current = self.current_rss_mb()
+            outstanding = sum(run.remaining_mb() for run in self._running.values())
+            projected = current + outstanding + estimate
+            # Если ничего не выполняется, запускаем всегда: иначе DAG с пиком
+            # больше бюджета никогда не запустится
+            if self._running and projected > self.budget_mb:
+                if job.dag_id not in self._denied:
+                    self._denied.add(job.dag_id)
+                    self.denied_total += 1
+                    logger.warning(
+                        f"🧠 DAG {job.dag_id} ждет памяти: прогноз {projected:.0f} MB "
+                        f"> бюджета {self.budget_mb:.0f} MB "
+                        f"(сейчас {current:.0f}, ожидаемый пик DAG {estimate:.0f})",
+                        dag=job.dag_id,
+                    )
+                return False
+            self._denied.discard(job.dag_id)
+            self._running[id(job)] = _TrackedRun(job, estimate, current)
+            return True
+
+    def is_waiting(self, dag_id):
+        """Ждет ли DAG освобождения памяти"""
+        return dag_id in self._denied
+
+    def release(self, job):
+        """Снимает регистрацию без учета пика (DAG так и не запустился)"""
+        with self._lock:
+            self._running.pop(id(job), None)
+
+    def finish(self, job):
+        """Запоминает пик прироста памяти завершенного запуска"""
+        self._sample()
+        with self._lock:
+            run = self._running.pop(id(job), None)
+            if run is None:
+                return
+            peaks = self._peaks.setdefault(
+                job.dag_id, deque(maxlen=self.history_size)
+            )
+            peaks.append(run.peak_mb)
+
+    def _sample(self):
+        """Обновляет наблюдаемые пики выполняемых запусков"""
+        with self._lock:
+            runs = list(self._running.values())
+        if not runs:
+            return
+        # RSS читаем без блокировки, чтобы не держать ее на время замеров psutil
+        total = None
+        samples = []
+        for run in runs:
+            pid = getattr(run.job, "worker_pid", None)
+            if pid is not None:
+                rss = self._pid_rss_mb(pid)
+                if rss is None:
+                    continue
+            else:
+                if total is None:
+                    total = self.current_rss_mb()
+                rss = total
+            samples.append((run, pid, rss))
+
+        # Пики и базу меняем под блокировкой: их читают try_admit и get_stats
+        with self._lock:
+            for run, pid, rss in samples:
+                if pid is not None and run.pid != pid:
+                    # Первый замер процесса-воркера - его RSS до запуска DAG
+                    run.pid = pid
+                    run.baseline_mb = rss
+                run.peak_mb = max(run.peak_mb, rss - run.baseline_mb)
+
+    def _sampler_loop(self):
+        while not self._stop_event.wait(self.sample_interval):
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error("Ошибка замера памяти DAG", e)
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._sampler_loop, name="croner-memory", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get_stats(self):
+        """Бюджет, прогноз и выученные пики памяти по DAG"""
+        with self._lock:
+            outstanding = sum(run.remaining_mb() for run in self._running.values())
+            running = len(self._running)
+            waiting = sorted(self._denied)
+        return {
+            "budget_mb": round(self.budget_mb, 1),
+            "current_mb": round(self.current_rss_mb(), 1),
+            "outstanding_mb": round(outstanding, 1),
+            "running": running,
+            "waiting_for_memory": waiting,
+            "denied_total": self.denied_total,
+            "dag_peaks_mb": {
+                dag_id: round(max(peaks), 1)
+                for dag_id, peaks in self._peaks.items()
+                if peaks
+            },
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import threading
+
+
+class AsyncTaskRunner:
+    """Общий цикл asyncio планировщика для задач, объявленных как async def
+
+    Сетевые задачи (HTTP, Telegram, Google API) ждут ответа, не занимая
+    поток: сотни таких задач всех DAG выполняет один поток цикла. Одновременно
+    выполняющихся async-задач одного DAG не больше его max_async_tasks,
+    остальные ждут своей очереди в цикле.
+    """
+
+    def __init__(self, name="croner-async"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+        # Ключ лимита (dag_id) -> (лимит, asyncio.Semaphore); только из потока цикла
+        self._limits = {}
+        # Счетчики меняет только поток цикла
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+
+    def start(self):
+        """Запускает поток цикла (повторный вызов ничего не делает)"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+                loop.close()
+
+            self._loop = loop
+            self._thread = threading.Thread(
+                target=run_loop, name=self.name, daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+
+    def submit(self, func, kwargs, key=None, limit=None, on_started=None):
+        """Выполняет func(**kwargs) в цикле; возвращает concurrent.futures.Future
+
+        on_started() вызывается, когда задача дождалась лимита key и стартовала.
+        Отмена возвращенного Future отменяет задачу в цикле.
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(
+            self._run(func, kwargs, key, limit, on_started), self._loop
+        )
+
+    def _semaphore(self, key, limit):
+        if key is None or not limit:
+            return None
+        current = self._limits.get(key)
+        if current is None or current[0] != limit:
+            # Лимит поменялся (DAG перезагружен): уже идущие задачи доработают
+            current = (limit, asyncio.Semaphore(limit))
+            self._limits[key] = current
+        return current[1]
+
+    async def _run(self, func, kwargs, key, limit, on_started):
+        semaphore = self._semaphore(key, limit)
+        if semaphore is not None:
+            self.waiting += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self.waiting -= 1
+        self.running += 1
+        try:
+            if on_started is not None:
+                on_started()
+            return await func(**kwargs)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            if semaphore is not None:
+                semaphore.release()
+
+    def stop(self, timeout=5):
+        """Отменяет невыполненные задачи и останавливает цикл"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+
+        def cancel_all():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            # Отмена доходит до задач раньше, чем цикл остановится
+            loop.call_soon(loop.stop)
+
+        loop.call_soon_threadsafe(cancel_all)
+        thread.join(timeout)
+
+    def get_stats(self):
+        return {
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+
+_runner = None  # Цикл async-задач процесса (None - задача идет в своем потоке)
+
+
+def set_async_runner(runner):
+    global _runner
+    _runner = runner
+
+
+def get_async_runner():
+    return _runner
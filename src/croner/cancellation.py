@@ -0,0 +1,76 @@
+import threading
+
+
+class TaskCancelled(BaseException):
+    """Задача прервана: таймаут или остановка планировщика
+
+    Наследуется от BaseException (как asyncio.CancelledError), чтобы
+    проходить сквозь except Exception в коде задач и не превращаться
+    в "успешный" запуск с частичными данными.
+    """
+
+
+class CancelToken:
+    """Токен отмены: задача проверяет его в циклах и долгих ожиданиях
+
+    Задача получает токен, если у ее функции есть параметр cancel_token:
+
+        @dag.task(execution_timeout=600)
+        def load(cancel_token):
+            while not cancel_token.cancelled:
+                ...
+                if cancel_token.sleep(5):  # Прерывается сразу при отмене
+                    break
+    """
+
+    def __init__(self, parent=None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self.reason = None
+        if parent is not None:
+            # Отмена запуска DAG отменяет токены всех его задач
+            parent.add_callback(lambda token: self.cancel(token.reason))
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """Отменяет токен; повторная отмена ничего не делает"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            callback(self)
+
+    def add_callback(self, callback):
+        """Вызывает callback(token) при отмене (сразу, если уже отменен)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def sleep(self, seconds):
+        """Спит seconds секунд; True, если токен отменили во время ожидания"""
+        return self._event.wait(seconds)
+
+    def raise_if_cancelled(self):
+        if self.cancelled:
+            raise TaskCancelled(self.reason)
+
+    def __getstate__(self):
+        # Между процессами передается только факт отмены
+        return {"reason": self.reason, "cancelled": self.cancelled}
+
+    def __setstate__(self, state):
+        self.__init__()
+        if state["cancelled"]:
+            self.cancel(state["reason"])
+
+    def __repr__(self):
+        return f"CancelToken(cancelled={self.cancelled}, reason={self.reason!r})"
@@ -0,0 +1,323 @@
+import argparse
+import cProfile
+import json
+import pstats
+import signal
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .cancellation import CancelToken
+from .dag_run import DagRun, TaskState
+from .discovery import LazyDAG, load_file_dags
+
+try:
+    import resource
+except ImportError:  # Windows: пик RSS не показываем
+    resource = None
+
+DEFAULT_DAGS_FOLDER = "./src/dags"
+
+
+def find_dags(dags_folder, lazy=True):
+    """DAG папки: {ключ планировщика (файл_переменная): DAG}"""
+    dags = {}
+    for file_path in sorted(Path(dags_folder).glob("*.py")):
+        if file_path.name.startswith("_"):
+            continue
+        try:
+            found = load_file_dags(file_path, lazy=lazy)
+        except Exception as e:
+            print(f"❌ Ошибка загрузки DAG из {file_path}: {e}", file=sys.stderr)
+            continue
+        for attr_name, dag in found.items():
+            dags[f"{file_path.stem}_{attr_name}"] = dag
+    return dags
+
+
+def get_dag(dags_folder, name, lazy=True):
+    """DAG по ключу планировщика или по dag_id; настоящий (не ленивый) для запуска"""
+    dags = find_dags(dags_folder, lazy=lazy)
+    dag = dags.get(name)
+    if dag is None:
+        matches = [d for d in dags.values() if d.dag_id == name]
+        if not matches:
+            raise SystemExit(f"DAG {name} не найден в {dags_folder}")
+        dag = matches[0]
+    return dag
+
+
+def _peak_rss_mb():
+    """Пиковый RSS процесса в MB (None, если недоступен)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux отдает килобайты, macOS - байты
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def _topological(dag):
+    """Задачи DAG в порядке, совместимом с зависимостями"""
+    upstream_map = dag.get_upstream_map()
+    done = set()
+    ordered = []
+    remaining = list(dag.tasks)
+    while remaining:
+        for task in remaining:
+            if all(t in done for t in upstream_map[task.task_id]):
+                ordered.append(task)
+                done.add(task.task_id)
+                remaining.remove(task)
+                break
+    return ordered
+
+
+def _call_task(task, dag_run):
+    """Выполняет задачу в текущем потоке с результатами предшествующих задач"""
+    kwargs = dag_run.results.inputs_for(task)
+    if task.accepts_conf:
+        kwargs["conf"] = dag_run.conf
+    if task.accepts_cancel_token:
+        kwargs["cancel_token"] = CancelToken()
+    started = time.perf_counter()
+    try:
+        result = task(**kwargs)
+    except Exception as e:
+        dag_run.task_errors[task.task_id] = f"{type(e).__name__}: {e}"
+        dag_run.set_state(task.task_id, TaskState.FAILED)
+    else:
+        dag_run.set_state(task.task_id, TaskState.SUCCESS)
+        dag_run.results.put(task.task_id, result)
+    dag_run.task_durations[task.task_id] = time.perf_counter() - started
+
+
+def run_inline(dag, conf=None, task_ids=None):
+    """Выполняет задачи DAG последовательно в текущем потоке
+
+    Нужен для профилирования и запуска отдельных задач: cProfile видит только
+    свой поток. Задачи после упавшей пропускаются, как в графе DAG.
+    """
+    dag_run = DagRun(dag.dag_id, conf=conf)
+    dag_run.started_at = datetime.now()
+    upstream_map = dag.get_upstream_map()
+    for task in _topological(dag):
+        if task_ids and task.task_id not in task_ids:
+            continue
+        upstream = [dag_run.get_state(t) for t in upstream_map[task.task_id]]
+        if any(s in (TaskState.FAILED, TaskState.SKIPPED) for s in upstream):
+            dag_run.set_state(task.task_id, TaskState.SKIPPED)
+            continue
+        _call_task(task, dag_run)
+    dag_run.finished_at = datetime.now()
+    return dag_run
+
+
+def run_dag(dag, conf=None):
+    """Синхронный запуск DAG, как в планировщике; повторы задач ждутся на месте"""
+    dag_run = dag.run(DagRun(dag.dag_id, conf=conf))
+    while dag_run.is_deferred:
+        time.sleep(max((dag_run.next_retry_at() - datetime.now()).total_seconds(), 0))
+        dag_run = dag.run(dag_run)
+    return dag_run
+
+
+def print_run(dag_run, elapsed, rss_before, rss_after):
+    print()
+    print(f"DAG {dag_run.dag_id}: {dag_run.status}, {elapsed:.2f}с")
+    for task_id, state in dag_run.task_states.items():
+        duration = dag_run.task_durations.get(task_id)
+        line = f"  {task_id:<32}{state:<14}"
+        if duration is not None:
+            line += f"{duration:>9.2f}с"
+        if task_id in dag_run.task_errors:
+            line += f"  {dag_run.task_errors[task_id]}"
+        print(line)
+    if rss_after is not None:
+        print(
+            f"Пик RSS: {rss_after:.1f} MB "
+            f"(до запуска {rss_before:.1f} MB, прирост {rss_after - rss_before:.1f} MB)"
+        )
+
+
+def cmd_list(args):
+    dags = find_dags(args.dags_folder, lazy=not args.eager)
+    now = datetime.now()
+    print(
+        f"{'DAG':<36}{'расписание':<20}{'executor':<10}{'задач':>6}  следующий запуск"
+    )
+    for key, dag in dags.items():
+        next_runs = dag.upcoming_runs(now, limit=1)
+        if next_runs:
+            next_run = f"{next_runs[0]:%Y-%m-%d %H:%M:%S}"
+        elif dag.sensor is not None:
+            next_run = f"по файлам в {dag.sensor.path}"
+        else:
+            next_run = "-"
+        tasks = (
+            len(dag.declared_tasks)
+            if isinstance(dag, LazyDAG) and not dag.resolved
+            else len(dag.tasks)
+        )
+        schedule = str(dag.schedule_interval or "-")
+        print(f"{key:<36}{schedule:<20}{dag.executor:<10}{tasks:>6}  {next_run}")
+
+
+def cmd_next_runs(args):
+    dag = get_dag(args.dags_folder, args.dag)
+    start = datetime.fromisoformat(args.start) if args.start else datetime.now()
+    started = time.perf_counter()
+    runs = dag.upcoming_runs(start, limit=args.n)
+    elapsed = time.perf_counter() - started
+    if not runs:
+        print(f"У DAG {dag.dag_id} нет запусков по расписанию")
+        return 0
+    for run in runs:
+        local = dag.local_time(run)
+        line = f"{run:%Y-%m-%d %H:%M:%S %a}"
+        if local is not run:
+            line += f"  ({local:%Y-%m-%d %H:%M:%S %Z})"
+        print(line)
+    print(f"{len(runs)} запусков за {elapsed * 1000:.2f} мс")
+    return 0
+
+
+def _prepare(args):
+    dag = get_dag(args.dags_folder, args.dag)
+    if isinstance(dag, LazyDAG):
+        dag = dag.resolve()
+    conf = json.loads(args.conf) if args.conf else None
+    if args.task:
+        unknown = set(args.task) - {task.task_id for task in dag.tasks}
+        if unknown:
+            raise SystemExit(f"В DAG {dag.dag_id} нет задач: {sorted(unknown)}")
+    return dag, conf
+
+
+def cmd_run(args):
+    dag, conf = _prepare(args)
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    if args.task:
+        dag_run = run_inline(dag, conf, task_ids=set(args.task))
+    else:
+        dag_run = run_dag(dag, conf)
+    elapsed = time.perf_counter() - started
+    print_run(dag_run, elapsed, rss_before, _peak_rss_mb())
+    return 0 if dag_run.status == TaskState.SUCCESS else 1
+
+
+def cmd_profile(args):
+    dag, conf = _prepare(args)
+    output = args.output or f"{dag.dag_id}.prof"
+    profiler = cProfile.Profile()
+    rss_before = _peak_rss_mb()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        dag_run = run_inline(dag, conf, task_ids=set(args.task or []))
+    finally:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+    profiler.dump_stats(output)
+    print_run(dag_run, elapsed, rss_before, _peak_rss_mb())
+    print()
+    pstats.Stats(profiler).sort_stats(args.sort).print_stats(args.limit)
+    print(f"Профиль сохранен в {output} (python -m pstats {output})")
+    return 0 if dag_run.status == TaskState.SUCCESS else 1
+
+
+def cmd_worker(args):
+    from sqlalchemy import create_engine
+
+    from src.config import config
+
+    from .distributed import PostgresTaskQueue, TaskWorker
+
+    concurrency = args.concurrency or config.croner_config.worker_concurrency
+    engine = create_engine(
+        config.db_config.get_url(),
+        pool_size=concurrency + 1,
+        max_overflow=2,
+        pool_pre_ping=True,
+    )
+    task_queue = PostgresTaskQueue(
+        engine,
+        heartbeat_timeout=config.croner_config.worker_heartbeat_timeout,
+        create_schema=config.croner_config.state_create_schema,
+    )
+    worker = TaskWorker(
+        task_queue, args.dags_folder, concurrency=concurrency, name=args.name
+    )
+    # Остановка контейнера: новые задачи не берем, начатые дорабатывают
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: worker.stop())
+    worker.run()
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.croner",
+        description="Croner: просмотр расписаний и запуск DAG вне планировщика",
+    )
+    parser.add_argument(
+        "--dags-folder",
+        default=DEFAULT_DAGS_FOLDER,
+        help=f"папка с DAG (по умолчанию {DEFAULT_DAGS_FOLDER})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="DAG, расписания и ближайший запуск")
+    list_parser.add_argument(
+        "--eager", action="store_true", help="импортировать модули DAG (без AST)"
+    )
+    list_parser.set_defaults(func=cmd_list)
+
+    next_parser = commands.add_parser("next-runs", help="ближайшие запуски DAG")
+    next_parser.add_argument("dag", help="dag_id или ключ планировщика")
+    next_parser.add_argument("-n", type=int, default=10, help="сколько запусков")
+    next_parser.add_argument(
+        "--from", dest="start", help="начиная с момента (ISO, по умолчанию сейчас)"
+    )
+    next_parser.set_defaults(func=cmd_next_runs)
+
+    for name, func, help_text in (
+        ("run", cmd_run, "синхронный запуск DAG с временем и пиком RSS"),
+        ("profile", cmd_profile, "запуск DAG под cProfile"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("dag", help="dag_id или ключ планировщика")
+        command.add_argument(
+            "--task",
+            action="append",
+            help="выполнить только эту задачу (можно несколько раз)",
+        )
+        command.add_argument("--conf", help='dag_run.conf в JSON: {"files": [...]}')
+        command.set_defaults(func=func)
+        if name == "profile":
+            command.add_argument("-o", "--output", help="файл профиля (<dag_id>.prof)")
+            command.add_argument(
+                "--sort", default="cumulative", help="сортировка pstats"
+            )
+            command.add_argument(
+                "--limit", type=int, default=30, help="строк в отчете"
+            )
+
+    worker_parser = commands.add_parser(
+        "worker", help="воркер распределенного режима: задачи из очереди Postgres"
+    )
+    worker_parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="задач одновременно (по умолчанию CRONER_WORKER_CONCURRENCY)",
+    )
+    worker_parser.add_argument("--name", help="имя воркера (по умолчанию host:pid)")
+    worker_parser.set_defaults(func=cmd_worker)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args) or 0
@@ -0,0 +1,71 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Часы планировщика по умолчанию: системное время"""
+
+    def now(self):
+        return datetime.now()
+
+    def time(self):
+        return time.time()
+
+
+class VirtualClock:
+    """Управляемые часы: время идет только по advance()/advance_to()
+
+    Нужны бенчмаркам и проверкам расписаний: сутки работы планировщика
+    прогоняются за секунды, а решения о запуске DAG не зависят от того,
+    сколько реального времени заняла их обработка.
+    """
+
+    def __init__(self, start=None):
+        self._lock = threading.Lock()
+        self._now = start or datetime.now().replace(microsecond=0)
+
+    def now(self):
+        with self._lock:
+            return self._now
+
+    def time(self):
+        return self.now().timestamp()
+
+    def advance(self, seconds):
+        """Сдвигает часы вперед на seconds секунд"""
+        with self._lock:
+            self._now += timedelta(seconds=seconds)
+            return self._now
+
+    def advance_to(self, moment):
+        """Переводит часы на moment (назад часы не идут)"""
+        with self._lock:
+            if moment > self._now:
+                self._now = moment
+            return self._now
+
+
+_clock = SystemClock()
+
+
+def set_clock(clock):
+    """Подменяет часы планировщика; возвращает прежние"""
+    global _clock
+    previous = _clock
+    _clock = clock
+    return previous
+
+
+def get_clock():
+    return _clock
+
+
+def now():
+    """Текущее время по часам планировщика"""
+    return _clock.now()
+
+
+def time_ts():
+    """Текущее время по часам планировщика в epoch-секундах"""
+    return _clock.time()
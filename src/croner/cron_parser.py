@@ -1,51 +1,402 @@
 # cron_parser.py
+from datetime import datetime, timedelta, timezone
+
+# Диапазоны полей: (имя, минимум, максимум)
+_FIELDS = (
+    ("second", 0, 59),
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("day_of_week", 0, 7),  # 0 и 7 - воскресенье
+)
+
+_NAMES = {
+    "month": {
+        name: number
+        for number, name in enumerate(
+            "jan feb mar apr may jun jul aug sep oct nov dec".split(), start=1
+        )
+    },
+    "day_of_week": {
+        name: number
+        for number, name in enumerate("sun mon tue wed thu fri sat".split())
+    },
+}
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# Раскладка дней недели по дням месяца повторяется каждые 28 лет
+_SEARCH_YEARS = 28
+
+
+def _next_bit(mask, value):
+    """Наименьший установленный бит >= value (None, если таких нет)"""
+    rest = mask >> value
+    if not rest:
+        return None
+    return value + (rest & -rest).bit_length() - 1
+
+
+def _prev_bit(mask, value):
+    """Наибольший установленный бит <= value (None, если таких нет)"""
+    if value < 0:
+        return None
+    rest = mask & ((2 << value) - 1)
+    if not rest:
+        return None
+    return rest.bit_length() - 1
+
+
+def _bits(mask):
+    return [bit for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+
+def _days_in_month(year, month):
+    if month == 12:
+        return 31
+    return (datetime(year, month + 1, 1) - datetime(year, month, 1)).days
+
+
+def _resolve(wall, tz, fold=0):
+    """Момент времени для показаний часов wall в поясе tz
+
+    Несуществующее время (перевод вперед) сдвигается на величину перевода,
+    неоднозначное (перевод назад) выбирается по fold.
+    """
+    moment = wall.replace(tzinfo=tz, fold=fold)
+    return moment.astimezone(timezone.utc).astimezone(tz)
+
+
+def _find_switch(start, end):
+    """Первый момент после start со смещением UTC как у end (с точностью до секунды)"""
+    low = start.astimezone(timezone.utc)
+    high = end.astimezone(timezone.utc)
+    offset = end.utcoffset()
+    tz = end.tzinfo
+    while high - low > timedelta(seconds=1):
+        middle = low + (high - low) / 2
+        if middle.astimezone(tz).utcoffset() == offset:
+            high = middle
+        else:
+            low = middle
+    # Переводы часов происходят в целые секунды
+    switch = high.replace(microsecond=0)
+    if switch.astimezone(tz).utcoffset() != offset:
+        switch += timedelta(seconds=1)
+    return switch.astimezone(tz)
+
+
+class CronSchedule:
+    """Скомпилированное cron-выражение: каждое поле - битовая маска
+
+    Поиск следующего и предыдущего срабатывания идет по полям сверху вниз
+    (месяц, день, час, минута, секунда) операциями над масками, без
+    перебора дней. День месяца и день недели, если оба ограничены
+    (не начинаются с *), объединяются по ИЛИ, как в Vixie cron.
+    """
+
+    def __init__(self, expression, masks, day_star, dow_star, wildcard_time=False):
+        self.expression = expression
+        self.masks = masks  # Имя поля -> битовая маска допустимых значений
+        self.day_star = day_star
+        self.dow_star = dow_star
+        # Минуты или часы заданы через * - срабатывает и в повторившемся часе
+        self.wildcard_time = wildcard_time
+        self._month_days = {}  # (год, месяц) -> маска подходящих дней
+
+    def _days_mask(self, year, month):
+        """Маска дней месяца, подходящих и по дню месяца, и по дню недели"""
+        key = (year, month)
+        mask = self._month_days.get(key)
+        if mask is None:
+            days = _days_in_month(year, month)
+            # День недели (0 - воскресенье) первого числа месяца
+            first = (datetime(year, month, 1).weekday() + 1) % 7
+            dow_mask = 0
+            for day in range(1, days + 1):
+                if self.masks["day_of_week"] >> ((first + day - 1) % 7) & 1:
+                    dow_mask |= 1 << day
+            day_mask = self.masks["day"] & ((2 << days) - 1)
+            if self.day_star or self.dow_star:
+                mask = day_mask & dow_mask
+            else:
+                mask = day_mask | dow_mask
+            if len(self._month_days) > 48:
+                self._month_days.clear()
+            self._month_days[key] = mask
+        return mask
+
+    def matches(self, moment):
+        """Подходит ли момент (с точностью до секунды) под расписание"""
+        return bool(
+            self.masks["second"] >> moment.second & 1
+            and self.masks["minute"] >> moment.minute & 1
+            and self.masks["hour"] >> moment.hour & 1
+            and self.masks["month"] >> moment.month & 1
+            and self._days_mask(moment.year, moment.month) >> moment.day & 1
+        )
+
+    def _next_wall(self, after):
+        """Следующее срабатывание по показаниям часов (наивное время)"""
+        masks = self.masks
+        t = after.replace(microsecond=0) + timedelta(seconds=1)
+        year, month, day = t.year, t.month, t.day
+        hour, minute, second = t.hour, t.minute, t.second
+        limit = year + _SEARCH_YEARS
+        # Поле без подходящего значения переносит единицу в старшее поле
+        while year <= limit:
+            found = _next_bit(masks["month"], month)
+            if found is None:
+                year, month, day, hour, minute, second = year + 1, 1, 1, 0, 0, 0
+                continue
+            if found != month:
+                month, day, hour, minute, second = found, 1, 0, 0, 0
+
+            found = _next_bit(self._days_mask(year, month), day)
+            if found is None:
+                month, day, hour, minute, second = month + 1, 1, 0, 0, 0
+                if month > 12:
+                    year, month = year + 1, 1
+                continue
+            if found != day:
+                day, hour, minute, second = found, 0, 0, 0
+
+            found = _next_bit(masks["hour"], hour)
+            if found is None:
+                day, hour, minute, second = day + 1, 0, 0, 0
+                continue
+            if found != hour:
+                hour, minute, second = found, 0, 0
+
+            found = _next_bit(masks["minute"], minute)
+            if found is None:
+                hour, minute, second = hour + 1, 0, 0
+                continue
+            if found != minute:
+                minute, second = found, 0
+
+            found = _next_bit(masks["second"], second)
+            if found is None:
+                minute, second = minute + 1, 0
+                continue
+            return datetime(year, month, day, hour, minute, found)
+
+        raise ValueError(
+            f"Не удалось найти следующее время запуска для '{self.expression}'"
+        )
+
+    def _prev_wall(self, before):
+        """Предыдущее срабатывание по показаниям часов (наивное время)"""
+        masks = self.masks
+        t = before.replace(microsecond=0)
+        if t == before:
+            t -= timedelta(seconds=1)
+        year, month, day = t.year, t.month, t.day
+        hour, minute, second = t.hour, t.minute, t.second
+        limit = year - _SEARCH_YEARS
+        # Поле без подходящего значения занимает единицу у старшего поля
+        while year >= limit:
+            found = _prev_bit(masks["month"], month)
+            if found is None:
+                year, month, day, hour, minute, second = year - 1, 12, 31, 23, 59, 59
+                continue
+            if found != month:
+                month, day, hour, minute, second = found, 31, 23, 59, 59
+
+            found = _prev_bit(self._days_mask(year, month), day)
+            if found is None:
+                month, day, hour, minute, second = month - 1, 31, 23, 59, 59
+                if month < 1:
+                    year, month = year - 1, 12
+                continue
+            if found != day:
+                day, hour, minute, second = found, 23, 59, 59
+
+            found = _prev_bit(masks["hour"], hour)
+            if found is None:
+                day, hour, minute, second = day - 1, 23, 59, 59
+                continue
+            if found != hour:
+                hour, minute, second = found, 59, 59
+
+            found = _prev_bit(masks["minute"], minute)
+            if found is None:
+                hour, minute, second = hour - 1, 59, 59
+                continue
+            if found != minute:
+                minute, second = found, 59
+
+            found = _prev_bit(masks["second"], second)
+            if found is None:
+                minute, second = minute - 1, 59
+                continue
+            return datetime(year, month, day, hour, minute, found)
+
+        raise ValueError(
+            f"Не удалось найти предыдущее время запуска для '{self.expression}'"
+        )
+
+    def next_fire(self, after):
+        """Ближайшее время срабатывания строго после after
+
+        Для after с часовым поясом расписание считается по местному времени
+        этого пояса, результат тоже с поясом. При переводе часов вперед время
+        из пропущенного интервала сдвигается на величину перевода (02:30 ->
+        03:30). При переводе назад расписание с * в минутах или часах
+        срабатывает и в повторившемся часе, а с фиксированным временем -
+        только один раз, как в Vixie cron.
+        """
+        if after.tzinfo is None:
+            return self._next_wall(after)
+
+        # Datetime с одним tzinfo сравниваются по показаниям часов без учета
+        # fold, поэтому моменты сравниваются по timestamp
+        tz = after.tzinfo
+        after_ts = after.timestamp()
+        local = after.astimezone(timezone.utc).astimezone(tz)
+        wall = local.replace(tzinfo=None)
+        while True:
+            wall = self._next_wall(wall)
+            fire = _resolve(wall, tz, local.fold)
+            if fire.timestamp() > after_ts:
+                break
+
+        if self.wildcard_time and fire.utcoffset() < local.utcoffset():
+            # Между after и fire часы переведены назад: повторившийся час
+            # начинается в момент перевода
+            switch = _find_switch(after, fire)
+            repeat_start = switch.astimezone(tz).replace(tzinfo=None)
+            wall = self._next_wall(repeat_start - timedelta(seconds=1))
+            candidate = _resolve(wall, tz, fold=1)
+            if after_ts < candidate.timestamp() < fire.timestamp():
+                fire = candidate
+        return fire
+
+    def prev_fire(self, before):
+        """Последнее время срабатывания строго до before
+
+        Для before с часовым поясом - по местному времени этого пояса
+        (повторившийся при переводе назад час не учитывается).
+        """
+        if before.tzinfo is None:
+            return self._prev_wall(before)
+
+        tz = before.tzinfo
+        before_ts = before.timestamp()
+        local = before.astimezone(timezone.utc).astimezone(tz)
+        wall = local.replace(tzinfo=None)
+        while True:
+            wall = self._prev_wall(wall)
+            fire = _resolve(wall, tz, local.fold)
+            if fire.timestamp() < before_ts:
+                return fire
+
+    def iter_fires(self, start, n=None):
+        """Следующие n срабатываний после start (без n - бесконечно)"""
+        fire_time = start
+        count = 0
+        while n is None or count < n:
+            fire_time = self.next_fire(fire_time)
+            yield fire_time
+            count += 1
+
+    def as_dict(self):
+        """Значения полей списками (0 - воскресенье)"""
+        return {name: _bits(mask) for name, mask in self.masks.items()}
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
 
 
 class CronParser:
-    """Парсер cron-выражений с поддержкой секунд"""
+    """Парсер cron-выражений с поддержкой секунд
+
+    Синтаксис Vixie cron: *, списки (0,30-45), диапазоны с шагом (1-5/2, */15,
+    10/20), имена месяцев и дней недели (jan, mon-fri), макросы @daily и т.п.
+    Необязательное шестое поле в начале - секунды.
+    """
 
     @staticmethod
     def parse(cron_string):
-        """Парсит cron-строку и возвращает расписание"""
-        parts = cron_string.strip().split()
+        """Компилирует cron-строку в CronSchedule"""
+        expression = cron_string.strip()
+        parts = MACROS.get(expression.lower(), expression).split()
 
         # Поддержка формата с секундами (6 частей) и без (5 частей)
-        if len(parts) == 6:
-            second, minute, hour, day, month, day_of_week = parts
-        elif len(parts) == 5:
-            second = "0"  # По умолчанию 0 секунд
-            minute, hour, day, month, day_of_week = parts
-        else:
+        if len(parts) == 5:
+            parts = ["0"] + parts  # По умолчанию 0 секунд
+        elif len(parts) != 6:
             raise ValueError(
                 f"Неверный формат cron: {cron_string}. Ожидается 5 или 6 частей"
             )
 
-        result = {
-            "second": CronParser._parse_part(second, 0, 59),
-            "minute": CronParser._parse_part(minute, 0, 59),
-            "hour": CronParser._parse_part(hour, 0, 23),
-            "day": CronParser._parse_part(day, 1, 31),
-            "month": CronParser._parse_part(month, 1, 12),
-            "day_of_week": CronParser._parse_part(
-                day_of_week, 0, 6
-            ),  # 0=воскресенье, 6=суббота
-        }
+        masks = {}
+        for part, (name, min_val, max_val) in zip(parts, _FIELDS):
+            masks[name] = CronParser._parse_part(part, min_val, max_val, name)
+
+        # 7 - тоже воскресенье
+        if masks["day_of_week"] >> 7 & 1:
+            masks["day_of_week"] = (masks["day_of_week"] | 1) & 0x7F
 
-        return result
+        return CronSchedule(
+            expression,
+            masks,
+            day_star=parts[3].startswith("*"),
+            dow_star=parts[5].startswith("*"),
+            wildcard_time=parts[1].startswith("*") or parts[2].startswith("*"),
+        )
 
     @staticmethod
-    def _parse_part(part, min_val, max_val):
-        """Парсит одну часть cron-выражения"""
-        if part == "*":
-            result = list(range(min_val, max_val + 1))
-        elif "-" in part:
-            start, end = map(int, part.split("-"))
-            result = list(range(start, end + 1))
-        elif part.startswith("*/"):
-            step = int(part[2:])
-            result = list(range(min_val, max_val + 1, step))
-        elif "," in part:
-            result = [int(x) for x in part.split(",")]
-        else:
-            result = [int(part)]
-        return result
+    def is_cron(schedule_str):
+        """Похожа ли строка на cron-выражение (макрос или 5-6 полей)"""
+        expression = schedule_str.strip()
+        return expression.lower() in MACROS or len(expression.split()) in (5, 6)
+
+    @staticmethod
+    def _parse_value(value, name, cron_part):
+        value = value.lower()
+        if value in _NAMES.get(name, {}):
+            return _NAMES[name][value]
+        if not value.isdigit():
+            raise ValueError(f"Неверное значение '{value}' в поле {name}: {cron_part}")
+        return int(value)
+
+    @staticmethod
+    def _parse_part(part, min_val, max_val, name="field"):
+        """Компилирует одно поле cron-выражения в битовую маску"""
+        mask = 0
+        for item in part.split(","):
+            step = None
+            if "/" in item:
+                item, step_str = item.split("/", 1)
+                if not step_str.isdigit() or int(step_str) == 0:
+                    raise ValueError(f"Неверный шаг в поле {name}: {part}")
+                step = int(step_str)
+
+            if item == "*":
+                start, end = min_val, max_val
+            elif "-" in item:
+                start_str, end_str = item.split("-", 1)
+                start = CronParser._parse_value(start_str, name, part)
+                end = CronParser._parse_value(end_str, name, part)
+            else:
+                start = CronParser._parse_value(item, name, part)
+                # a/n - от a до конца диапазона с шагом n
+                end = start if step is None else max_val
+
+            if not min_val <= start <= end <= max_val:
+                raise ValueError(
+                    f"Значение вне диапазона {min_val}-{max_val} в поле {name}: {part}"
+                )
+            for value in range(start, end + 1, step or 1):
+                mask |= 1 << value
+        return mask
@@ -1,90 +1,363 @@
 import gc
-import importlib.util
+import itertools
+import queue
 import threading
 import time
-import tracemalloc
-import weakref
-from collections import deque
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import psutil
+from sqlalchemy import create_engine
 
-from src.config import logger
+from src.config import config, logger
 
+from . import clock, watcher
+from .admission import MemoryAdmission
+from .async_runner import AsyncTaskRunner, set_async_runner
 from .dag import DAG
+from .discovery import load_file_dags
+from .distributed import DistributedExecutor, PostgresTaskQueue
+from .executors import DagExecutor, DagJob, WorkerPoolExecutor
+from .leader import PostgresLeaderElection
+from .metrics import MetricsServer
+from .pools import ResourcePools, set_pools
+from .profiling import format_report
+from .process_pool import ProcessWorkerPoolExecutor
+from .run_queue import RunQueue
+from .schedule_heap import ScheduleHeap
+from .state_store import StateStore, create_state_store
 
 
 class Croner:
-    def __init__(self, dags_folder="./dags"):
+    def __init__(
+        self,
+        dags_folder="./dags",
+        max_concurrent_dags=None,
+        executor: DagExecutor = None,
+        process_executor: DagExecutor = None,
+        state_store: StateStore = None,
+        admission: MemoryAdmission = None,
+        metrics_port=None,
+    ):
         self.dags_folder = Path(dags_folder)
         self.dags = {}  # Может накапливаться
+        self.dag_files = {}  # file_path -> [dag_id], загруженные из файла
+        self.file_events = queue.SimpleQueue()  # События наблюдателя за папкой
+        self.dags_watcher = None
+        self.sensors = {}  # dag_id -> запущенный датчик DAG (FileSensor)
+        self.dag_discovery = config.croner_config.dag_discovery  # lazy или eager
+        # Авторазнесение стартов DAG, срабатывающих в одну секунду (0 - выкл.)
+        self.stagger_window = config.croner_config.stagger_window
+        self._stagger_pending = False  # Набор DAG изменился с прошлого разнесения
         self.running = False
-        self.active_threads = weakref.WeakSet()  # Следим за активными потоками
-        self.dag_queue = deque()  # Очередь DAG ожидающих выполнения
+        # Очередь DAG, ожидающих слота: по приоритету со старением
+        self.dag_queue = RunQueue(
+            aging_rate=config.croner_config.queue_aging_per_minute / 60
+        )
         self.queue_lock = threading.Lock()  # Блокировка для работы с очередью
+        self.runs_lock = threading.Lock()  # Учет активных запусков DAG
         self.last_cleanup = datetime.now()
         self.memory_usage_log = []
+        self.schedule_heap = ScheduleHeap()  # DAG по времени следующего запуска
+        self.last_loop_at = None  # Когда последний раз отработал цикл планировщика
+        self.scan_interval = None
+        self.run_counts = {}  # (dag_id, status) -> количество запусков
+        # Отложенные запуски с задачами, ждущими повтора: ключ в куче -> DagJob
+        self.retry_jobs = {}
+        self._retry_counter = itertools.count()
+
+        # Настройки параллелизма: пул долгоживущих воркеров вместо потока на запуск
+        if executor is None:
+            executor = WorkerPoolExecutor(
+                max_workers=max_concurrent_dags
+                or config.croner_config.max_concurrent_dags
+            )
+        self.executor = executor
+        self.max_concurrent_dags = self.executor.max_workers
+
+        # Пул процессов для DAG с executor="process": память тяжелых DAG
+        # (pandas) не остается в процессе планировщика
+        if process_executor is None:
+            process_executor = ProcessWorkerPoolExecutor(
+                max_workers=config.croner_config.max_process_workers,
+                max_runs_per_worker=config.croner_config.process_worker_max_runs,
+                max_worker_rss_mb=config.croner_config.process_worker_max_rss_mb,
+            )
+        self.executors = {"thread": self.executor, "process": process_executor}
+        for dag_executor in self.executors.values():
+            dag_executor.on_complete = self.on_dag_complete
+
+        # Именованные пулы слотов для задач (postgres_write, google_api, ...)
+        self.pools = ResourcePools(config.croner_config.pools)
+        set_pools(self.pools)
+
+        # Общий цикл asyncio для задач async def всех DAG (поток стартует
+        # при первой такой задаче)
+        self.async_runner = AsyncTaskRunner()
+        set_async_runner(self.async_runner)
+
+        # Допуск DAG к запуску по прогнозу памяти: тяжелые DAG, которые
+        # не помещаются в бюджет, ждут в очереди
+        if admission is None:
+            admission = MemoryAdmission(
+                budget_mb=config.croner_config.memory_budget_mb or None,
+                default_peak_mb=config.croner_config.default_dag_peak_mb,
+            )
+        self.admission = admission
+
+        # HTTP-сервер метрик и проверки готовности (порт публикует docker-compose)
+        if metrics_port is None:
+            metrics_port = config.croner_config.metrics_port
+        self.metrics_server = None
+        if metrics_port:
+            self.metrics_server = MetricsServer(
+                self,
+                host=config.croner_config.metrics_host,
+                port=metrics_port,
+                profile_token=config.croner_config.profile_token,
+            )
 
-        # Настройки параллелизма
-        self.max_concurrent_dags = 5
-        self.available_slots = threading.Semaphore(
-            self.max_concurrent_dags
-        )  # Семафор для ограничения параллелизма
+        # Общий пул подключений планировщика к Postgres
+        self._db_engine = None
+        self._db_engine_lock = threading.Lock()
 
-        # Для мониторинга памяти
-        tracemalloc.start()
+        # Сохраненное состояние DAG: переживает рестарт контейнера
+        if state_store is None:
+            state_store = create_state_store(
+                config.croner_config.state_backend,
+                config.croner_config.state_sqlite_path,
+                engine_factory=self.get_db_engine,
+                create_schema=config.croner_config.state_create_schema,
+            )
+        self.state_store = state_store
+        self.catchup = config.croner_config.catchup
+        self.max_catchup_runs = config.croner_config.max_catchup_runs
+        self._stored_states = None  # Загружается при первом сканировании
+        # Состояние не загрузилось (база недоступна при старте): догоняние
+        # повторяется, когда хранилище снова ответит
+        self._restore_failed = False
+
+        # Распределенный режим: задачи выполняют воркеры (python -m src.croner
+        # worker) через очередь в Postgres. "dags" - только DAG с
+        # executor="distributed", "all" - все DAG
+        self.distributed_mode = config.croner_config.distributed_mode
+        self.task_queue = None
+        if self.distributed_mode != "off":
+            # У очереди свой пул подключений: постановка задач из потоков DAG
+            # не отнимает соединения у хранилища состояния, /health и лидера
+            queue_engine = create_engine(
+                config.db_config.get_url(),
+                pool_size=2,
+                max_overflow=config.croner_config.distributed_max_runs,
+                pool_pre_ping=True,
+            )
+            self.task_queue = PostgresTaskQueue(
+                queue_engine,
+                heartbeat_timeout=config.croner_config.worker_heartbeat_timeout,
+                create_schema=config.croner_config.state_create_schema,
+            )
+            distributed_executor = DistributedExecutor(
+                self.task_queue, max_workers=config.croner_config.distributed_max_runs
+            )
+            distributed_executor.on_complete = self.on_dag_complete
+            self.executors["distributed"] = distributed_executor
+
+        # DAG, для которых включено профилирование памяти: dag_id -> сколько
+        # запусков осталось (None - пока не выключат)
+        self.profiling = {}
+
+        # Несколько экземпляров над одной папкой DAG: запускает только ведущий
+        self.leader = None
+        if config.croner_config.leader_lock:
+            self.leader = PostgresLeaderElection(
+                self.get_db_engine(),
+                name=config.croner_config.leader_lock,
+                check_interval=config.croner_config.leader_check_interval,
+                create_schema=config.croner_config.state_create_schema,
+            )
+            if config.croner_config.state_backend != "postgres":
+                logger.warning(
+                    "⚠️ Выбор ведущего без общего состояния: после смены ведущего "
+                    "расписание начнется с его локального состояния"
+                )
+
+    @property
+    def is_leader(self):
+        """Запускает ли этот экземпляр DAG (без выбора лидера - всегда)"""
+        return self.leader is None or self.leader.is_leader
+
+    def check_leadership(self):
+        """Проверяет лидерство; при его смене перечитывает состояние DAG"""
+        if self.leader is None:
+            return True
+        is_leader, changed = self.leader.check()
+        if changed and is_leader:
+            # Пока экземпляр был резервным, расписание двигал прежний ведущий
+            self._stored_states = None
+            for dag_id, dag_info in list(self.dags.items()):
+                self.restore_dag_state(dag_info["dag"])
+                self.schedule_dag(dag_id)
+                self.start_sensor(dag_id)
+        elif changed:
+            # Новые запуски больше не берем; уже застолбленные доработают
+            for dag_id in list(self.sensors):
+                self.stop_sensor(dag_id)
+        return is_leader
+
+    def claim_run(self, job: DagJob):
+        """Застолбляет плановый запуск за экземпляром (без выбора лидера - всегда)"""
+        if self.leader is None:
+            return True
+        try:
+            claimed = self.leader.claim_run(
+                job.dag_id, job.dag.claim_slot(job.scheduled_for)
+            )
+        except Exception as e:
+            logger.error(f"❌ Не удалось застолбить запуск DAG {job.dag_id}", e)
+            return False
+        if not claimed:
+            logger.warning(
+                f"⏭️ Запуск DAG {job.dag_id} на {job.scheduled_for} "
+                f"уже взял другой экземпляр",
+                dag=job.dag_id,
+            )
+        return claimed
+
+    def get_db_engine(self):
+        """Возвращает общий для планировщика пул подключений к Postgres"""
+        with self._db_engine_lock:
+            if self._db_engine is None:
+                self._db_engine = create_engine(
+                    config.db_config.get_url(),
+                    pool_size=2,
+                    max_overflow=2,
+                    pool_pre_ping=True,
+                )
+            return self._db_engine
+
+    def restore_dag_state(self, dag: DAG):
+        """Восстанавливает состояние DAG из хранилища и догоняет пропущенные запуски"""
+        if self._stored_states is None:
+            try:
+                self._stored_states = self.state_store.load_all()
+            except Exception as e:
+                logger.error(
+                    "❌ Не удалось загрузить сохраненное состояние DAG, "
+                    "повторим при следующей очистке",
+                    e,
+                )
+                self._stored_states = {}
+                self._restore_failed = True
+
+        state = self._stored_states.pop(dag.dag_id, None)
+        if not state:
+            return
+
+        policy = dag.catchup or self.catchup
+        missed = dag.restore_state(
+            state["last_run"],
+            state["next_run"],
+            clock.now(),
+            policy,
+            self.max_catchup_runs,
+        )
+        logger.info(
+            f"💾 Восстановлено состояние DAG {dag.dag_id}: последний запуск "
+            f"{dag.last_run}, пропущено запусков: {len(missed)} (политика: {policy}), "
+            f"следующий запуск: {dag.next_run}",
+            dag=dag.dag_id,
+            missed=len(missed),
+            catchup=policy,
+        )
+        self.save_dag_state(dag)
+
+    def retry_state_restore(self):
+        """Догоняет запуски DAG, если при старте хранилище состояния не ответило"""
+        if not self._restore_failed or not self.is_leader:
+            return
+        self._restore_failed = False
+        self._stored_states = None
+        for dag_id, dag_info in list(self.dags.items()):
+            dag = dag_info["dag"]
+            if dag.last_run is not None:
+                # DAG уже запускался в этом процессе: сохраненное состояние старее
+                continue
+            self.restore_dag_state(dag)
+            if self._restore_failed:
+                return
+            self.schedule_dag(dag_id)
+
+    def save_dag_state(self, dag: DAG):
+        """Сохраняет время последнего и следующего запуска DAG"""
+        if not self.is_leader:
+            # Резервный экземпляр не перетирает состояние ведущего
+            return
+        try:
+            self.state_store.save_state(dag.dag_id, dag.last_run, dag.next_run)
+        except Exception as e:
+            logger.error(f"❌ Не удалось сохранить состояние DAG {dag.dag_id}", e)
+
+    def discover_file_dags(self, file_path):
+        """DAG файла: {имя переменной: DAG}
+
+        В режиме lazy объявления читаются из AST без выполнения модуля
+        (тяжелые импорты вроде pandas не попадают в планировщик), модуль
+        импортируется при первом запуске DAG.
+        """
+        return load_file_dags(file_path, lazy=self.dag_discovery == "lazy")
 
     def load_dag_from_file(self, file_path):
-        """Загружает DAG из Python файла с контролем памяти"""
+        """Загружает DAG из Python файла; измененный файл перезагружается"""
         try:
             # Проверяем, не изменился ли файл
             dag_key = str(file_path)
             current_mtime = file_path.stat().st_mtime
 
-            # Ищем существующий DAG по file_path (а не по dag_key)
-            existing_dag_id = None
-            for dag_id, dag_info in self.dags.items():
-                if dag_info["file_path"] == dag_key:
-                    existing_dag_id = dag_id
-                    break
+            # Все DAG, ранее загруженные из этого файла
+            existing_dag_ids = list(self.dag_files.get(dag_key, []))
 
             # Если файл изменился или DAG еще не загружен, загружаем/перезагружаем
-            if existing_dag_id is None:
+            if not existing_dag_ids:
                 logger.info(f"🆕 Найден новый DAG файл: {file_path}")
-            elif current_mtime > self.dags[existing_dag_id].get("mtime", 0):
+            elif current_mtime != self.dags[existing_dag_ids[0]].get("mtime", 0):
                 logger.warning(f"🔄 Файл {file_path} изменился, перезагружаем DAG")
-                # Удаляем старый DAG
-                del self.dags[existing_dag_id]
             else:
                 # Файл не изменился, ничего не делаем
                 return []
 
-            spec = importlib.util.spec_from_file_location(
-                f"dag_module_{file_path.stem}", file_path
-            )
-            module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(module)
+            # Сначала разбираем файл: при ошибке в нем старые DAG остаются
+            found_dags = self.discover_file_dags(file_path)
+
+            # Удаляем старые DAG файла, запоминая состояние их расписания
+            previous = {}
+            for dag_id in existing_dag_ids:
+                previous[dag_id] = self.dags[dag_id]["dag"]
+                self.unload_dag(dag_id)
 
             loaded_dags = []
-            for attr_name in dir(module):
-                attr = getattr(module, attr_name)
-                if isinstance(attr, DAG):
-                    dag_id = f"{file_path.stem}_{attr_name}"
-                    self.dags[dag_id] = {
-                        "dag": attr,
-                        "mtime": current_mtime,
-                        "file_path": dag_key,
-                        "loaded_at": datetime.now(),
-                    }
-                    loaded_dags.append(dag_id)
-                    logger.info(
-                        f"✅ Загружен DAG: {dag_id} с расписанием: {attr.schedule_interval}"
-                    )
+            for attr_name, attr in found_dags.items():
+                dag_id = f"{file_path.stem}_{attr_name}"
+                self.dags[dag_id] = {
+                    "dag": attr,
+                    "mtime": current_mtime,
+                    "file_path": dag_key,
+                    "attr_name": attr_name,
+                    "loaded_at": datetime.now(),
+                }
+                loaded_dags.append(dag_id)
+                self._stagger_pending = True
+                if dag_id in previous:
+                    attr.inherit_state(previous[dag_id])
+                else:
+                    self.restore_dag_state(attr)
+                self.schedule_dag(dag_id)
+                self.start_sensor(dag_id)
+                logger.info(
+                    f"✅ Загружен DAG: {dag_id} с расписанием: {attr.schedule_interval}"
+                )
 
-            # Очищаем ссылки на модуль чтобы избежать циклических ссылок
-            del module
-            del spec
+            if loaded_dags:
+                self.dag_files[dag_key] = loaded_dags
 
             return loaded_dags
 
@@ -96,29 +369,38 @@ class Croner:
         """Выгружает DAG из памяти"""
         if dag_id in self.dags:
             print(f"Выгружаем DAG: {dag_id}")
-            del self.dags[dag_id]
+            dag_key = self.dags.pop(dag_id)["file_path"]
+            self.stop_sensor(dag_id)
+            self._stagger_pending = True
+            self.schedule_heap.remove(dag_id)
+            file_dags = self.dag_files.get(dag_key, [])
+            if dag_id in file_dags:
+                file_dags.remove(dag_id)
+            if not file_dags:
+                self.dag_files.pop(dag_key, None)
             return True
         return False
 
+    def unload_dag_file(self, file_path):
+        """Выгружает все DAG удаленного файла"""
+        dag_ids = list(self.dag_files.get(str(file_path), []))
+        for dag_id in dag_ids:
+            self.unload_dag(dag_id)
+        if dag_ids:
+            logger.warning(f"Удалены DAG: {dag_ids}")
+
     def cleanup_old_dags(self):
         """Очищает DAG, файлы которых были удалены"""
         current_files = {
             str(p) for p in self.dags_folder.glob("*.py") if not p.name.startswith("_")
         }
 
-        dags_to_remove = []
-        for dag_id, dag_info in self.dags.items():
-            if dag_info["file_path"] not in current_files:
-                dags_to_remove.append(dag_id)
-
-        for dag_id in dags_to_remove:
-            self.unload_dag(dag_id)
-
-        if dags_to_remove:
-            logger.warning(f"Удалены DAG: {dags_to_remove}")
+        for dag_key in list(self.dag_files):
+            if dag_key not in current_files:
+                self.unload_dag_file(dag_key)
 
     def scan_dags_folder(self):
-        """Сканирует папку с DAG и загружает новые с контролем памяти"""
+        """Полное сканирование папки с DAG: новые и измененные файлы, удаленные DAG"""
         if not self.dags_folder.exists():
             self.dags_folder.mkdir(parents=True)
             logger.info(f"Создана папка для DAG: {self.dags_folder}")
@@ -130,79 +412,444 @@ class Croner:
         for file_path in self.dags_folder.glob("*.py"):
             if file_path.name.startswith("_"):
                 continue
+            # Неизмененные файлы пропускаются по mtime
+            self.load_dag_from_file(file_path)
+        self.stagger_dags()
 
-            dag_key = str(file_path)
-            if dag_key not in [info["file_path"] for info in self.dags.values()]:
-                logger.info(f"Найден новый DAG файл: {file_path}")
-                self.load_dag_from_file(file_path)
+    def on_file_event(self, kind, path):
+        """Колбэк наблюдателя: передает событие в поток планировщика"""
+        self.file_events.put((kind, path))
+        self.schedule_heap.wake()
+
+    def process_file_events(self):
+        """Применяет накопленные события файлов: перезагружает только затронутые модули"""
+        while True:
+            try:
+                kind, path = self.file_events.get_nowait()
+            except queue.Empty:
+                self.stagger_dags()
+                return
+
+            if kind == watcher.RESCAN:
+                self.scan_dags_folder()
+            elif path.name.startswith("_"):
+                continue
+            elif kind == watcher.DELETED:
+                self.unload_dag_file(path)
+            elif path.exists():
+                self.load_dag_from_file(path)
+
+    def stagger_dags(self, current_time=None):
+        """Разносит старты DAG, у которых совпадают плановые времена
+
+        DAG без явного spread, срабатывающие в одну секунду в ближайшие сутки,
+        получают разные сдвиги в окне stagger_window: жадная раскраска графа
+        совпадений, первым (со сдвигом 0) идет DAG с большим приоритетом.
+        Сдвиги зависят только от набора DAG, поэтому одинаковы между рестартами.
+        """
+        if not self._stagger_pending or not self.stagger_window:
+            return
+        self._stagger_pending = False
+        current_time = current_time or clock.now()
+        until = current_time + timedelta(days=1)
+
+        fire_times = {}  # dag_id -> плановые времена без сдвига (timestamp)
+        for dag_id, dag_info in self.dags.items():
+            dag = dag_info["dag"]
+            if dag.spread is not None:
+                continue
+            shift = dag.start_offset
+            runs = dag.upcoming_runs(current_time, limit=1440, until=until)
+            if runs:
+                fire_times[dag_id] = {run.timestamp() - shift for run in runs}
+
+        order = sorted(
+            fire_times, key=lambda dag_id: (-self.dags[dag_id]["dag"].priority, dag_id)
+        )
+        colors = {}
+        for dag_id in order:
+            taken = {
+                colors[other]
+                for other in colors
+                if not fire_times[dag_id].isdisjoint(fire_times[other])
+            }
+            colors[dag_id] = next(
+                color for color in itertools.count() if color not in taken
+            )
+
+        slots = max(colors.values(), default=0) + 1
+        for dag_id, color in colors.items():
+            offset = round(color * self.stagger_window / slots)
+            dag = self.dags[dag_id]["dag"]
+            if dag.set_start_offset(offset):
+                self.schedule_dag(dag_id, current_time)
+                logger.info(
+                    f"⏱️ DAG {dag_id}: сдвиг старта {offset}с, "
+                    f"следующий запуск {dag.next_run}",
+                    dag=dag_id,
+                )
+
+    def start_sensor(self, dag_id):
+        """Запускает датчик DAG (только при работающем планировщике)"""
+        dag_info = self.dags.get(dag_id)
+        if not self.running or dag_info is None or dag_id in self.sensors:
+            return
+        if not self.is_leader:
+            return
+        sensor = dag_info["dag"].sensor
+        if sensor is None:
+            return
+        processed = self.load_sensor_files(dag_info["dag"].dag_id)
+        try:
+            sensor.start(
+                lambda files: self.trigger_dag(dag_id, {"files": files}),
+                processed=processed,
+            )
+        except Exception as e:
+            logger.error(f"❌ Не удалось запустить датчик DAG {dag_id}", e)
+            return
+        self.sensors[dag_id] = sensor
 
-    def run_dag_in_thread(self, dag_id, dag: DAG):
-        """Запускает DAG в отдельном потоке с контролем ресурсов"""
+    def load_sensor_files(self, dag_id):
+        """Обработанные файлы датчика из хранилища; исчезнувшие забываются"""
         try:
-            logger.info(f"Запуск DAG: {dag_id}")
-            dag.run()
+            processed = self.state_store.load_sensor_files(dag_id)
         except Exception as e:
-            logger.critical(f"Ошибка при выполнении DAG {dag_id}: {e}")
-        finally:
-            # Освобождаем слот и убираем поток из отслеживания
-            self.available_slots.release()
-            if threading.current_thread() in self.active_threads:
-                self.active_threads.remove(threading.current_thread())
-
-            # Проверяем очередь после завершения DAG
+            logger.error(
+                f"❌ Не удалось загрузить обработанные файлы датчика DAG {dag_id}, "
+                f"файлы в папке будут переданы в DAG заново",
+                e,
+            )
+            return {}
+        gone = [path for path in processed if not Path(path).exists()]
+        if gone:
+            for path in gone:
+                del processed[path]
+            try:
+                self.state_store.forget_sensor_files(dag_id, gone)
+            except Exception as e:
+                logger.warning(f"Не удалось забыть удаленные файлы DAG {dag_id}: {e}")
+        return processed
+
+    def save_sensor_files(self, job: DagJob):
+        """Запоминает файлы успешного запуска по датчику"""
+        sensor = job.dag.sensor
+        files = (job.conf or {}).get("files")
+        if sensor is None or not files or job.status != "success":
+            return
+        try:
+            self.state_store.save_sensor_files(
+                job.dag.dag_id, sensor.processed_files(files)
+            )
+        except Exception as e:
+            logger.error(
+                f"❌ Не удалось сохранить обработанные файлы DAG {job.dag_id}", e
+            )
+
+    def stop_sensor(self, dag_id):
+        sensor = self.sensors.pop(dag_id, None)
+        if sensor is not None:
+            sensor.stop()
+
+    def trigger_dag(self, dag_id, conf=None):
+        """Запускает DAG вне расписания с параметрами conf (dag_run.conf)
+
+        False, если DAG не загружен, уже выполняется или такой запуск уже
+        ждет в очереди: датчик повторит попытку, не теряя файлы.
+        """
+        dag_info = self.dags.get(dag_id)
+        if dag_info is None or not self.running:
+            return False
+        dag: DAG = dag_info["dag"]
+        if not dag.can_start_run() or self.is_queued((dag_id, "sensor")):
+            return False
+        job = self.create_job(dag_id, dag, clock.now())
+        job.conf = dict(conf or {})
+        files = job.conf.get("files", [])
+        logger.info(
+            f"📂 Запуск DAG {dag_id} по датчику: {len(files)} новых файлов",
+            dag=dag_id,
+            files=files,
+        )
+        if not self.submit_job(job):
+            self.add_dag_to_queue(job)
+            self.process_queue()
+        return True
+
+    def get_executor(self, dag: DAG):
+        """Возвращает бэкенд выполнения, выбранный в DAG"""
+        if self.distributed_mode == "all" and self.task_queue is not None:
+            return self.executors["distributed"]
+        dag_executor = self.executors.get(dag.executor)
+        if dag_executor is None:
+            logger.warning(
+                f"Неизвестный executor '{dag.executor}' у DAG {dag.dag_id}, используем пул потоков"
+            )
+            return self.executor
+        return dag_executor
+
+    def create_job(self, dag_id, dag: DAG, scheduled_for=None):
+        """Создает задание на выполнение DAG"""
+        dag_info = self.dags.get(dag_id, {})
+        job = DagJob(
+            dag_id,
+            dag,
+            file_path=dag_info.get("file_path"),
+            attr_name=dag_info.get("attr_name"),
+            scheduled_for=scheduled_for,
+        )
+        job.profile_memory = dag.profile_memory or self._take_profiling_run(dag_id)
+        return job
+
+    def enable_profiling(self, dag_id, runs=None):
+        """Включает профилирование памяти DAG на runs запусков (None - до выключения)"""
+        if dag_id not in self.dags:
+            raise KeyError(f"DAG {dag_id} не найден")
+        self.profiling[dag_id] = runs
+        logger.info(
+            f"🔬 Профилирование памяти DAG {dag_id} включено"
+            + (f" на {runs} запусков" if runs else "")
+        )
+
+    def disable_profiling(self, dag_id):
+        """Выключает профилирование памяти DAG"""
+        if self.profiling.pop(dag_id, False) is not False:
+            logger.info(f"🔬 Профилирование памяти DAG {dag_id} выключено")
+
+    def _take_profiling_run(self, dag_id):
+        """Нужно ли профилировать очередной запуск DAG"""
+        if dag_id not in self.profiling:
+            return False
+        remaining = self.profiling[dag_id]
+        if remaining is not None:
+            if remaining <= 1:
+                del self.profiling[dag_id]
+            else:
+                self.profiling[dag_id] = remaining - 1
+        return True
+
+    def submit_job(self, job: DagJob):
+        """Отправляет DAG в бэкенд выполнения
+
+        False, если нет свободных слотов, DAG уже выполняется max_active_runs раз
+        или прогноз памяти не укладывается в бюджет.
+        """
+        dag = job.dag
+        # Продолжение отложенного запуска уже учтено в active_runs
+        new_run = job.dag_run is None
+        if new_run:
+            with self.runs_lock:
+                if not dag.can_start_run():
+                    return False
+                # Учитываем запуск до отправки: бэкенд может завершить его раньше,
+                # чем мы вернемся из try_submit
+                dag.active_runs += 1
+        dag_executor = self.get_executor(dag)
+        if dag_executor.free_slots() and self.admission.try_admit(job):
+            if dag_executor.try_submit(job):
+                return True
+            self.admission.release(job)
+        if new_run:
+            with self.runs_lock:
+                dag.active_runs -= 1
+        return False
+
+    def on_dag_complete(self, job: DagJob):
+        """Вызывается бэкендом после завершения DAG и освобождения слота"""
+        if job.deferred:
+            self.admission.finish(job)
+            self.schedule_retry(job)
+            return
+        if job.dag_run is not None:
+            # Продолжение отложенного запуска: сегменты shared memory с результатами
+            # задач больше не нужны, даже если процесс-воркер упал или был убит
+            job.dag_run.results.close()
+
+        with self.runs_lock:
+            job.dag.active_runs = max(job.dag.active_runs - 1, 0)
+            key = (job.dag_id, job.status)
+            self.run_counts[key] = self.run_counts.get(key, 0) + 1
+        self.admission.finish(job)
+        logger.info(
+            f"DAG {job.dag_id} завершен за {job.run_time:.2f}с "
+            f"(ожидание слота {job.wait_time:.2f}с)",
+            dag=job.dag_id,
+            run_time=job.run_time,
+            wait_time=job.wait_time,
+        )
+        if job.memory_report:
+            logger.info(
+                f"🔬 Память DAG {job.dag_id}: {format_report(job.memory_report)}",
+                dag=job.dag_id,
+                memory_profile=job.memory_report,
+            )
+        self.save_dag_state(job.dag)
+        self.save_sensor_files(job)
+        try:
+            self.state_store.record_run(job.dag.dag_id, job)
+        except Exception as e:
+            logger.error(f"❌ Не удалось сохранить историю запуска DAG {job.dag_id}", e)
+
+        # Проверяем очередь после завершения DAG
+        if self.running:
+            # Догоняние могло ждать окончания этого запуска
+            if job.dag_id in self.dags and job.dag_id not in self.schedule_heap:
+                self.schedule_dag(job.dag_id)
+            self.process_queue()
+
+    def schedule_retry(self, job: DagJob):
+        """Ставит продолжение отложенного запуска в кучу на время повтора задач"""
+        dag_run = job.result
+        retry_job = DagJob(
+            job.dag_id,
+            job.dag,
+            file_path=job.file_path,
+            attr_name=job.attr_name,
+            scheduled_for=job.scheduled_for,
+        )
+        retry_job.dag_run = dag_run
+        retry_job.profile_memory = job.profile_memory
+        retry_at = dag_run.next_retry_at()
+        key = ("retry", job.dag_id, next(self._retry_counter))
+        self.retry_jobs[key] = retry_job
+        self.schedule_heap.push(key, retry_at.timestamp())
+        logger.info(
+            f"⏳ DAG {job.dag_id} освободил слот, повтор задач в {retry_at:%H:%M:%S}",
+            dag=job.dag_id,
+        )
+        if self.running:
+            self.process_queue()
+
+    def resume_retry(self, retry_job: DagJob):
+        """Продолжает отложенный запуск, когда подошло время повтора"""
+        dag_info = self.dags.get(retry_job.dag_id)
+        if dag_info is None or dag_info["dag"] is not retry_job.dag:
+            # DAG удален или перезагружен: старый запуск не продолжаем
+            logger.warning(
+                f"DAG {retry_job.dag_id} изменился, повтор задач отменен",
+                dag=retry_job.dag_id,
+            )
+            with self.runs_lock:
+                retry_job.dag.active_runs = max(retry_job.dag.active_runs - 1, 0)
+            retry_job.dag_run.results.close()
+            return
+        retry_job.enqueued_at = time.monotonic()
+        if self.submit_job(retry_job):
+            logger.info(f"🔁 Повтор задач DAG {retry_job.dag_id}")
+        else:
+            self.add_dag_to_queue(retry_job)
             self.process_queue()
 
-    def add_dag_to_queue(self, dag_id, dag: DAG):
+    def add_dag_to_queue(self, job: DagJob):
         """Добавляет DAG в очередь на выполнение"""
+        dag_id = job.dag_id
         with self.queue_lock:
-            # Проверяем, нет ли уже этого DAG в очереди
-            for queued_dag_id, _ in self.dag_queue:
-                if queued_dag_id == dag_id:
-                    logger.info(f"DAG {dag_id} уже в очереди, пропускаем дублирование")
-                    return
-
-            self.dag_queue.append((dag_id, dag))
+            if not self.dag_queue.push(job):
+                logger.info(f"DAG {dag_id} уже в очереди, пропускаем дублирование")
+                return
             logger.info(
-                f"DAG {dag_id} добавлен в очередь. Размер очереди: {len(self.dag_queue)}"
+                f"DAG {dag_id} (приоритет {job.dag.priority}) добавлен в очередь. "
+                f"Размер очереди: {len(self.dag_queue)}"
             )
 
+    def is_queued(self, dag_id):
+        """Есть ли запуск DAG в очереди"""
+        with self.queue_lock:
+            return dag_id in self.dag_queue
+
     def process_queue(self):
         """Обрабатывает очередь DAG, запуская их при наличии свободных слотов"""
         with self.queue_lock:
-            while self.dag_queue and self.available_slots.acquire(blocking=False):
-                dag_id, dag = self.dag_queue.popleft()
+            # Задания идут по убыванию приоритета; DAG разных бэкендов
+            # не блокируют друг друга, поэтому проходим всю очередь
+            started = self.dag_queue.pop_eligible(self.submit_job)
+            for job in started:
                 logger.info(
-                    f"Запуск DAG {dag_id} из очереди. Осталось в очереди: {len(self.dag_queue)}"
+                    f"Запуск DAG {job.dag_id} из очереди "
+                    f"(приоритет {job.dag.priority}). "
+                    f"Осталось в очереди: {len(self.dag_queue)}"
                 )
 
-                thread = threading.Thread(
-                    target=self.run_dag_in_thread, args=(dag_id, dag), daemon=True
-                )
-                self.active_threads.add(thread)
-                thread.start()
+    def schedule_dag(self, dag_id, current_time=None):
+        """Ставит DAG в кучу расписания на время его следующего запуска"""
+        dag_info = self.dags.get(dag_id)
+        if dag_info is None:
+            self.schedule_heap.remove(dag_id)
+            return
+        due_time = dag_info["dag"].get_due_time(current_time or clock.now())
+        self.schedule_heap.push(dag_id, due_time.timestamp() if due_time else None)
 
     def run_scheduled_dags(self):
-        """Запускает DAG по расписанию с использованием очереди"""
-        current_time = datetime.now()
+        """Запускает DAG, время которых наступило, с использованием очереди"""
+        current_time = clock.now()
 
-        for dag_id, dag_info in self.dags.items():
+        for dag_id in self.schedule_heap.pop_due(current_time.timestamp()):
+            retry_job = self.retry_jobs.pop(dag_id, None)
+            if retry_job is not None:
+                self.resume_retry(retry_job)
+                continue
+            dag_info = self.dags.get(dag_id)
+            if dag_info is None:
+                continue
             dag: DAG = dag_info["dag"]
 
-            if dag.should_run(current_time):
-                # Пытаемся запустить сразу если есть свободные слоты
-                if self.available_slots.acquire(blocking=False):
-                    logger.warning(f"Немедленный запуск DAG: {dag_id}")
-                    thread = threading.Thread(
-                        target=self.run_dag_in_thread, args=(dag_id, dag), daemon=True
+            if not dag.should_run(current_time):
+                self.schedule_dag(dag_id, current_time)
+                continue
+
+            busy = not dag.can_start_run()
+            if dag.is_catching_up() and (busy or self.is_queued(dag_id)):
+                # Пропущенные запуски не теряем: DAG вернется в кучу
+                # после завершения текущего запуска
+                logger.info(
+                    f"DAG {dag_id} выполняется, догоняние продолжится после завершения"
+                )
+                continue
+            if busy:
+                if dag.on_overlap != "queue":
+                    next_due = dag.advance_schedule(current_time)
+                    self.schedule_heap.push(
+                        dag_id, next_due.timestamp() if next_due else None
                     )
-                    self.active_threads.add(thread)
-                    thread.start()
-                else:
-                    # Если нет свободных слотов, добавляем в очередь
+                    self.save_dag_state(dag)
                     logger.warning(
-                        f"Свободных слотов нет, добавляем DAG {dag_id} в очередь"
+                        f"⏭️ DAG {dag_id} еще выполняется "
+                        f"({dag.active_runs}/{dag.max_active_runs}), запуск пропущен",
+                        dag=dag_id,
                     )
-                    self.add_dag_to_queue(dag_id, dag)
+                    continue
+
+            # Плановое время запуска (при догонянии - время пропущенного запуска)
+            scheduled_for = (
+                dag.next_run
+                if dag.next_run is not None and dag.next_run <= current_time
+                else current_time
+            )
+            job = self.create_job(dag_id, dag, scheduled_for)
+
+            # Сдвигаем расписание сразу, не дожидаясь старта DAG в потоке
+            next_due = dag.advance_schedule(current_time)
+            self.schedule_heap.push(dag_id, next_due.timestamp() if next_due else None)
+            self.save_dag_state(dag)
+            if not self.claim_run(job):
+                continue
+
+            # Пытаемся запустить сразу если есть свободные слоты
+            if self.submit_job(job):
+                logger.warning(f"Немедленный запуск DAG: {dag_id}")
+            else:
+                # Если нет свободных слотов, памяти или DAG еще выполняется,
+                # добавляем в очередь
+                if busy:
+                    reason = "DAG еще выполняется"
+                elif self.admission.is_waiting(dag_id):
+                    reason = "Не хватает памяти"
+                else:
+                    reason = "Свободных слотов нет"
+                logger.warning(f"{reason}, добавляем DAG {dag_id} в очередь")
+                self.add_dag_to_queue(job)
+                # Слот мог освободиться, пока DAG ставился в очередь
+                self.process_queue()
 
     def monitor_memory_usage(self):
         """Мониторинг использования памяти"""
@@ -215,9 +862,9 @@ class Croner:
                 "timestamp": datetime.now(),
                 "memory_mb": memory_mb,
                 "active_dags": len(self.dags),
-                "active_threads": sum(1 for t in self.active_threads if t.is_alive()),
+                "active_threads": self.executor.busy_slots(),
                 "queue_size": len(self.dag_queue),
-                "available_slots": self.available_slots._value,  # Текущее количество доступных слотов
+                "available_slots": self.executor.free_slots(),
             }
         )
 
@@ -253,54 +900,120 @@ class Croner:
             memory_usage = self.monitor_memory_usage()
             print(f"Использование памяти: {memory_usage:.2f} MB")
             print(f"Активных DAG: {len(self.dags)}")
-            print(
-                f"Активных потоков: {sum(1 for t in self.active_threads if t.is_alive())}"
-            )
+            print(f"Занятых слотов: {self.executor.busy_slots()}")
             print(f"DAG в очереди: {len(self.dag_queue)}")
 
+            if self.leader is not None and self.is_leader:
+                try:
+                    self.leader.cleanup_claims()
+                except Exception as e:
+                    logger.warning(f"Не удалось очистить отметки запусков: {e}")
+            if self.task_queue is not None and self.is_leader:
+                try:
+                    self.task_queue.cleanup()
+                except Exception as e:
+                    logger.warning(f"Не удалось очистить очередь задач: {e}")
+
             self.last_cleanup = current_time
 
     def start_scheduler(self, scan_interval=30):
         """Запускает планировщик с контролем памяти"""
 
         def scheduler_loop():
+            next_cleanup = time.monotonic() + scan_interval
             while self.running:
+                self.last_loop_at = time.monotonic()
                 try:
-                    self.scan_dags_folder()
-                    self.run_scheduled_dags()
-                    self.periodic_cleanup()
+                    # Изменения папки приходят событиями наблюдателя,
+                    # а DAG запускаются по дедлайнам кучи
+                    self.process_file_events()
+                    if time.monotonic() >= next_cleanup:
+                        self.periodic_cleanup()
+                        self.retry_state_restore()
+                        next_cleanup = time.monotonic() + scan_interval
+                    if self.check_leadership():
+                        self.run_scheduled_dags()
                 except Exception as e:
                     print(f"Ошибка в планировщике: {e}")
-                time.sleep(scan_interval)
+                # Спим до ближайшего запуска DAG, события файла
+                # или до изменения расписания (добавление/удаление DAG)
+                timeout = max(next_cleanup - time.monotonic(), 0)
+                if self.leader is not None:
+                    timeout = min(timeout, self.leader.wait_time())
+                if self.is_leader:
+                    self.schedule_heap.wait(timeout)
+                else:
+                    # Резерв не запускает DAG: ждем только проверки лидерства
+                    time.sleep(timeout)
 
         self.running = True
+        self.scan_interval = scan_interval
+        self.executor.start()
+        self.admission.start()
+
+        # Наблюдатель ставится до первичной загрузки: файл, записанный во время
+        # сканирования, придет событием (повторная загрузка файла безопасна)
+        self.dags_watcher = watcher.create_watcher(
+            self.dags_folder,
+            self.on_file_event,
+            pattern="*.py",
+            poll_interval=scan_interval,
+        )
+        self.dags_watcher.start()
+        self.scan_dags_folder()
+        # DAG, загруженные до старта планировщика, тоже получают датчики
+        for dag_id in list(self.dags):
+            self.start_sensor(dag_id)
         scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
         scheduler_thread.start()
-        print(f"Планировщик запущен. Сканирование каждые {scan_interval} секунд")
+        if self.metrics_server:
+            self.metrics_server.start()
+        print(
+            f"Планировщик запущен. Наблюдение за {self.dags_folder}: "
+            f"{type(self.dags_watcher).__name__}, очистка каждые {scan_interval} секунд"
+        )
         print(f"Максимум параллельных DAG: {self.max_concurrent_dags}")
 
     def stop_scheduler(self):
         """Останавливает планировщик и очищает ресурсы"""
         self.running = False
+        self.schedule_heap.wake()
+        if self.dags_watcher:
+            self.dags_watcher.stop()
+            self.dags_watcher = None
+        for dag_id in list(self.sensors):
+            self.stop_sensor(dag_id)
         print("Останавливаем планировщик...")
 
         # Очищаем очередь
         with self.queue_lock:
             self.dag_queue.clear()
 
-        # Ждем завершения активных потоков (максимум 30 секунд)
-        timeout = 30
-        start_time = time.time()
+        # Отменяем активные DAG: задачи получают отмену токена,
+        # процессы-воркеры убиваются; ждем завершения максимум 30 секунд
+        busy = sum(ex.busy_slots() for ex in self.executors.values())
+        if busy:
+            print(f"Отменяем и ожидаем завершения {busy} активных DAG...")
+        for dag_executor in self.executors.values():
+            dag_executor.cancel_running("остановка планировщика")
+        deadline = time.monotonic() + 30
+        for dag_executor in self.executors.values():
+            dag_executor.shutdown(timeout=max(deadline - time.monotonic(), 0))
+
+        self.async_runner.stop()
+        self.admission.stop()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        if self.leader is not None:
+            # Резервный экземпляр сразу подхватит запуски
+            self.leader.release()
 
-        active_threads = [t for t in self.active_threads if t.is_alive()]
-        if active_threads:
-            print(f"Ожидаем завершения {len(active_threads)} активных DAG...")
-            for thread in active_threads:
-                thread.join(timeout=timeout - (time.time() - start_time))
+        self.retry_jobs.clear()
 
         # Очищаем все DAG
         self.dags.clear()
-        self.active_threads.clear()
+        self.dag_files.clear()
+        self.schedule_heap.clear()
 
         # Финальная сборка мусора
         self.force_garbage_collection()
@@ -323,10 +1036,46 @@ class Croner:
     def get_queue_status(self):
         """Возвращает статус очереди"""
         with self.queue_lock:
-            queue_dags = [dag_id for dag_id, _ in self.dag_queue]
+            queue_dags = [job.dag_id for job in self.dag_queue.jobs()]
             return {
                 "queue_size": len(self.dag_queue),
                 "queued_dags": queue_dags,
-                "available_slots": self.available_slots._value,
+                "queue_wait": self.dag_queue.get_wait_stats(),
+                "memory": self.admission.get_stats(),
+                "available_slots": self.executor.free_slots(),
                 "max_concurrent": self.max_concurrent_dags,
             }
+
+    def get_run_counts(self):
+        """Количество завершенных запусков по (dag_id, статус)"""
+        with self.runs_lock:
+            return dict(self.run_counts)
+
+    def is_healthy(self):
+        """Планировщик запущен и его цикл не завис"""
+        if not self.running or self.last_loop_at is None:
+            return False
+        # Цикл просыпается не реже раза в scan_interval
+        return time.monotonic() - self.last_loop_at < self.scan_interval * 3 + 10
+
+    def get_executor_stats(self):
+        """Возвращает статистику бэкендов выполнения: слоты, ожидание и время по DAG"""
+        return {name: ex.get_stats() for name, ex in self.executors.items()}
+
+    def get_pool_stats(self):
+        """Возвращает занятость пулов задач и число отказов в слоте"""
+        return self.pools.get_stats()
+
+    def get_async_stats(self):
+        """Async-задачи в цикле asyncio: выполняются, ждут лимита DAG, завершены"""
+        return self.async_runner.get_stats()
+
+    def get_task_queue_stats(self):
+        """Задачи распределенной очереди по состояниям ({} - режим выключен)"""
+        if self.task_queue is None:
+            return {}
+        try:
+            return self.task_queue.get_stats()
+        except Exception as e:
+            logger.warning(f"Не удалось получить состояние очереди задач: {e}")
+            return {}
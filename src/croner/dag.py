@@ -1,82 +1,399 @@
-import re
+import hashlib
+import queue
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
 
 from src.config import logger
 
+from . import clock
+from .async_runner import get_async_runner
+from .cancellation import CancelToken, TaskCancelled
 from .cron_parser import CronParser
+from .dag_run import DagRun, TaskState
+from .pools import PoolLease, ResourcePools, get_pools
+from .results import describe
+from .task import Task
 
 
 class DAG:
-    def __init__(self, dag_id, schedule_interval=None):
+    # Сколько ждать задачи, получившие отмену, прежде чем бросить их потоки
+    CANCEL_GRACE = 5
+    # Как часто перепроверять пул, если освобождение слота не будит запуск
+    POOL_RECHECK = 1.0
+    # Ключ столбления запуска "once": такой запуск у DAG один на все экземпляры
+    ONCE_SLOT = datetime(1970, 1, 1)
+
+    def __init__(
+        self,
+        dag_id,
+        schedule_interval=None,
+        executor="thread",
+        max_active_tasks=4,
+        max_async_tasks=20,
+        catchup=None,
+        max_active_runs=1,
+        on_overlap="skip",
+        priority=0,
+        profile_memory=False,
+        dagrun_timeout=None,
+        execution_timeout=None,
+        tz=None,
+        spread=None,
+        sensor=None,
+    ):
         self.dag_id = dag_id
         self.schedule_interval = schedule_interval
+        # "thread" - пул потоков, "process" - пул процессов,
+        # "distributed" - задачи выполняют воркеры очереди в Postgres
+        self.executor = executor
+        self.max_active_tasks = max_active_tasks  # Параллельные задачи внутри запуска
+        # Параллельные async-задачи DAG в цикле asyncio (по всем его запускам);
+        # потоков они не занимают и в max_active_tasks не входят
+        self.max_async_tasks = max_async_tasks
+        # Что делать с пропущенными запусками после рестарта:
+        # "skip", "latest" или "all" (None - политика планировщика)
+        self.catchup = catchup
+        self._backfill = deque()  # Пропущенные запуски, ожидающие догоняния
+        self._catching_up = False  # next_run - пропущенный запуск, а не плановый
+
+        # Защита от наложения запусков одного DAG:
+        # "skip" - пропустить запуск, "queue" - поставить в очередь один запуск
+        self.max_active_runs = max_active_runs
+        self.on_overlap = on_overlap
+        self.active_runs = 0  # Ведет планировщик
+        # Чем выше, тем раньше DAG запускается из очереди при нехватке слотов
+        self.priority = priority
+        # Снимки tracemalloc до и после каждого запуска (дорого, для поиска утечек)
+        self.profile_memory = profile_memory
+        # Таймауты в секундах: всего запуска и задачи по умолчанию
+        self.dagrun_timeout = dagrun_timeout
+        self.execution_timeout = execution_timeout
+        # Часовой пояс расписания ("Asia/Omsk"): cron и daily/hourly считаются
+        # по местному времени пояса с учетом перевода часов. next_run и last_run
+        # остаются по часам планировщика
+        self.tz = ZoneInfo(tz) if isinstance(tz, str) else tz
+        # Разнесение старта: запуски сдвигаются на постоянное для dag_id число
+        # секунд в окне [0, spread), чтобы DAG с одинаковым расписанием
+        # не стартовали в одну секунду. Окно должно быть меньше интервала
+        self.spread = spread
+        self.start_offset = self._spread_offset(dag_id, spread) if spread else 0
+        # Датчик (FileSensor): запускает DAG по событию, в дополнение к расписанию
+        self.sensor = sensor
         self.tasks = []
         self.last_run = None
         self.next_run = None
         self.cron_schedule = None
+        self._interval_schedule = None
+        if schedule_interval in ["daily", "hourly"]:
+            self._interval_schedule = CronParser.parse(f"@{schedule_interval}")
 
         if schedule_interval and self._is_cron_string(schedule_interval):
             try:
                 self.cron_schedule = CronParser.parse(schedule_interval)
                 # Вычисляем первое следующее время при инициализации
-                self.next_run = self._calculate_next_run(datetime.now())
+                self.next_run = self._calculate_next_run(clock.now())
                 logger.info(f"✅ DAG {dag_id} создан. Следующий запуск: {self.next_run}")
             except Exception as e:
                 logger.critical("❌ Ошибка парсинга cron", exc_info=e)
 
     def _is_cron_string(self, schedule_str):
         """Проверяет, является ли строка cron-выражением"""
-        if not isinstance(schedule_str, str):
-            return False
-        parts = schedule_str.strip().split()
-        return len(parts) in [5, 6] and all(self._is_cron_part(part) for part in parts)
+        return isinstance(schedule_str, str) and CronParser.is_cron(schedule_str)
+
+    def task(self, func=None, *, depends_on=None, **task_options):
+        """Декоратор для добавления задачи в DAG
+
+        Использование: @dag.task или @dag.task(depends_on=[load_data]).
+        Зависимости можно задать и оператором: load_data >> [task_a, task_b].
+        Параметры задачи (см. Task): task_id, execution_timeout - таймаут
+        в секундах (по умолчанию из DAG), retries, retry_delay, backoff,
+        max_retry_delay, retry_on - повторы при ошибках, pool и pool_slots -
+        слоты именованного пула (ожидание слота не входит в таймаут задачи).
+
+        Параметр функции с именем объявленной ранее задачи получает ее
+        результат (и делает ее предшествующей): def report(sales_data): ...
+
+        Задача async def выполняется в общем цикле asyncio планировщика и
+        не занимает поток: одновременно их не больше max_async_tasks DAG.
+        """
+
+        def decorator(f):
+            new_task = Task(f, self, **task_options)
+            # Одинаковые имена функций в одном файле не должны затирать друг друга
+            existing_ids = {t.task_id for t in self.tasks}
+            if new_task.task_id in existing_ids:
+                suffix = 1
+                while f"{new_task.task_id}_{suffix}" in existing_ids:
+                    suffix += 1
+                new_task.task_id = f"{new_task.task_id}_{suffix}"
+            if depends_on:
+                new_task.set_upstream(depends_on)
+            inputs = [name for name in new_task.input_names if name in existing_ids]
+            if inputs:
+                new_task.set_upstream(inputs)
+            self.tasks.append(new_task)
+            return new_task
+
+        if func is not None:
+            return decorator(func)
+        return decorator
+
+    def get_task(self, task_id):
+        """Возвращает задачу по идентификатору"""
+        for task in self.tasks:
+            if task.task_id == task_id:
+                return task
+        raise KeyError(f"Задача {task_id} не найдена в DAG {self.dag_id}")
+
+    def has_dependencies(self):
+        """Объявлены ли в DAG зависимости между задачами"""
+        return any(task.upstream_task_ids for task in self.tasks)
+
+    def get_upstream_map(self):
+        """Граф зависимостей задач: task_id -> список предшествующих task_id
+
+        Если зависимости не объявлены, задачи выполняются по порядку объявления,
+        как и раньше.
+        """
+        if not self.has_dependencies():
+            return {
+                task.task_id: [self.tasks[i - 1].task_id] if i else []
+                for i, task in enumerate(self.tasks)
+            }
+
+        task_ids = {task.task_id for task in self.tasks}
+        upstream_map = {}
+        for task in self.tasks:
+            unknown = [t for t in task.upstream_task_ids if t not in task_ids]
+            if unknown:
+                raise ValueError(
+                    f"Задача {task.task_id} зависит от неизвестных задач: {unknown}"
+                )
+            upstream_map[task.task_id] = list(task.upstream_task_ids)
 
-    def _is_cron_part(self, part):
-        """Проверяет валидность части cron-выражения"""
-        cron_pattern = r"^(\*|\d+(-\d+)?(,\d+(-\d+)?)*|(\*\/\d+))$"
-        return bool(re.match(cron_pattern, part))
+        self._check_cycles(upstream_map)
+        return upstream_map
 
-    def task(self, func):
-        """Декоратор для добавления задачи в DAG"""
-        self.tasks.append(func)
-        return func
+    def validate(self):
+        """Проверяет DAG при загрузке, а не при первом запуске
+
+        ValueError при зависимости от неизвестной задачи, цикле или пуле,
+        не объявленном в CRONER_POOLS.
+        """
+        self.get_upstream_map()
+        pools = get_pools()
+        if isinstance(pools, ResourcePools):
+            unknown = sorted(
+                {t.pool for t in self.tasks if t.pool and t.pool not in pools}
+            )
+            if unknown:
+                raise ValueError(
+                    f"DAG {self.dag_id} использует пулы, не объявленные "
+                    f"в CRONER_POOLS: {unknown}"
+                )
+
+    def _check_cycles(self, upstream_map):
+        """Проверяет, что граф задач ацикличен"""
+        visiting, visited = set(), set()
+
+        def visit(task_id, path):
+            if task_id in visited:
+                return
+            if task_id in visiting:
+                cycle = " -> ".join(path[path.index(task_id) :] + [task_id])
+                raise ValueError(f"Цикл в зависимостях DAG {self.dag_id}: {cycle}")
+            visiting.add(task_id)
+            for upstream_id in upstream_map[task_id]:
+                visit(upstream_id, path + [task_id])
+            visiting.discard(task_id)
+            visited.add(task_id)
+
+        for task_id in upstream_map:
+            visit(task_id, [])
+
+    @staticmethod
+    def _spread_offset(dag_id, spread):
+        """Сдвиг старта из хеша dag_id: одинаковый между рестартами и процессами"""
+        digest = hashlib.sha256(str(dag_id).encode()).digest()
+        return int.from_bytes(digest[:8], "big") % int(spread)
 
     def _calculate_next_run(self, current_time):
-        """Резервный алгоритм с оптимизированными итерациями"""
-        next_time = current_time.replace(microsecond=0) + timedelta(seconds=1)
-
-        # Группируем итерации по дням для больших интервалов
-        days_checked = 0
-        max_days = 366
-
-        while days_checked < max_days:
-            # Проверяем день месяца и месяц
-            if (
-                next_time.day in self.cron_schedule["day"]
-                and next_time.month in self.cron_schedule["month"]
-                and next_time.weekday() in self.cron_schedule["day_of_week"]
-            ):
-                # Внутри дня ищем подходящее время
-                for hour in sorted(self.cron_schedule["hour"]):
-                    if hour < next_time.hour:
-                        continue
-                    for minute in sorted(self.cron_schedule["minute"]):
-                        if hour == next_time.hour and minute < next_time.minute:
-                            continue
-                        for second in sorted(self.cron_schedule.get("second", [0])):
-                            candidate = next_time.replace(
-                                hour=hour, minute=minute, second=second
-                            )
-                            if candidate > current_time:
-                                return candidate
+        """Следующее время запуска по cron-расписанию после current_time"""
+        return self._next_fire(self.cron_schedule, current_time)
+
+    def _next_fire(self, schedule, current_time):
+        """Срабатывание расписания после current_time по часам планировщика
+
+        Учитывает часовой пояс DAG и сдвиг старта.
+        """
+        shift = timedelta(seconds=self.start_offset)
+        if self.tz is None:
+            return schedule.next_fire(current_time - shift) + shift
+        # Наивное время планировщика - местное время контейнера
+        fire = schedule.next_fire((current_time - shift).astimezone(self.tz))
+        return fire.astimezone().replace(tzinfo=None) + shift
+
+    def _schedule_slot(self, moment):
+        """Последнее плановое время расписания (без сдвига старта) не позже moment"""
+        schedule = self.cron_schedule or self._interval_schedule
+        after = moment + timedelta(microseconds=1)
+        if self.tz is None:
+            return schedule.prev_fire(after)
+        fire = schedule.prev_fire(after.astimezone(self.tz))
+        return fire.astimezone().replace(tzinfo=None)
+
+    def _realign_next_run(self):
+        """Ставит next_run на его плановый слот с текущим сдвигом старта"""
+        if self.next_run is None or self._catching_up:
+            return
+        if self.cron_schedule or self._interval_schedule:
+            slot = self._schedule_slot(self.next_run)
+            self.next_run = slot + timedelta(seconds=self.start_offset)
+
+    def set_start_offset(self, offset):
+        """Меняет сдвиг старта; ближайший запуск остается в том же плановом слоте
+
+        Возвращает True, если сдвиг изменился.
+        """
+        if offset == self.start_offset:
+            return False
+        self.start_offset = offset
+        self._realign_next_run()
+        return True
 
-            # Переходим к следующему дню
-            next_time = next_time.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            ) + timedelta(days=1)
-            days_checked += 1
+    def upcoming_runs(self, current_time, limit=10, until=None):
+        """Ближайшие запуски по расписанию после current_time (по часам планировщика)"""
+        schedule = self.cron_schedule or self._interval_schedule
+        runs = []
+        if schedule is None:
+            return runs
+        fire_time = current_time
+        while len(runs) < limit:
+            fire_time = self._next_fire(schedule, fire_time)
+            if fire_time is None or (until is not None and fire_time > until):
+                break
+            runs.append(fire_time)
+        return runs
 
-        raise ValueError(f"Не удалось найти следующее время запуска за {max_days} дней")
+    def local_time(self, moment):
+        """Время планировщика в часовом поясе DAG (без пояса - как есть)"""
+        if moment is None or self.tz is None:
+            return moment
+        return moment.astimezone(self.tz)
+
+    def _next_interval_time(self, current_time):
+        """Следующее время запуска для daily/hourly после current_time"""
+        if self._interval_schedule is None:
+            return None
+        return self._next_fire(self._interval_schedule, current_time)
+
+    def get_due_time(self, current_time):
+        """Возвращает время, к которому DAG должен быть запущен (None - запусков больше нет)"""
+        if self.schedule_interval in ["once", "daily", "hourly"]:
+            if self.last_run is None:
+                return current_time
+            if self.next_run is not None and self.schedule_interval != "once":
+                return self.next_run
+            return self._next_interval_time(self.last_run)
+
+        if self.cron_schedule:
+            if self.next_run is None:
+                self.next_run = self._calculate_next_run(current_time)
+            return self.next_run
+
+        return None
+
+    def claim_slot(self, run_time):
+        """Ключ планового запуска для столбления между экземплярами
+
+        Слот расписания без сдвига старта: экземпляры, заметившие запуск
+        в разные тики или с разным сдвигом, получают один ключ.
+        """
+        if self.schedule_interval == "once":
+            return self.ONCE_SLOT
+        if self.cron_schedule or self._interval_schedule:
+            return self._schedule_slot(run_time)
+        return run_time
+
+    def advance_schedule(self, current_time):
+        """Сдвигает расписание после постановки DAG на выполнение"""
+        self._catching_up = bool(self._backfill)
+        if self._backfill:
+            # Догоняем пропущенные запуски по одному
+            self.next_run = self._backfill.popleft()
+        elif self.schedule_interval in ["daily", "hourly"]:
+            self.next_run = self._next_interval_time(current_time)
+        elif self.cron_schedule:
+            self.next_run = self._calculate_next_run(current_time)
+        else:
+            return None
+        return self.next_run
+
+    def inherit_state(self, previous: "DAG"):
+        """Переносит состояние расписания из прежней версии DAG при горячей перезагрузке"""
+        self.last_run = previous.last_run
+        self._backfill = previous._backfill
+        self._catching_up = previous._catching_up
+        if previous.schedule_interval == self.schedule_interval:
+            self.next_run = previous.next_run
+            self._realign_next_run()
+
+    def restore_state(self, last_run, next_run, current_time, catchup, max_runs=50):
+        """Восстанавливает сохраненное состояние и применяет политику догоняния
+
+        Возвращает список пропущенных за время простоя запусков.
+        """
+        self.last_run = last_run
+        self._backfill.clear()
+        self._catching_up = False
+
+        if self.cron_schedule:
+            advance = self._calculate_next_run
+        elif self.schedule_interval in ["daily", "hourly"]:
+            advance = self._next_interval_time
+            if next_run is None and last_run is not None:
+                next_run = advance(last_run)
+        else:
+            return []
+
+        if next_run is None:
+            return []
+        # Сохраненное время могло быть вычислено с другим сдвигом старта
+        next_run = self._schedule_slot(next_run) + timedelta(
+            seconds=self.start_offset
+        )
+
+        # Плановые времена, которые наступили, пока планировщик не работал
+        missed = deque(maxlen=max_runs)
+        fire_time = next_run
+        while fire_time <= current_time:
+            missed.append(fire_time)
+            fire_time = advance(fire_time)
+
+        missed = list(missed)
+        if not missed:
+            self.next_run = next_run
+        elif catchup == "all":
+            self.next_run = missed[0]
+            self._backfill.extend(missed[1:])
+            self._catching_up = True
+        elif catchup == "latest":
+            self.next_run = missed[-1]
+        else:
+            self.next_run = advance(current_time)
+
+        return missed
+
+    def is_catching_up(self):
+        """Является ли ближайший запуск догонянием пропущенного"""
+        return self._catching_up
+
+    def can_start_run(self):
+        """Есть ли у DAG свободное место для еще одного активного запуска"""
+        return self.active_runs < self.max_active_runs
 
     def should_run(self, current_time):
         """Определяет, нужно ли запускать DAG на основе следующего времени"""
@@ -90,34 +407,18 @@ class DAG:
         # Для ежедневного запуска
         elif self.schedule_interval == "daily":
             if self.last_run is None:
-                self.next_run = current_time.replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                )
-                if self.next_run <= current_time:
-                    self.next_run += timedelta(days=1)
+                self.next_run = self._next_interval_time(current_time)
                 return True
-            next_day = self.last_run.replace(
-                hour=0, minute=0, second=0, microsecond=0
-            ) + timedelta(days=1)
-            if current_time >= next_day:
-                self.next_run = next_day
-                return True
-            return False
+            next_day = self.next_run or self._next_interval_time(self.last_run)
+            return current_time >= next_day
 
         # Для ежечасного запуска
         elif self.schedule_interval == "hourly":
             if self.last_run is None:
-                self.next_run = current_time.replace(minute=0, second=0, microsecond=0)
-                if self.next_run <= current_time:
-                    self.next_run += timedelta(hours=1)
+                self.next_run = self._next_interval_time(current_time)
                 return True
-            next_hour = self.last_run.replace(
-                minute=0, second=0, microsecond=0
-            ) + timedelta(hours=1)
-            if current_time >= next_hour:
-                self.next_run = next_hour
-                return True
-            return False
+            next_hour = self.next_run or self._next_interval_time(self.last_run)
+            return current_time >= next_hour
 
         # Для cron-расписания
         elif self.cron_schedule:
@@ -132,57 +433,450 @@ class DAG:
 
         return False
 
-    def run(self):
-        """Запуск всех задач DAG с обновлением следующего времени"""
-        current_time = datetime.now()
+    def run(self, dag_run: DagRun = None):
+        """Запуск задач DAG с учетом зависимостей
+
+        Готовые задачи выполняются параллельно: в потоках не больше
+        max_active_tasks, async-задачи в цикле asyncio - не больше max_async_tasks.
+        Упавшая задача пропускает только зависящие от нее задачи.
+        Если задача ждет повтора, run возвращает незавершенный запуск
+        (dag_run.is_deferred): планировщик продолжит его в dag_run.next_retry_at(),
+        не занимая слот на время ожидания.
+        """
+        current_time = clock.now()
+        if dag_run is not None and dag_run.started_at is not None:
+            logger.info(
+                f"🔁 Продолжение запуска DAG {self.dag_id} "
+                f"(плановое время {dag_run.run_time})",
+                dag=self.dag_id,
+            )
+            self._run_tasks(dag_run)
+            return self._finish_run(dag_run)
+
         logger.info(f"🚀 Запуск DAG: {self.dag_id} в {current_time}", dag=self.dag_id)
 
         # Обновляем время последнего запуска
         self.last_run = current_time
 
-        # Вычисляем следующее время запуска
-        if self.cron_schedule:
-            old_next_run = self.next_run
-            self.next_run = self._calculate_next_run(current_time)
+        # Следующее время запуска сдвигает планировщик при постановке DAG на выполнение
+        if self.cron_schedule or self.schedule_interval in ["daily", "hourly"]:
             logger.info(
-                f"📅 Следующий запуск DAG {self.dag_id}: {self.next_run} (было: {old_next_run})",
+                f"📅 Следующий запуск DAG {self.dag_id}: {self.next_run}",
                 dag=self.dag_id,
                 next_run=self.next_run,
-                old_next_run=old_next_run,
             )
-        elif self.schedule_interval in ["daily", "hourly"]:
+
+        dag_run = dag_run or DagRun(self.dag_id, current_time)
+        dag_run.started_at = current_time
+
+        # Выполняем задачи
+        self._run_tasks(dag_run)
+        return self._finish_run(dag_run)
+
+    def _finish_run(self, dag_run: DagRun):
+        """Итоги запуска (или его отложенной части)"""
+        if dag_run.is_deferred:
             logger.info(
-                f"📅 Следующий запуск DAG {self.dag_id}: {self.next_run}",
+                f"⏳ DAG {self.dag_id} ждет повтора задач "
+                f"до {dag_run.next_retry_at():%H:%M:%S}",
                 dag=self.dag_id,
-                next_run=self.next_run,
             )
+            return dag_run
+        dag_run.finished_at = clock.now()
+        # Результаты нужны только задачам этого запуска
+        dag_run.results.close()
 
-        # Выполняем задачи
-        success_count = 0
-        error_count = 0
+        # Итоги выполнения
+        status = (
+            "✅ УСПЕШНО" if dag_run.status == TaskState.SUCCESS else "⚠️  С ОШИБКАМИ"
+        )
+        logger.info(
+            f"🎯 DAG {self.dag_id} завершен {status}. "
+            f"Задачи: {dag_run.success_count}✅ {dag_run.error_count}❌ "
+            f"{dag_run.skipped_count}⏭️"
+        )
+        return dag_run
 
-        for task in self.tasks:
-            try:
-                start_time = datetime.now()
-                result = task()
-                execution_time = (datetime.now() - start_time).total_seconds()
+    def _run_tasks(self, dag_run: DagRun):
+        """Выполняет граф задач, не больше max_active_tasks одновременно
+
+        Задача, превысившая таймаут, получает отмену токена и помечается
+        упавшей; если она не завершилась за CANCEL_GRACE секунд, ее поток
+        бросается, чтобы запуск (и слот планировщика) не висел на ней вечно.
+        Задача с pool ждет свободный слот пула, не мешая остальным задачам.
+        """
+        pending = [
+            task
+            for task in self.tasks
+            if dag_run.get_state(task.task_id) not in TaskState.FINISHED
+        ]
+        # task_id -> [task, токен задачи, дедлайн, причина таймаута, слоты пула]
+        running = {}
+        done_queue = queue.SimpleQueue()
+        # Отмена запуска (таймаут DAG, остановка планировщика) будит ожидание
+        dag_run.cancel_token.add_callback(lambda token: done_queue.put(None))
+        if self.dagrun_timeout and dag_run.deadline is None:
+            dag_run.deadline = time.time() + self.dagrun_timeout
+        run_deadline = None
+        if dag_run.deadline is not None:
+            run_deadline = time.monotonic() + (dag_run.deadline - time.time())
+        # Освобождение слота пула тоже будит ожидание
+        pools = get_pools()
+
+        def wake_up():
+            done_queue.put(None)
 
-                logger.info(
-                    f"✅ Задача {task.__name__} выполнена успешно за {execution_time:.2f}с"
+        if pools is not None:
+            pools.add_listener(wake_up)
+        try:
+            self._run_task_graph(dag_run, pending, running, done_queue, run_deadline)
+        finally:
+            if pools is not None:
+                pools.remove_listener(wake_up)
+
+    def _run_task_graph(self, dag_run, pending, running, done_queue, run_deadline):
+        """Цикл запуска готовых задач и сбора их итогов"""
+        upstream_map = self.get_upstream_map()
+        # Без объявленных зависимостей задача выполняется даже после ошибки
+        # предыдущей (прежнее поведение); в графе - только после успеха
+        run_after_failure = not self.has_dependencies()
+        waiting_pool = set()  # Задачи, о ждущих слот пула которых уже написали
+
+        while pending or running:
+            if run_deadline is not None and time.monotonic() >= run_deadline:
+                dag_run.timed_out = True
+                dag_run.cancel_token.cancel(
+                    f"превышен таймаут DAG {self.dagrun_timeout}с"
                 )
-                if result is not None:
-                    logger.info(f"📊 Результат: {result}")
-                success_count += 1
+            if dag_run.cancel_token.cancelled:
+                self._abort_run(dag_run, pending, running, done_queue)
+                break
 
-            except Exception as e:
-                logger.error(f"❌ Ошибка в задаче {task.__name__}", exc_info=e)
-                error_count += 1
+            progressed = False
+            pool_blocked = False
+            now = clock.now()
+            # Лимит потоков не учитывает async-задачи, выполняемые в цикле asyncio
+            threads = sum(
+                1 for entry in running.values() if not self._in_loop(entry[0], dag_run)
+            )
+            for task in list(pending):
+                in_loop = self._in_loop(task, dag_run)
+                if not in_loop and threads >= self.max_active_tasks:
+                    continue
+                if (
+                    dag_run.get_state(task.task_id) == TaskState.UP_FOR_RETRY
+                    and dag_run.retry_at[task.task_id] > now
+                ):
+                    continue
+                upstream_states = [
+                    dag_run.get_state(t) for t in upstream_map[task.task_id]
+                ]
+                if any(s not in TaskState.FINISHED for s in upstream_states):
+                    continue
 
-        # Итоги выполнения
-        status = "✅ УСПЕШНО" if error_count == 0 else "⚠️  С ОШИБКАМИ"
-        logger.info(
-            f"🎯 DAG {self.dag_id} завершен {status}. "
-            f"Задачи: {success_count}✅ {error_count}❌"
+                skip = not run_after_failure and any(
+                    s != TaskState.SUCCESS for s in upstream_states
+                )
+                lease = None
+                if not skip:
+                    lease = self._acquire_pool(task)
+                    if lease is False:
+                        pool_blocked = True
+                        if task.task_id not in waiting_pool:
+                            waiting_pool.add(task.task_id)
+                            logger.info(
+                                f"⏳ Задача {task.task_id} ждет слот пула {task.pool}",
+                                dag=self.dag_id,
+                            )
+                        continue
+
+                pending.remove(task)
+                progressed = True
+                if skip:
+                    dag_run.set_state(task.task_id, TaskState.SKIPPED)
+                    logger.warning(
+                        f"⏭️ Задача {task.task_id} пропущена: "
+                        f"не выполнены предшествующие задачи",
+                        dag=self.dag_id,
+                    )
+                    continue
+
+                self._start_task(task, dag_run, running, done_queue, lease)
+                if not in_loop:
+                    threads += 1
+
+            if not running:
+                if progressed:
+                    # Пропуск задачи мог сделать готовыми следующие
+                    continue
+                if not pool_blocked:
+                    if dag_run.is_deferred:
+                        # Остальные задачи ждут повтора: запуск продолжит планировщик
+                        break
+                    for task in pending:
+                        dag_run.set_state(task.task_id, TaskState.SKIPPED)
+                    break
+
+            deadlines = [entry[2] for entry in running.values() if entry[2]]
+            if run_deadline is not None:
+                deadlines.append(run_deadline)
+            if pool_blocked:
+                deadlines.append(time.monotonic() + self.POOL_RECHECK)
+            retry_times = [
+                dag_run.retry_at[task.task_id]
+                for task in pending
+                if dag_run.get_state(task.task_id) == TaskState.UP_FOR_RETRY
+            ]
+            if retry_times:
+                # Повтор, наступивший во время долгой задачи, не ждет ее конца
+                wait = (min(retry_times) - clock.now()).total_seconds()
+                deadlines.append(time.monotonic() + max(wait, 0))
+            timeout = (
+                max(min(deadlines) - time.monotonic(), 0) if deadlines else None
+            )
+            finished = self._collect_outcomes(dag_run, running, done_queue, timeout)
+            for task_id in finished:
+                if dag_run.get_state(task_id) == TaskState.UP_FOR_RETRY:
+                    # Повтор ждет в этом проходе; запуск откладывается, только
+                    # когда больше нечего выполнять
+                    pending.append(self.get_task(task_id))
+            self._expire_tasks(dag_run, running)
+
+    def _acquire_pool(self, task: Task):
+        """Занимает слоты пула задачи: PoolLease, None - пул не нужен, False - занят"""
+        pools = get_pools()
+        if task.pool is None or pools is None:
+            return None
+        acquired = pools.try_acquire(task.pool, task.pool_slots)
+        if not acquired:
+            # None - пул не объявлен, задача выполняется без ограничения
+            return None if acquired is None else False
+        return PoolLease(pools, task.pool, task.pool_slots)
+
+    @staticmethod
+    def _in_loop(task: Task, dag_run: DagRun):
+        """Выполняется ли задача в цикле asyncio планировщика, а не в потоке"""
+        # Задачи очереди воркеров ждет поток, async они или нет
+        return (
+            task.is_async
+            and dag_run.task_queue is None
+            and get_async_runner() is not None
+        )
+
+    def _start_task(self, task: Task, dag_run: DagRun, running, done_queue, lease):
+        """Запускает задачу в отдельном (daemon) потоке или в цикле asyncio"""
+        token = CancelToken(parent=dag_run.cancel_token)
+        timeout = task.execution_timeout or self.execution_timeout
+        deadline = time.monotonic() + timeout if timeout else None
+        dag_run.task_tries[task.task_id] = dag_run.task_tries.get(task.task_id, 0) + 1
+        dag_run.set_state(task.task_id, TaskState.RUNNING)
+        running[task.task_id] = [task, token, deadline, None, lease]
+        self._notify(dag_run, "started", task.task_id, timeout)
+        inputs = dag_run.results.inputs_for(task)
+        if task.accepts_conf:
+            inputs["conf"] = dag_run.conf
+        if self._in_loop(task, dag_run):
+            self._start_async_task(
+                task, token, running[task.task_id], done_queue, lease, inputs, timeout
+            )
+            return
+        threading.Thread(
+            target=self._execute_task,
+            args=(task, token, done_queue, lease, inputs, dag_run),
+            name=f"{self.dag_id}-task-{task.task_id}",
+            daemon=True,
+        ).start()
+
+    def _start_async_task(
+        self, task: Task, token: CancelToken, entry, done_queue, lease, inputs, timeout
+    ):
+        """Отдает async-задачу в общий цикл; итог приходит в done_queue"""
+        kwargs = dict(inputs)
+        if task.accepts_cancel_token:
+            kwargs["cancel_token"] = token
+        # Таймаут считается с момента, когда задача дождалась лимита DAG
+        entry[2] = None
+        started = []
+
+        def on_started():
+            started.append(time.monotonic())
+            if timeout:
+                entry[2] = started[0] + timeout
+                # Цикл DAG пересчитывает ближайший дедлайн
+                done_queue.put(None)
+
+        def on_done(future):
+            if lease is not None:
+                lease.release()
+            result = None
+            if future.cancelled():
+                error = TaskCancelled(token.reason or "задача отменена")
+            else:
+                error = future.exception()
+                if error is None:
+                    result = future.result()
+            duration = time.monotonic() - started[0] if started else 0.0
+            done_queue.put((task.task_id, result, error, duration))
+
+        future = get_async_runner().submit(
+            task.func,
+            kwargs,
+            key=self.dag_id,
+            limit=self.max_async_tasks,
+            on_started=on_started,
+        )
+        token.add_callback(lambda cancelled: future.cancel())
+        future.add_done_callback(on_done)
+
+    def _execute_task(
+        self,
+        task: Task,
+        token: CancelToken,
+        done_queue,
+        lease=None,
+        inputs=None,
+        dag_run: DagRun = None,
+    ):
+        """Выполняет одну задачу и передает результат циклу запуска DAG"""
+        start_time = time.monotonic()
+        result = None
+        error = None
+        kwargs = dict(inputs or {})
+        task_queue = dag_run.task_queue if dag_run is not None else None
+        if task.accepts_cancel_token and task_queue is None:
+            kwargs["cancel_token"] = token
+        try:
+            if task_queue is not None:
+                # Задачу выполняет воркер очереди, поток только ждет итог
+                result = task_queue.run_task(dag_run, task, kwargs, token)
+            else:
+                result = task(**kwargs)
+        except (Exception, TaskCancelled) as e:
+            error = e
+        finally:
+            if lease is not None:
+                lease.release()
+        done_queue.put((task.task_id, result, error, time.monotonic() - start_time))
+
+    def _collect_outcomes(self, dag_run: DagRun, running, done_queue, timeout):
+        """Ждет завершения хотя бы одной задачи (или timeout) и записывает итоги
+
+        Возвращает task_id задач, итоги которых записаны.
+        """
+        recorded = []
+        try:
+            item = done_queue.get(timeout=timeout)
+        except queue.Empty:
+            return recorded
+        while True:
+            # None - сигнал отмены запуска; итоги брошенных задач игнорируем
+            if item is not None and item[0] in running:
+                timeout_reason = running.pop(item[0])[3]
+                self._notify(dag_run, "finished", item[0])
+                if timeout_reason:
+                    # Задача завершилась после отмены по таймауту
+                    dag_run.task_durations[item[0]] = item[3]
+                    self._fail_timed_out(dag_run, item[0], timeout_reason)
+                else:
+                    self._record_outcome(dag_run, *item)
+                    recorded.append(item[0])
+            try:
+                item = done_queue.get_nowait()
+            except queue.Empty:
+                return recorded
+
+    def _record_outcome(self, dag_run: DagRun, task_id, result, error, duration):
+        """Записывает состояние завершившейся задачи в запуск DAG"""
+        dag_run.task_durations[task_id] = duration
+        if error is None:
+            dag_run.task_errors.pop(task_id, None)
+            dag_run.set_state(task_id, TaskState.SUCCESS)
+            # None тоже результат: параметр с именем задачи получит None
+            dag_run.results.put(task_id, result)
+            logger.info(f"✅ Задача {task_id} выполнена успешно за {duration:.2f}с")
+            if result is not None:
+                logger.info(f"📊 Результат: {describe(result)}")
+            return
+        dag_run.task_errors[task_id] = f"{type(error).__name__}: {error}"
+        task = self.get_task(task_id)
+        tries = dag_run.task_tries.get(task_id, 1)
+        if task.should_retry(error, tries):
+            delay = task.get_retry_delay(tries)
+            dag_run.retry_at[task_id] = clock.now() + timedelta(seconds=delay)
+            dag_run.set_state(task_id, TaskState.UP_FOR_RETRY)
+            logger.warning(
+                f"🔁 Задача {task_id} упала (попытка {tries}/{task.retries + 1}): "
+                f"{type(error).__name__}: {error}. Повтор через {delay:.0f}с",
+                dag=self.dag_id,
+                task=task_id,
+            )
+            return
+        dag_run.set_state(task_id, TaskState.FAILED)
+        logger.error(f"❌ Ошибка в задаче {task_id}", exc_info=error)
+
+    def _expire_tasks(self, dag_run: DagRun, running):
+        """Отменяет задачи, превысившие таймаут, и бросает не ответившие на отмену"""
+        now = time.monotonic()
+        for task_id, entry in list(running.items()):
+            task, token, deadline, timeout_reason, lease = entry
+            if deadline is None or now < deadline:
+                continue
+            if timeout_reason is None:
+                timeout = task.execution_timeout or self.execution_timeout
+                entry[3] = f"превышен таймаут задачи {timeout}с"
+                entry[2] = now + self.CANCEL_GRACE
+                token.cancel(entry[3])
+                continue
+            del running[task_id]
+            self._notify(dag_run, "finished", task_id)
+            if lease is not None:
+                lease.release()
+            self._fail_timed_out(dag_run, task_id, timeout_reason, abandoned=True)
+
+    def _abort_run(self, dag_run: DagRun, pending, running, done_queue):
+        """Прерывает запуск: ждет задачи CANCEL_GRACE секунд, остальные бросает"""
+        reason = dag_run.cancel_token.reason
+        logger.warning(
+            f"⏹️ Запуск DAG {self.dag_id} прерван: {reason}", dag=self.dag_id
+        )
+        for task in pending:
+            dag_run.set_state(task.task_id, TaskState.SKIPPED)
+        grace_deadline = time.monotonic() + self.CANCEL_GRACE
+        while running and time.monotonic() < grace_deadline:
+            self._collect_outcomes(
+                dag_run,
+                running,
+                done_queue,
+                max(grace_deadline - time.monotonic(), 0),
+            )
+        for task_id in list(running):
+            entry = running.pop(task_id)
+            self._notify(dag_run, "finished", task_id)
+            timeout_reason = entry[3]
+            if entry[4] is not None:
+                entry[4].release()
+            self._fail_timed_out(
+                dag_run, task_id, timeout_reason or reason, abandoned=True
+            )
+
+    @staticmethod
+    def _notify(dag_run: DagRun, event, task_id, timeout=None):
+        """Сообщает наблюдателю запуска (родителю процесса-воркера) о задаче"""
+        if dag_run.task_listener is not None:
+            dag_run.task_listener(event, task_id, timeout)
+
+    def _fail_timed_out(self, dag_run: DagRun, task_id, reason, abandoned=False):
+        """Помечает упавшей задачу, прерванную по таймауту или отмене"""
+        dag_run.timed_out_tasks.append(task_id)
+        if abandoned:
+            dag_run.abandoned_tasks.append(task_id)
+        dag_run.task_errors[task_id] = f"TimeoutError: {reason}"
+        dag_run.set_state(task_id, TaskState.FAILED)
+        logger.error(
+            f"⏰ Задача {task_id} DAG {self.dag_id} прервана: {reason}"
+            + (" (поток брошен)" if abandoned else ""),
+            dag=self.dag_id,
+            task=task_id,
         )
 
     def get_status(self):
@@ -195,8 +889,32 @@ class DAG:
             if self.next_run
             else "Не запланирован",
             "tasks_count": len(self.tasks),
-            "cron_schedule": self.cron_schedule,
+            "tasks": {
+                task.task_id: list(task.upstream_task_ids) for task in self.tasks
+            },
+            "executor": self.executor,
+            "catchup": self.catchup,
+            "backfill_pending": len(self._backfill),
+            "active_runs": self.active_runs,
+            "max_async_tasks": self.max_async_tasks,
+            "max_active_runs": self.max_active_runs,
+            "on_overlap": self.on_overlap,
+            "priority": self.priority,
+            "profile_memory": self.profile_memory,
+            "dagrun_timeout": self.dagrun_timeout,
+            "execution_timeout": self.execution_timeout,
+            "cron_schedule": (
+                self.cron_schedule.as_dict() if self.cron_schedule else None
+            ),
         }
+        if self.start_offset:
+            status["start_offset"] = self.start_offset
+        if self.tz is not None:
+            status["tz"] = str(self.tz)
+            if self.next_run:
+                status["next_run_local"] = self.local_time(self.next_run).isoformat()
+        if self.sensor is not None:
+            status["sensor"] = self.sensor.get_status()
         return status
 
     def __str__(self):
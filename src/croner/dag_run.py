@@ -0,0 +1,119 @@
+from . import clock
+from .cancellation import CancelToken
+from .results import TaskResults
+
+
+class TaskState:
+    """Состояния задачи внутри запуска DAG"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+    UP_FOR_RETRY = "up_for_retry"  # Упала, повтор отложен планировщиком
+
+    FINISHED = (SUCCESS, FAILED, SKIPPED)
+
+
+class DagRun:
+    """Состояние одного запуска DAG: статусы и длительности задач"""
+
+    def __init__(self, dag_id, run_time=None, cancel_token=None, conf=None):
+        self.dag_id = dag_id
+        self.run_time = run_time or clock.now()  # Плановое время запуска
+        self.started_at = None
+        self.finished_at = None
+        self.task_states = {}
+        self.task_durations = {}
+        self.task_errors = {}
+        self.timed_out_tasks = []  # Задачи, прерванные по таймауту
+        self.abandoned_tasks = []  # Из них не ответившие на отмену (поток брошен)
+        self.task_tries = {}  # task_id -> количество попыток
+        self.retry_at = {}  # task_id -> когда повторить задачу (UP_FOR_RETRY)
+        self.timed_out = False  # Превышен таймаут всего запуска
+        # Когда истекает dagrun_timeout (epoch-секунды): считается от первого
+        # старта, продолжение после повтора задач его не продлевает
+        self.deadline = None
+        self.cancel_token = cancel_token or CancelToken()
+        self.results = TaskResults()  # Результаты задач для следующих задач
+        # Параметры запуска (например, {"files": [...]} от датчика файлов)
+        self.conf = conf or {}
+        # Распределенный режим: задачи выполняют воркеры очереди (ставит executor)
+        self.task_queue = None
+        self.source = None  # (файл, переменная) DAG для воркеров
+        # listener(event, task_id, timeout): процесс-воркер сообщает родителю
+        # о старте ("started") и завершении ("finished") задач
+        self.task_listener = None
+
+    def set_state(self, task_id, state):
+        self.task_states[task_id] = state
+
+    def get_state(self, task_id):
+        return self.task_states.get(task_id, TaskState.PENDING)
+
+    def count(self, state):
+        return sum(1 for s in self.task_states.values() if s == state)
+
+    @property
+    def success_count(self):
+        return self.count(TaskState.SUCCESS)
+
+    @property
+    def error_count(self):
+        return self.count(TaskState.FAILED)
+
+    @property
+    def skipped_count(self):
+        return self.count(TaskState.SKIPPED)
+
+    @property
+    def is_deferred(self):
+        """Запуск не завершен: есть задачи, ожидающие повтора"""
+        return any(s == TaskState.UP_FOR_RETRY for s in self.task_states.values())
+
+    def next_retry_at(self):
+        """Ближайшее время повтора задачи"""
+        return min(
+            self.retry_at[task_id]
+            for task_id, state in self.task_states.items()
+            if state == TaskState.UP_FOR_RETRY
+        )
+
+    @property
+    def status(self):
+        """Итоговый статус запуска"""
+        if self.error_count or self.skipped_count:
+            return TaskState.FAILED
+        return TaskState.SUCCESS
+
+    def as_dict(self):
+        """Сводка запуска для логов и мониторинга"""
+        return {
+            "dag_id": self.dag_id,
+            "run_time": self.run_time,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "status": self.status,
+            "tasks": dict(self.task_states),
+            "durations": dict(self.task_durations),
+            "errors": dict(self.task_errors),
+            "tries": dict(self.task_tries),
+            "timed_out_tasks": list(self.timed_out_tasks),
+            "timed_out": self.timed_out,
+            "conf": dict(self.conf),
+        }
+
+    def __getstate__(self):
+        # Очередь держит пул подключений: в другой процесс не передается
+        state = dict(self.__dict__)
+        state["task_queue"] = None
+        state["task_listener"] = None
+        return state
+
+    def __repr__(self):
+        return (
+            f"DagRun('{self.dag_id}', run_time={self.run_time}, "
+            f"success={self.success_count}, errors={self.error_count}, "
+            f"skipped={self.skipped_count})"
+        )
@@ -0,0 +1,266 @@
+import ast
+import importlib.util
+import inspect
+import operator
+import threading
+from pathlib import Path
+
+from src.config import logger
+
+from .dag import DAG
+from .sensors import FileSensor
+
+_BIN_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+# Вызовы, которые можно выполнить при разборе объявления DAG, если их
+# аргументы - литералы (датчик создается, но не запускается)
+_STATIC_CALLS = {"FileSensor": FileSensor}
+
+
+class NotStatic(Exception):
+    """Объявление DAG нельзя вычислить без выполнения модуля"""
+
+
+def import_module_from_file(file_path):
+    """Выполняет файл DAG как модуль (без регистрации в sys.modules)"""
+    path = Path(file_path)
+    spec = importlib.util.spec_from_file_location(f"dag_module_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_dag(file_path, attr_name, modules_cache):
+    """Загружает DAG из файла вне планировщика (модуль кешируется по mtime)
+
+    Нужен процессам-воркерам и воркерам распределенной очереди задач.
+    """
+    path = Path(file_path)
+    mtime = path.stat().st_mtime
+    cached = modules_cache.get(file_path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, import_module_from_file(path))
+        modules_cache[file_path] = cached
+
+    dag = getattr(cached[1], attr_name)
+    if not isinstance(dag, DAG):
+        raise TypeError(f"{file_path}:{attr_name} не является DAG")
+    return dag
+
+
+def _literal(node):
+    """Значение константного выражения: литералы, арифметика над числами
+    и вызовы из _STATIC_CALLS с литеральными аргументами"""
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, (ast.Tuple, ast.List, ast.Set)):
+        values = [_literal(item) for item in node.elts]
+        if isinstance(node, ast.Tuple):
+            return tuple(values)
+        return set(values) if isinstance(node, ast.Set) else values
+    if isinstance(node, ast.Dict):
+        return {_literal(k): _literal(v) for k, v in zip(node.keys, node.values)}
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _literal(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BIN_OPS:
+        left, right = _literal(node.left), _literal(node.right)
+        if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+            return _BIN_OPS[type(node.op)](left, right)
+    if isinstance(node, ast.Call):
+        func = node.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+        starred = any(isinstance(arg, ast.Starred) for arg in node.args)
+        if name in _STATIC_CALLS and not starred:
+            if any(kw.arg is None for kw in node.keywords):
+                raise NotStatic("**kwargs")
+            args = [_literal(arg) for arg in node.args]
+            kwargs = {kw.arg: _literal(kw.value) for kw in node.keywords}
+            try:
+                return _STATIC_CALLS[name](*args, **kwargs)
+            except Exception as e:
+                # Ошибку объявления покажет обычный импорт файла
+                raise NotStatic(f"{name}: {e}") from e
+    raise NotStatic(ast.dump(node))
+
+
+def _is_dag_call(node):
+    if not isinstance(node, ast.Call):
+        return False
+    func = node.func
+    return (isinstance(func, ast.Name) and func.id == "DAG") or (
+        isinstance(func, ast.Attribute) and func.attr == "DAG"
+    )
+
+
+def _task_name(func_node, dag_names):
+    """Имя задачи, если функция объявлена через @<dag>.task"""
+    for decorator in func_node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if (
+            isinstance(target, ast.Attribute)
+            and target.attr == "task"
+            and isinstance(target.value, ast.Name)
+            and target.value.id in dag_names
+        ):
+            return target.value.id
+    return None
+
+
+def discover_dags(file_path):
+    """Находит объявления DAG в файле по AST, не выполняя модуль
+
+    Объявление - присваивание на уровне модуля: dag = DAG(...) или
+    dag: DAG = DAG(...). Возвращает {attr_name: {"kwargs": аргументы DAG,
+    "tasks": [имена функций]}} или None, если объявления не найдены или не
+    вычисляются статически (тогда файл нужно загрузить обычным импортом).
+    SyntaxError пробрасывается.
+    """
+    source = Path(file_path).read_text(encoding="utf-8")
+    tree = ast.parse(source, filename=str(file_path))
+    signature = inspect.signature(DAG.__init__)
+
+    declarations = {}
+    calls = set()  # Вызовы DAG(...), разобранные как объявления
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, call = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, call = [node.target], node.value
+        else:
+            continue
+        if not _is_dag_call(call):
+            continue
+        if len(targets) != 1 or not isinstance(targets[0], ast.Name):
+            return None
+        attr_name = targets[0].id
+        try:
+            if any(isinstance(arg, ast.Starred) for arg in call.args) or any(
+                kw.arg is None for kw in call.keywords
+            ):
+                raise NotStatic("*args/**kwargs")
+            bound = signature.bind(
+                None,
+                *[_literal(arg) for arg in call.args],
+                **{kw.arg: _literal(kw.value) for kw in call.keywords},
+            )
+        except (NotStatic, TypeError) as e:
+            logger.info(
+                f"DAG {attr_name} в {file_path} не вычисляется статически "
+                f"({e}), файл будет импортирован"
+            )
+            return None
+        kwargs = dict(bound.arguments)
+        kwargs.pop("self")
+        declarations[attr_name] = {"kwargs": kwargs, "tasks": []}
+        calls.add(call)
+
+    # DAG, созданный в цикле, функции или условии, по AST не найти: без импорта
+    # он пропал бы молча
+    for node in ast.walk(tree):
+        if _is_dag_call(node) and node not in calls:
+            logger.warning(
+                f"⚠️ Вызов DAG в {file_path}:{node.lineno} не является объявлением "
+                f"на уровне модуля, файл будет импортирован"
+            )
+            return None
+
+    if not declarations:
+        return None
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            dag_name = _task_name(node, declarations)
+            if dag_name:
+                declarations[dag_name]["tasks"].append(node.name)
+    return declarations
+
+
+def load_file_dags(file_path, lazy=True):
+    """DAG файла: {имя переменной: DAG}
+
+    При lazy объявления читаются из AST без выполнения модуля (тяжелые
+    импорты вроде pandas не попадают в процесс), модуль импортируется при
+    первом запуске DAG. Если объявление не вычисляется статически, файл
+    импортируется сразу, как без lazy.
+    """
+    if lazy:
+        declarations = discover_dags(file_path)
+        if declarations:
+            return {
+                attr_name: LazyDAG(file_path, attr_name, declaration)
+                for attr_name, declaration in declarations.items()
+            }
+
+    module = import_module_from_file(file_path)
+    dags = {
+        attr_name: getattr(module, attr_name)
+        for attr_name in dir(module)
+        if isinstance(getattr(module, attr_name), DAG)
+    }
+    for dag in dags.values():
+        dag.validate()
+    return dags
+
+
+class LazyDAG(DAG):
+    """DAG, построенный по объявлению в файле; модуль импортируется при первом запуске
+
+    Расписание и состояние живут в самом LazyDAG, задачи - в настоящем DAG
+    модуля. DAG с executor="process" в процессе планировщика не импортируются
+    никогда: модуль выполняет только процесс-воркер.
+    """
+
+    def __init__(self, file_path, attr_name, declaration):
+        super().__init__(**declaration["kwargs"])
+        self.file_path = str(file_path)
+        self.attr_name = attr_name
+        self.declared_tasks = declaration["tasks"]
+        self._resolved = None
+        self._resolve_lock = threading.Lock()
+
+    @property
+    def resolved(self):
+        return self._resolved is not None
+
+    def resolve(self):
+        """Импортирует модуль и возвращает настоящий DAG"""
+        with self._resolve_lock:
+            if self._resolved is None:
+                logger.info(f"📦 Импорт модуля DAG {self.dag_id}: {self.file_path}")
+                module = import_module_from_file(self.file_path)
+                dag = getattr(module, self.attr_name, None)
+                if not isinstance(dag, DAG):
+                    raise TypeError(
+                        f"{self.file_path}:{self.attr_name} не является DAG"
+                    )
+                dag.validate()
+                self._resolved = dag
+                self.tasks = dag.tasks
+            return self._resolved
+
+    def run(self, dag_run=None):
+        """Выполняет задачи настоящего DAG, сохраняя состояние расписания здесь"""
+        dag = self.resolve()
+        dag.last_run = self.last_run
+        dag.next_run = self.next_run
+        result = dag.run(dag_run)
+        self.last_run = dag.last_run
+        return result
+
+    def get_status(self):
+        status = super().get_status()
+        if not self.resolved:
+            status["tasks_count"] = len(self.declared_tasks)
+            status["tasks"] = {name: [] for name in self.declared_tasks}
+        status["lazy"] = True
+        status["resolved"] = self.resolved
+        return status
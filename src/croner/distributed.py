@@ -0,0 +1,576 @@
+import os
+import pickle
+import socket
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+from src.config import logger
+
+from .cancellation import CancelToken, TaskCancelled
+from .dag_run import DagRun
+from .discovery import load_dag
+from .executors import DagJob, WorkerPoolExecutor
+from .state_store import require_tables
+
+
+class RemoteTaskError(RuntimeError):
+    """Задача упала на воркере, а исключение не удалось передать как есть"""
+
+
+class _RowWaiter:
+    """Ожидание итога одной задачи очереди"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.done = False
+        self.row = None  # Строка итога (None при done - строка пропала)
+
+
+class PostgresTaskQueue:
+    """Очередь экземпляров задач в Postgres для распределенного режима
+
+    Планировщик (поток запуска DAG) кладет задачу в таблицу task_queue
+    и ждет ее итога: один поток-опросчик раз в poll_interval читает строки
+    всех ожидаемых задач одним запросом и будит их потоки, поэтому число
+    запросов не растет с числом задач. Воркеры на любых машинах забирают
+    задачи через SELECT ... FOR UPDATE SKIP LOCKED, поэтому одну задачу
+    получает ровно один воркер. Воркер раз в heartbeat_timeout / 4 секунд
+    отмечается в heartbeat_at; задачи воркера, молчащего дольше
+    heartbeat_timeout, возвращаются в очередь (не больше max_attempts раз).
+
+    Аргументы и результаты задач передаются через pickle: воркеры должны
+    видеть те же файлы DAG и ту же версию кода, что и планировщик.
+    Распаковка pickle выполняет код, поэтому таблица очереди - граница
+    доверия: писать в нее должны только роли планировщика и воркеров
+    (как для src/sql/croner_state.sql), иначе любой с правом INSERT/UPDATE
+    на task_queue выполнит свой код в планировщике и на воркерах.
+
+    Таблицу создает src/sql/croner_state.sql или сама очередь при
+    create_schema (CRONER_STATE_CREATE_SCHEMA).
+    """
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    FINISHED = (SUCCESS, FAILED, CANCELLED)
+
+    def __init__(
+        self,
+        engine,
+        schema="croner",
+        poll_interval=1.0,
+        heartbeat_timeout=60,
+        max_attempts=3,
+        create_schema=False,
+    ):
+        self.engine = engine
+        self.schema = schema
+        self.poll_interval = poll_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_attempts = max_attempts
+        self.create_schema = create_schema
+        # Сколько ждать итога задачи после отмены, прежде чем бросить ожидание
+        self.cancel_wait = max(heartbeat_timeout, 10)
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+        self._waiters = {}  # id строки -> _RowWaiter
+        self._waiters_lock = threading.Lock()
+        self._poller = None
+
+    @property
+    def table(self):
+        return f"{self.schema}.task_queue"
+
+    def _begin(self):
+        """Транзакция; таблица очереди проверяется при первом обращении"""
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._create_schema()
+        return self.engine.begin()
+
+    def _create_schema(self):
+        with self.engine.begin() as connection:
+            if not self.create_schema:
+                require_tables(connection, self.schema, ("task_queue",))
+                self._schema_ready = True
+                return
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema}"))
+            connection.execute(
+                text(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        id BIGSERIAL PRIMARY KEY,
+                        dag_id VARCHAR(255) NOT NULL,
+                        task_id VARCHAR(255) NOT NULL,
+                        run_time TIMESTAMP,
+                        file_path TEXT NOT NULL,
+                        attr_name VARCHAR(255) NOT NULL,
+                        payload BYTEA,
+                        priority INTEGER DEFAULT 0,
+                        state VARCHAR(16) NOT NULL DEFAULT 'queued',
+                        attempts INTEGER NOT NULL DEFAULT 0,
+                        worker VARCHAR(255),
+                        cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+                        result BYTEA,
+                        error TEXT,
+                        enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        started_at TIMESTAMP,
+                        heartbeat_at TIMESTAMP,
+                        finished_at TIMESTAMP
+                    )
+                    """
+                )
+            )
+            # Частичный индекс: выборка следующей задачи не читает историю
+            connection.execute(
+                text(
+                    f"""
+                    CREATE INDEX IF NOT EXISTS task_queue_queued_idx
+                    ON {self.table} (priority DESC, id) WHERE state = 'queued'
+                    """
+                )
+            )
+        self._schema_ready = True
+
+    # Сторона планировщика
+
+    def enqueue(self, dag_run: DagRun, task, inputs):
+        """Ставит экземпляр задачи в очередь; возвращает id строки"""
+        file_path, attr_name = dag_run.source
+        with self._begin() as connection:
+            return connection.execute(
+                text(
+                    f"""
+                    INSERT INTO {self.table}
+                        (dag_id, task_id, run_time, file_path, attr_name,
+                         payload, priority)
+                    VALUES (:dag_id, :task_id, :run_time, :file_path, :attr_name,
+                            :payload, :priority)
+                    RETURNING id
+                    """
+                ),
+                {
+                    "dag_id": dag_run.dag_id,
+                    "task_id": task.task_id,
+                    "run_time": dag_run.run_time,
+                    "file_path": str(file_path),
+                    "attr_name": attr_name,
+                    "payload": pickle.dumps(inputs, protocol=5),
+                    "priority": task.dag.priority,
+                },
+            ).scalar()
+
+    def _fetch_many(self, row_ids):
+        """{id: строка} для задач row_ids (пропавших строк в ответе нет)"""
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(
+                    f"SELECT id, state, result, error, worker FROM {self.table} "
+                    "WHERE id = ANY(:ids)"
+                ),
+                {"ids": list(row_ids)},
+            ).mappings()
+            return {row["id"]: row for row in rows}
+
+    def _watch(self, row_id):
+        """Ставит задачу на опрос; поток-опросчик запускается при первом ожидании"""
+        waiter = _RowWaiter()
+        with self._waiters_lock:
+            self._waiters[row_id] = waiter
+            if self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll_loop, name="croner-task-queue-poller", daemon=True
+                )
+                self._poller.start()
+        return waiter
+
+    def _unwatch(self, row_id):
+        with self._waiters_lock:
+            self._waiters.pop(row_id, None)
+
+    def _poll_loop(self):
+        """Опрашивает итоги всех ожидаемых задач; завершается, когда ждать некого"""
+        failing = False
+        while True:
+            with self._waiters_lock:
+                if not self._waiters:
+                    self._poller = None
+                    return
+                row_ids = list(self._waiters)
+            try:
+                rows = self._fetch_many(row_ids)
+            except Exception as e:
+                # Задачи ждут, пока база снова ответит (или до своего таймаута)
+                if not failing:
+                    logger.error("❌ Не удалось опросить очередь задач", e)
+                failing = True
+                rows = None
+            else:
+                failing = False
+            if rows is not None:
+                with self._waiters_lock:
+                    for row_id in row_ids:
+                        waiter = self._waiters.get(row_id)
+                        row = rows.get(row_id)
+                        if waiter is None or (
+                            row is not None and row["state"] not in self.FINISHED
+                        ):
+                            continue
+                        waiter.row = row
+                        waiter.done = True
+                        waiter.event.set()
+            time.sleep(self.poll_interval)
+
+    def cancel(self, row_id, reason):
+        """Отменяет задачу: из очереди снимается сразу, воркеру передается флаг"""
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"""
+                    UPDATE {self.table}
+                    SET state = CASE WHEN state = 'queued'
+                                     THEN 'cancelled' ELSE state END,
+                        error = CASE WHEN state = 'queued'
+                                     THEN :reason ELSE error END,
+                        finished_at = CASE WHEN state = 'queued'
+                                           THEN CURRENT_TIMESTAMP
+                                           ELSE finished_at END,
+                        cancel_requested = TRUE
+                    WHERE id = :id
+                    """
+                ),
+                {"id": row_id, "reason": reason},
+            )
+
+    def run_task(self, dag_run: DagRun, task, inputs, token: CancelToken):
+        """Выполняет задачу на воркере и ждет итог (вызывается в потоке задачи)"""
+        row_id = self.enqueue(dag_run, task, inputs)
+        logger.info(
+            f"📮 Задача {task.task_id} DAG {dag_run.dag_id} поставлена "
+            f"в очередь воркеров (id {row_id})",
+            dag=dag_run.dag_id,
+            task=task.task_id,
+        )
+        waiter = self._watch(row_id)
+        # Отмена будит поток задачи сразу, не дожидаясь опроса
+        token.add_callback(lambda _: waiter.event.set())
+        cancel_deadline = None
+        try:
+            while True:
+                if waiter.done:
+                    if waiter.row is None:
+                        raise RemoteTaskError(f"Задача {row_id} пропала из очереди")
+                    return self._outcome(waiter.row)
+                if token.cancelled and cancel_deadline is None:
+                    cancel_deadline = time.monotonic() + self.cancel_wait
+                    waiter.event.clear()
+                    self.cancel(row_id, token.reason)
+                    continue
+                if cancel_deadline is None:
+                    waiter.event.wait()
+                    continue
+                remaining = cancel_deadline - time.monotonic()
+                if remaining <= 0 or not waiter.event.wait(remaining):
+                    # Воркер не ответил на отмену: итог уже никому не нужен
+                    raise TaskCancelled(token.reason)
+        finally:
+            self._unwatch(row_id)
+
+    @staticmethod
+    def _outcome(row):
+        if row["state"] == PostgresTaskQueue.SUCCESS:
+            return pickle.loads(row["result"]) if row["result"] is not None else None
+        if row["state"] == PostgresTaskQueue.CANCELLED:
+            raise TaskCancelled(row["error"])
+        if row["result"] is not None:
+            # Исключение задачи: retry_on и логи видят исходный тип
+            raise pickle.loads(row["result"])
+        raise RemoteTaskError(f"{row['error']} (воркер {row['worker']})")
+
+    # Сторона воркера
+
+    def claim(self, worker):
+        """Забирает следующую задачу из очереди; None - очередь пуста"""
+        with self._begin() as connection:
+            return (
+                connection.execute(
+                    text(
+                        f"""
+                        UPDATE {self.table}
+                        SET state = 'running', worker = :worker,
+                            attempts = attempts + 1,
+                            started_at = CURRENT_TIMESTAMP,
+                            heartbeat_at = CURRENT_TIMESTAMP
+                        WHERE id = (
+                            SELECT id FROM {self.table}
+                            WHERE state = 'queued'
+                            ORDER BY priority DESC, id
+                            LIMIT 1
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING id, dag_id, task_id, run_time, file_path,
+                                  attr_name, payload, attempts
+                        """
+                    ),
+                    {"worker": worker},
+                )
+                .mappings()
+                .first()
+            )
+
+    def heartbeat(self, worker, row_ids):
+        """Отмечает, что воркер жив; возвращает id задач, которые просят отменить"""
+        if not row_ids:
+            return set()
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(
+                    f"""
+                    UPDATE {self.table} SET heartbeat_at = CURRENT_TIMESTAMP
+                    WHERE id = ANY(:ids) AND worker = :worker AND state = 'running'
+                    RETURNING id, cancel_requested
+                    """
+                ),
+                {"ids": list(row_ids), "worker": worker},
+            ).fetchall()
+        return {row_id for row_id, cancel_requested in rows if cancel_requested}
+
+    def complete(self, row_id, worker, state, result=None, error=None):
+        """Записывает итог задачи (если ее не отдали другому воркеру)"""
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"""
+                    UPDATE {self.table}
+                    SET state = :state, result = :result, error = :error,
+                        finished_at = CURRENT_TIMESTAMP
+                    WHERE id = :id AND worker = :worker AND state = 'running'
+                    """
+                ),
+                {
+                    "id": row_id,
+                    "worker": worker,
+                    "state": state,
+                    "result": result,
+                    "error": error,
+                },
+            )
+
+    def reclaim_stale(self):
+        """Возвращает в очередь задачи воркеров, переставших отмечаться"""
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(
+                    f"""
+                    UPDATE {self.table}
+                    SET state = CASE WHEN attempts < :max_attempts
+                                     THEN 'queued' ELSE 'failed' END,
+                        error = 'воркер ' || worker || ' перестал отвечать',
+                        finished_at = CASE WHEN attempts < :max_attempts
+                                           THEN NULL ELSE CURRENT_TIMESTAMP END,
+                        worker = CASE WHEN attempts < :max_attempts
+                                      THEN NULL ELSE worker END
+                    WHERE state = 'running'
+                      AND heartbeat_at < CURRENT_TIMESTAMP
+                          - make_interval(secs => :timeout)
+                    RETURNING dag_id, task_id, state
+                    """
+                ),
+                {
+                    "max_attempts": self.max_attempts,
+                    "timeout": self.heartbeat_timeout,
+                },
+            ).fetchall()
+        for dag_id, task_id, state in rows:
+            outcome = (
+                "возвращена в очередь" if state == self.QUEUED else "попытки исчерпаны"
+            )
+            logger.warning(
+                f"🔄 Задача {task_id} DAG {dag_id} потеряла воркер: {outcome}",
+                dag=dag_id,
+                task=task_id,
+            )
+        return len(rows)
+
+    def cleanup(self, keep_days=7):
+        """Удаляет завершенные задачи старше keep_days"""
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"DELETE FROM {self.table} WHERE state IN "
+                    "('success', 'failed', 'cancelled') AND finished_at < "
+                    "CURRENT_TIMESTAMP - make_interval(days => :days)"
+                ),
+                {"days": keep_days},
+            )
+
+    def get_stats(self):
+        """Количество задач очереди по состояниям"""
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(
+                    f"SELECT state, count(*) FROM {self.table} "
+                    "WHERE state IN ('queued', 'running') GROUP BY state"
+                )
+            ).fetchall()
+        stats = {self.QUEUED: 0, self.RUNNING: 0}
+        stats.update({state: count for state, count in rows})
+        return stats
+
+
+class DistributedExecutor(WorkerPoolExecutor):
+    """Бэкенд распределенного режима: граф DAG ведет планировщик, задачи - воркеры
+
+    Поток пула только раздает готовые задачи через очередь и собирает итоги,
+    поэтому потоков нужно больше, чем в пуле DAG: они почти не нагружают
+    планировщик. Пулы слотов по-прежнему занимаются в планировщике и
+    действуют на все воркеры сразу.
+    """
+
+    def __init__(self, task_queue: PostgresTaskQueue, max_workers=10, name=None):
+        super().__init__(max_workers, name=name or "croner-distributed")
+        self.task_queue = task_queue
+
+    def make_dag_run(self, job: DagJob):
+        dag_run = super().make_dag_run(job)
+        if job.file_path is None or job.attr_name is None:
+            raise RuntimeError(f"Неизвестен файл DAG {job.dag_id} для воркеров")
+        dag_run.task_queue = self.task_queue
+        dag_run.source = (job.file_path, job.attr_name)
+        return dag_run
+
+
+class TaskWorker:
+    """Воркер распределенного режима: выполняет задачи из PostgresTaskQueue
+
+    Запуск: python -m src.croner worker --concurrency 4. Файлы DAG ищутся
+    по пути из очереди, а если его нет на этой машине - по имени файла
+    в dags_folder.
+    """
+
+    def __init__(
+        self, task_queue: PostgresTaskQueue, dags_folder, concurrency=2, name=None
+    ):
+        self.task_queue = task_queue
+        self.dags_folder = Path(dags_folder)
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.heartbeat_interval = max(task_queue.heartbeat_timeout / 4, 1)
+
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._running = {}  # id строки очереди -> токен отмены задачи
+        self._modules_cache = {}
+        self._load_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def run(self):
+        """Выполняет задачи до stop(); начатые задачи дорабатывают"""
+        logger.info(
+            f"👷 Воркер {self.name} запущен: {self.concurrency} потоков, "
+            f"DAG из {self.dags_folder}"
+        )
+        threads = [
+            threading.Thread(
+                target=self._worker_loop, name=f"croner-task-worker-{i}", daemon=True
+            )
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        while not self._stop_event.wait(self.heartbeat_interval):
+            self._heartbeat()
+        for thread in threads:
+            thread.join()
+        logger.info(
+            f"👷 Воркер {self.name} остановлен: выполнено {self.completed}, "
+            f"с ошибкой {self.failed}"
+        )
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _heartbeat(self):
+        with self._lock:
+            running = dict(self._running)
+        try:
+            for row_id in self.task_queue.heartbeat(self.name, running):
+                running[row_id].cancel("отмена из планировщика")
+            # Любой живой воркер подбирает задачи упавших
+            self.task_queue.reclaim_stale()
+        except Exception as e:
+            logger.warning(f"Воркер {self.name}: ошибка отметки в очереди: {e}")
+
+    def _worker_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                row = self.task_queue.claim(self.name)
+            except Exception as e:
+                logger.warning(f"Воркер {self.name}: очередь недоступна: {e}")
+                row = None
+            if row is None:
+                self._stop_event.wait(self.task_queue.poll_interval)
+                continue
+            self._execute(row)
+
+    def _resolve_path(self, file_path):
+        path = Path(file_path)
+        if path.exists():
+            return path
+        return self.dags_folder / path.name
+
+    def _execute(self, row):
+        row_id = row["id"]
+        token = CancelToken()
+        with self._lock:
+            self._running[row_id] = token
+        label = f"{row['task_id']} DAG {row['dag_id']}"
+        logger.info(
+            f"▶️ Воркер {self.name}: задача {label} (попытка {row['attempts']})"
+        )
+        started = time.monotonic()
+        state, result, error = PostgresTaskQueue.SUCCESS, None, None
+        try:
+            with self._load_lock:
+                dag = load_dag(
+                    self._resolve_path(row["file_path"]),
+                    row["attr_name"],
+                    self._modules_cache,
+                )
+            task = dag.get_task(row["task_id"])
+            kwargs = pickle.loads(row["payload"]) if row["payload"] else {}
+            if task.accepts_cancel_token:
+                kwargs["cancel_token"] = token
+            value = task(**kwargs)
+            result = pickle.dumps(value, protocol=5) if value is not None else None
+        except TaskCancelled as e:
+            state, error = PostgresTaskQueue.CANCELLED, str(e)
+        except Exception as e:
+            state, error = PostgresTaskQueue.FAILED, f"{type(e).__name__}: {e}"
+            try:
+                result = pickle.dumps(e, protocol=5)
+            except Exception:
+                result = None
+        finally:
+            with self._lock:
+                self._running.pop(row_id, None)
+
+        duration = time.monotonic() - started
+        if state == PostgresTaskQueue.SUCCESS:
+            self.completed += 1
+            logger.info(f"✅ Воркер {self.name}: задача {label} за {duration:.2f}с")
+        else:
+            self.failed += 1
+            logger.error(f"❌ Воркер {self.name}: задача {label}: {error}")
+        try:
+            self.task_queue.complete(row_id, self.name, state, result, error)
+        except Exception as e:
+            # Итог потерян: после heartbeat_timeout задачу заберет другой воркер
+            logger.error(f"Воркер {self.name}: не удалось записать итог {label}", e)
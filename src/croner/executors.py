@@ -0,0 +1,319 @@
+import queue
+import threading
+import time
+
+from src.config import logger
+
+from .cancellation import CancelToken
+from .dag_run import DagRun
+from .profiling import profile_allocations
+
+
+class DagJob:
+    """Задание на выполнение DAG, передаваемое бэкенду выполнения"""
+
+    def __init__(
+        self,
+        dag_id,
+        dag,
+        enqueued_at=None,
+        file_path=None,
+        attr_name=None,
+        scheduled_for=None,
+    ):
+        self.dag_id = dag_id
+        self.dag = dag
+        self.scheduled_for = scheduled_for  # Плановое (логическое) время запуска
+        self.file_path = file_path  # Откуда загружен DAG (нужно процессам-воркерам)
+        self.attr_name = attr_name
+        self.enqueued_at = enqueued_at or time.monotonic()  # Когда DAG стал готов к запуску
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.worker_pid = None  # Процесс-воркер, выполняющий DAG (пул процессов)
+        self.profile_memory = False  # Снимать ли профиль аллокаций этого запуска
+        self.cancel_token = CancelToken()  # Отмена запуска (остановка планировщика)
+        self.dag_run = None  # Незавершенный запуск, продолжаемый после повтора задач
+        self.conf = None  # Параметры запуска от датчика (dag_run.conf)
+        self.memory_report = None
+
+    @property
+    def wait_time(self):
+        """Сколько секунд DAG ждал свободного слота"""
+        if self.started_at is None:
+            return time.monotonic() - self.enqueued_at
+        return self.started_at - self.enqueued_at
+
+    @property
+    def queue_key(self):
+        """Ключ дедупликации в очереди: продолжение запуска - отдельное задание"""
+        if self.dag_run is not None:
+            return (self.dag_id, "retry")
+        # Запуск от датчика не сливается с плановым запуском того же DAG
+        return (self.dag_id, "sensor") if self.conf is not None else self.dag_id
+
+    @property
+    def deferred(self):
+        """Запуск отложен до повтора задач"""
+        return isinstance(self.result, DagRun) and self.result.is_deferred
+
+    @property
+    def status(self):
+        """Итог запуска: error (DAG упал целиком), success или failed (ошибки задач)"""
+        if self.error is not None:
+            return "error"
+        if isinstance(self.result, DagRun):
+            return self.result.status
+        return "success"
+
+    @property
+    def run_time(self):
+        """Сколько секунд выполнялся DAG"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+
+class DagExecutor:
+    """Интерфейс бэкенда выполнения DAG"""
+
+    def __init__(self, max_workers=5):
+        self.max_workers = max_workers
+        self.on_complete = None  # Колбэк планировщика: on_complete(job)
+
+    def start(self):
+        """Запускает бэкенд"""
+
+    def try_submit(self, job: DagJob):
+        """Занимает слот и отправляет DAG на выполнение; False, если слотов нет"""
+        raise NotImplementedError
+
+    def free_slots(self):
+        """Количество свободных слотов"""
+        raise NotImplementedError
+
+    def busy_slots(self):
+        """Количество занятых слотов"""
+        return self.max_workers - self.free_slots()
+
+    def cancel_running(self, reason):
+        """Отменяет выполняемые DAG: задачи получают отмену токена"""
+
+    def shutdown(self, timeout=30):
+        """Останавливает бэкенд, ожидая завершения выполняемых DAG"""
+        raise NotImplementedError
+
+    def get_stats(self):
+        """Статистика бэкенда для мониторинга"""
+        return {
+            "max_workers": self.max_workers,
+            "busy": self.busy_slots(),
+            "free": self.free_slots(),
+        }
+
+
+class WorkerPoolExecutor(DagExecutor):
+    """Пул из фиксированного числа долгоживущих потоков для выполнения DAG"""
+
+    def __init__(self, max_workers=5, name="croner-worker"):
+        super().__init__(max_workers)
+        self.name = name
+        self._jobs = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+        self._reserved = 0  # Занятые слоты (в очереди пула + выполняются)
+        self._running_jobs = {}  # worker name -> DagJob
+        self._started = False
+        self._stopping = False
+
+        # Статистика
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.dag_stats = {}
+
+    def start(self):
+        """Запускает рабочие потоки пула"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping = False
+            for i in range(self.max_workers):
+                worker = threading.Thread(
+                    target=self._worker_loop, name=f"{self.name}-{i}", daemon=True
+                )
+                self._workers.append(worker)
+                worker.start()
+
+    def try_submit(self, job: DagJob):
+        """Занимает слот и ставит DAG в очередь пула; False, если слотов нет"""
+        self.start()
+        with self._lock:
+            if self._stopping or self._reserved >= self.max_workers:
+                return False
+            self._reserved += 1
+            self.submitted += 1
+        self._jobs.put(job)
+        return True
+
+    def free_slots(self):
+        """Количество свободных слотов"""
+        with self._lock:
+            return self.max_workers - self._reserved
+
+    def running_jobs(self):
+        """Задания, выполняемые прямо сейчас"""
+        with self._lock:
+            return list(self._running_jobs.values())
+
+    def make_dag_run(self, job: DagJob):
+        """Запуск DAG для задания: новый или продолжение отложенного"""
+        if job.dag_run is not None:
+            dag_run = job.dag_run
+            dag_run.cancel_token = job.cancel_token
+            return dag_run
+        return DagRun(job.dag.dag_id, job.scheduled_for, job.cancel_token, job.conf)
+
+    def execute(self, job: DagJob):
+        """Выполняет DAG в текущем рабочем потоке"""
+        dag_run = self.make_dag_run(job)
+        if not job.profile_memory:
+            return job.dag.run(dag_run)
+        try:
+            result, job.memory_report = profile_allocations(
+                lambda: job.dag.run(dag_run)
+            )
+        except Exception as e:
+            job.memory_report = getattr(e, "memory_report", None)
+            raise
+        return result
+
+    def cancel_running(self, reason):
+        """Отменяет токены выполняемых DAG"""
+        for job in self.running_jobs():
+            job.cancel_token.cancel(reason)
+
+    def _worker_loop(self):
+        """Цикл рабочего потока: берет задания из очереди пула"""
+        worker_name = threading.current_thread().name
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+
+            job.started_at = time.monotonic()
+            with self._lock:
+                self._running_jobs[worker_name] = job
+            try:
+                logger.info(
+                    f"Запуск DAG: {job.dag_id} (ожидание слота {job.wait_time:.2f}с)"
+                )
+                job.result = self.execute(job)
+            except Exception as e:
+                job.error = e
+                logger.critical(f"Ошибка при выполнении DAG {job.dag_id}: {e}")
+            finally:
+                job.finished_at = time.monotonic()
+                with self._lock:
+                    self._running_jobs.pop(worker_name, None)
+                    self._reserved -= 1
+                    self._record_stats(job)
+
+            # Уведомляем планировщик уже после освобождения слота
+            if self.on_complete:
+                try:
+                    self.on_complete(job)
+                except Exception as e:
+                    logger.error(f"Ошибка в обработчике завершения DAG {job.dag_id}", e)
+
+    def _record_stats(self, job: DagJob):
+        """Обновляет статистику ожидания и выполнения по DAG"""
+        if job.error is None:
+            self.completed += 1
+        else:
+            self.failed += 1
+
+        stats = self.dag_stats.setdefault(
+            job.dag_id,
+            {
+                "runs": 0,
+                "failures": 0,
+                "last_wait": 0.0,
+                "max_wait": 0.0,
+                "total_wait": 0.0,
+                "last_run_time": 0.0,
+                "max_run_time": 0.0,
+                "total_run_time": 0.0,
+            },
+        )
+        stats["runs"] += 1
+        if job.error is not None:
+            stats["failures"] += 1
+        stats["last_wait"] = job.wait_time
+        stats["max_wait"] = max(stats["max_wait"], job.wait_time)
+        stats["total_wait"] += job.wait_time
+        stats["last_run_time"] = job.run_time
+        stats["max_run_time"] = max(stats["max_run_time"], job.run_time)
+        stats["total_run_time"] += job.run_time
+
+    def shutdown(self, timeout=30):
+        """Останавливает пул, ожидая завершения выполняемых DAG не дольше timeout"""
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping = True
+            workers = list(self._workers)
+
+        # Сбрасываем задания, которые еще не начали выполняться
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                with self._lock:
+                    self._reserved -= 1
+
+        for _ in workers:
+            self._jobs.put(None)
+
+        deadline = time.monotonic() + timeout
+        for worker in workers:
+            worker.join(timeout=max(deadline - time.monotonic(), 0))
+
+        with self._lock:
+            self._workers = [w for w in workers if w.is_alive()]
+            self._started = False
+
+    def get_stats(self):
+        """Статистика пула: загрузка слотов, ожидание и время выполнения по DAG"""
+        with self._lock:
+            dags = {}
+            for dag_id, stats in self.dag_stats.items():
+                runs = stats["runs"] or 1
+                dags[dag_id] = {
+                    "runs": stats["runs"],
+                    "failures": stats["failures"],
+                    "last_wait": round(stats["last_wait"], 3),
+                    "avg_wait": round(stats["total_wait"] / runs, 3),
+                    "max_wait": round(stats["max_wait"], 3),
+                    "last_run_time": round(stats["last_run_time"], 3),
+                    "avg_run_time": round(stats["total_run_time"] / runs, 3),
+                    "max_run_time": round(stats["max_run_time"], 3),
+                    "total_run_time": round(stats["total_run_time"], 3),
+                }
+            return {
+                "max_workers": self.max_workers,
+                "busy": self._reserved,
+                "free": self.max_workers - self._reserved,
+                "running": {
+                    job.dag_id: round(job.run_time, 3)
+                    for job in self._running_jobs.values()
+                },
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "dags": dags,
+            }
@@ -0,0 +1,176 @@
+import os
+import socket
+import threading
+import time
+
+from sqlalchemy import text
+
+from src.config import logger
+
+from .state_store import require_tables
+
+
+class PostgresLeaderElection:
+    """Выбор ведущего экземпляра Croner через advisory lock Postgres
+
+    Запускает DAG только экземпляр, удерживающий сессионную блокировку
+    pg_try_advisory_lock(hashtext(name)); остальные ждут в резерве и
+    пробуют захватить ее раз в check_interval секунд. Блокировка живет,
+    пока жива сессия: при падении ведущего Postgres снимает ее сам, и
+    резервный экземпляр становится ведущим за несколько секунд.
+
+    Каждый плановый запуск дополнительно застолбляется в таблице
+    run_claims: бывший ведущий (потерявший соединение, но еще работающий)
+    и новый не выполнят один и тот же запуск дважды. Таблицу создает
+    src/sql/croner_state.sql или сам экземпляр при create_schema
+    (CRONER_STATE_CREATE_SCHEMA).
+    """
+
+    def __init__(
+        self,
+        engine,
+        name="croner",
+        check_interval=5,
+        schema="croner",
+        create_schema=False,
+    ):
+        self.engine = engine
+        self.create_schema = create_schema
+        self.name = name
+        self.check_interval = check_interval
+        self.schema = schema
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_leader = False
+        self._connection = None
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._schema_ready = False
+
+    def _create_schema(self):
+        with self.engine.begin() as connection:
+            if not self.create_schema:
+                require_tables(connection, self.schema, ("run_claims",))
+                self._schema_ready = True
+                return
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {self.schema}"))
+            connection.execute(
+                text(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self.schema}.run_claims (
+                        dag_id VARCHAR(255) NOT NULL,
+                        run_time TIMESTAMP NOT NULL,
+                        owner VARCHAR(255),
+                        claimed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (dag_id, run_time)
+                    )
+                    """
+                )
+            )
+        self._schema_ready = True
+
+    def _connect(self):
+        """Отдельная сессия под блокировку (вне пула, в autocommit)"""
+        if not self._schema_ready:
+            self._create_schema()
+        connection = self.engine.connect()
+        # Сессия держится часами: не занимаем слот пула
+        connection.detach()
+        connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+        # Сервер быстро замечает пропавшего ведущего и снимает блокировку
+        connection.execute(text("SET tcp_keepalives_idle = 10"))
+        connection.execute(text("SET tcp_keepalives_interval = 5"))
+        connection.execute(text("SET tcp_keepalives_count = 3"))
+        return connection
+
+    def _close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+
+    def check(self):
+        """Проверяет или пытается захватить лидерство (не чаще check_interval)
+
+        Возвращает (is_leader, changed): changed - лидерство только что
+        получено или потеряно.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return self.is_leader, False
+            self._next_check = now + self.check_interval
+            was_leader = self.is_leader
+            try:
+                if self.is_leader:
+                    # Сессия жива - блокировка за нами
+                    self._connection.execute(text("SELECT 1"))
+                else:
+                    if self._connection is None:
+                        self._connection = self._connect()
+                    self.is_leader = bool(
+                        self._connection.execute(
+                            text("SELECT pg_try_advisory_lock(hashtext(:name))"),
+                            {"name": self.name},
+                        ).scalar()
+                    )
+            except Exception as e:
+                if was_leader:
+                    logger.error(
+                        f"❌ Потеряно соединение с блокировкой лидера {self.name}", e
+                    )
+                else:
+                    logger.warning(f"Не удалось проверить блокировку {self.name}: {e}")
+                self.is_leader = False
+                self._close()
+
+            if self.is_leader and not was_leader:
+                logger.info(f"👑 Экземпляр {self.owner} стал ведущим ({self.name})")
+            elif was_leader and not self.is_leader:
+                logger.warning(f"⚠️ Экземпляр {self.owner} больше не ведущий")
+            return self.is_leader, self.is_leader != was_leader
+
+    def wait_time(self):
+        """Сколько секунд до следующей проверки лидерства"""
+        return max(self._next_check - time.monotonic(), 0)
+
+    def claim_run(self, dag_id, run_time):
+        """Застолбляет запуск DAG; False - его уже взял другой экземпляр"""
+        with self.engine.begin() as connection:
+            result = connection.execute(
+                text(
+                    f"""
+                    INSERT INTO {self.schema}.run_claims (dag_id, run_time, owner)
+                    VALUES (:dag_id, :run_time, :owner)
+                    ON CONFLICT (dag_id, run_time) DO NOTHING
+                    """
+                ),
+                {"dag_id": dag_id, "run_time": run_time, "owner": self.owner},
+            )
+            return result.rowcount == 1
+
+    def cleanup_claims(self, keep_days=7):
+        """Удаляет старые отметки запусков"""
+        with self.engine.begin() as connection:
+            connection.execute(
+                text(
+                    f"DELETE FROM {self.schema}.run_claims WHERE claimed_at < "
+                    "CURRENT_TIMESTAMP - make_interval(days => :days)"
+                ),
+                {"days": keep_days},
+            )
+
+    def release(self):
+        """Отдает лидерство (остановка экземпляра)"""
+        with self._lock:
+            if self._connection is not None and self.is_leader:
+                try:
+                    self._connection.execute(
+                        text("SELECT pg_advisory_unlock(hashtext(:name))"),
+                        {"name": self.name},
+                    )
+                except Exception:
+                    pass
+            self.is_leader = False
+            self._close()
@@ -0,0 +1,344 @@
+import hmac
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from sqlalchemy import text
+
+from src.config import logger, pg_logger
+
+
+def _escape(value):
+    """Экранирование значения метки в текстовом формате Prometheus"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Описание метрик: имя -> (тип, подсказка)
+_METRICS = {
+    "croner_executor_slots": ("gauge", "Размер пула выполнения DAG"),
+    "croner_executor_busy_slots": ("gauge", "Занятые слоты пула выполнения DAG"),
+    "croner_process_workers_recycled_total": (
+        "counter",
+        "Перезапуски процессов-воркеров",
+    ),
+    "croner_dag_runs_total": ("counter", "Запуски DAG по итоговому статусу"),
+    # Семейство summary: значения croner_dag_run_seconds_sum и _count
+    "croner_dag_run_seconds": ("summary", "Время выполнения DAG"),
+    "croner_dag_run_seconds_max": ("gauge", "Максимальное время выполнения DAG"),
+    "croner_dag_last_run_seconds": ("gauge", "Время последнего запуска DAG"),
+    "croner_dag_slot_wait_seconds_avg": ("gauge", "Среднее ожидание слота"),
+    "croner_pool_slots": ("gauge", "Размер пула слотов для задач"),
+    "croner_pool_used_slots": ("gauge", "Занятые слоты пула задач"),
+    "croner_pool_denied_total": (
+        "counter",
+        "Отказы в слоте пула (задача ждала освобождения)",
+    ),
+    "croner_task_queue_tasks": (
+        "gauge",
+        "Задачи распределенной очереди по состояниям (queued, running)",
+    ),
+    "croner_async_tasks": (
+        "gauge",
+        "Async-задачи в цикле asyncio по состояниям (running, waiting)",
+    ),
+    "croner_async_tasks_completed_total": (
+        "counter",
+        "Завершенные async-задачи",
+    ),
+    "croner_is_leader": ("gauge", "Экземпляр ведущий и запускает DAG (1/0)"),
+    "croner_queue_depth": ("gauge", "DAG в очереди на выполнение"),
+    "croner_queue_wait_seconds_avg": ("gauge", "Среднее ожидание DAG в очереди"),
+    "croner_queue_waiting_seconds": ("gauge", "Сколько DAG ждет в очереди сейчас"),
+    "croner_rss_bytes": ("gauge", "RSS планировщика и процессов-воркеров"),
+    "croner_memory_budget_bytes": ("gauge", "Бюджет памяти для допуска DAG"),
+    "croner_dag_peak_memory_bytes": ("gauge", "Выученный пик прироста памяти DAG"),
+    "croner_dags_loaded": ("gauge", "Загруженные DAG"),
+    "croner_dag_active_runs": ("gauge", "Выполняемые запуски DAG"),
+    "croner_dag_next_run_timestamp_seconds": ("gauge", "Следующий запуск DAG"),
+    "croner_scheduler_loop_age_seconds": (
+        "gauge",
+        "Сколько секунд назад отработал цикл планировщика",
+    ),
+    "croner_logger_buffer_records": ("gauge", "Логи, ожидающие записи в Postgres"),
+    "croner_logger_failed_flushes_total": (
+        "counter",
+        "Пакеты логов, не записанные в Postgres",
+    ),
+}
+
+_MB = 1024 * 1024
+
+
+class _MetricsBuilder:
+    """Собирает метрики в текстовом формате Prometheus"""
+
+    def __init__(self):
+        self.samples = {}  # имя -> [строки значений], порядок объявления сохраняется
+
+    def add(self, name, value, **labels):
+        family = name
+        if name not in _METRICS:
+            # _sum и _count - значения семейства summary
+            family = name.rsplit("_", 1)[0]
+        label_str = ""
+        if labels:
+            label_str = (
+                "{"
+                + ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                + "}"
+            )
+        self.samples.setdefault(family, []).append(
+            f"{name}{label_str} {float(value)!r}"
+        )
+
+    def render(self):
+        lines = []
+        for name, samples in self.samples.items():
+            metric_type, help_text = _METRICS[name]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def render_metrics(croner):
+    """Метрики планировщика: запуски, очередь, слоты, пулы задач, память, логгер"""
+    metrics = _MetricsBuilder()
+
+    for executor, stats in croner.get_executor_stats().items():
+        metrics.add("croner_executor_slots", stats["max_workers"], executor=executor)
+        metrics.add("croner_executor_busy_slots", stats["busy"], executor=executor)
+        if "recycled" in stats:
+            metrics.add(
+                "croner_process_workers_recycled_total",
+                stats["recycled"],
+                executor=executor,
+            )
+        for dag_id, dag_stats in stats.get("dags", {}).items():
+            for name, key in (
+                ("croner_dag_run_seconds_sum", "total_run_time"),
+                ("croner_dag_run_seconds_count", "runs"),
+                ("croner_dag_run_seconds_max", "max_run_time"),
+                ("croner_dag_last_run_seconds", "last_run_time"),
+                ("croner_dag_slot_wait_seconds_avg", "avg_wait"),
+            ):
+                metrics.add(name, dag_stats[key], dag_id=dag_id, executor=executor)
+
+    for (dag_id, status), count in croner.get_run_counts().items():
+        metrics.add("croner_dag_runs_total", count, dag_id=dag_id, status=status)
+
+    for pool, stats in croner.get_pool_stats().items():
+        metrics.add("croner_pool_slots", stats["size"], pool=pool)
+        metrics.add("croner_pool_used_slots", stats["used"], pool=pool)
+        metrics.add("croner_pool_denied_total", stats["denied"], pool=pool)
+
+    for state, count in croner.get_task_queue_stats().items():
+        metrics.add("croner_task_queue_tasks", count, state=state)
+
+    async_stats = croner.get_async_stats()
+    for state in ("running", "waiting"):
+        metrics.add("croner_async_tasks", async_stats[state], state=state)
+    metrics.add("croner_async_tasks_completed_total", async_stats["completed"])
+
+    metrics.add("croner_is_leader", int(croner.is_leader))
+
+    queue_status = croner.get_queue_status()
+    metrics.add("croner_queue_depth", queue_status["queue_size"])
+    for dag_id, wait in queue_status["queue_wait"].items():
+        if "avg_wait" in wait:
+            metrics.add(
+                "croner_queue_wait_seconds_avg", wait["avg_wait"], dag_id=dag_id
+            )
+        if "waiting_for" in wait:
+            metrics.add(
+                "croner_queue_waiting_seconds", wait["waiting_for"], dag_id=dag_id
+            )
+
+    memory = queue_status["memory"]
+    metrics.add("croner_rss_bytes", memory["current_mb"] * _MB)
+    metrics.add("croner_memory_budget_bytes", memory["budget_mb"] * _MB)
+    for dag_id, peak in memory["dag_peaks_mb"].items():
+        metrics.add("croner_dag_peak_memory_bytes", peak * _MB, dag_id=dag_id)
+
+    metrics.add("croner_dags_loaded", len(croner.dags))
+    for dag_id, dag_info in list(croner.dags.items()):
+        dag = dag_info["dag"]
+        metrics.add("croner_dag_active_runs", dag.active_runs, dag_id=dag_id)
+        if dag.next_run is not None:
+            metrics.add(
+                "croner_dag_next_run_timestamp_seconds",
+                dag.next_run.timestamp(),
+                dag_id=dag_id,
+            )
+    if croner.last_loop_at is not None:
+        metrics.add(
+            "croner_scheduler_loop_age_seconds", time.monotonic() - croner.last_loop_at
+        )
+
+    handler = pg_logger.handler
+    metrics.add("croner_logger_buffer_records", handler.buffer_size())
+    metrics.add("croner_logger_failed_flushes_total", handler.failed_flushes)
+    return metrics.render()
+
+
+class MetricsServer:
+    """HTTP-сервер планировщика: /metrics (Prometheus) и /health (готовность)
+
+    POST /profile/<dag_id>?runs=N включает профилирование памяти DAG
+    на N запусков (без runs - до выключения), DELETE /profile/<dag_id> выключает.
+    Профилирование управляется только с заголовком Authorization: Bearer
+    <profile_token>; без токена в конфиге /profile отключен.
+    """
+
+    def __init__(
+        self, croner, host="0.0.0.0", port=8000, db_check_ttl=10, profile_token=""
+    ):
+        self.croner = croner
+        self.host = host
+        self.port = port
+        self.profile_token = profile_token
+        self.db_check_ttl = db_check_ttl  # Кеш проверки базы, чтобы не долбить ее
+        self._db_checked_at = 0.0
+        self._db_status = None
+        self._db_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def check_db(self):
+        """SELECT 1 через общий пул подключений планировщика (с кешем)"""
+        with self._db_lock:
+            if time.monotonic() - self._db_checked_at < self.db_check_ttl:
+                return self._db_status
+            try:
+                with self.croner.get_db_engine().connect() as connection:
+                    connection.execute(text("SELECT 1"))
+                self._db_status = "ok"
+            except Exception as e:
+                self._db_status = f"error: {type(e).__name__}"
+                logger.warning(f"⚠️ Проверка базы данных не прошла: {e}")
+            self._db_checked_at = time.monotonic()
+            return self._db_status
+
+    def health(self):
+        """Готовность: планировщик крутится и база отвечает
+
+        Ошибка хранилища состояния DAG не роняет готовность (DAG выполняются),
+        но статус становится degraded: история и догоняние не сохраняются.
+        """
+        scheduler_ok = self.croner.is_healthy()
+        db_status = self.check_db()
+        state_status = self.croner.state_store.get_status()
+        ok = scheduler_ok and db_status == "ok"
+        if not ok:
+            overall = "error"
+        elif state_status in ("ok", "off"):
+            overall = "ok"
+        else:
+            overall = "degraded"
+        status = {
+            "status": overall,
+            "scheduler": "ok" if scheduler_ok else "stalled",
+            "db": db_status,
+            "state_store": state_status,
+            "dags": len(self.croner.dags),
+            "queue_size": len(self.croner.dag_queue),
+        }
+        return ok, status
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                try:
+                    path = self.path.split("?")[0]
+                    if path == "/metrics":
+                        body = render_metrics(server.croner).encode()
+                        self._reply(200, body, "text/plain; version=0.0.4")
+                    elif path == "/health":
+                        ok, status = server.health()
+                        body = json.dumps(status, ensure_ascii=False).encode()
+                        self._reply(200 if ok else 503, body, "application/json")
+                    else:
+                        self._reply(404, b"not found", "text/plain")
+                except Exception as e:
+                    logger.error(f"Ошибка обработки {self.path}", e)
+                    self._reply(500, b"internal error", "text/plain")
+
+            def do_POST(self):
+                self._profile(enable=True)
+
+            def do_DELETE(self):
+                self._profile(enable=False)
+
+            def _profile(self, enable):
+                url = urlsplit(self.path)
+                prefix, _, dag_id = url.path.strip("/").partition("/")
+                if prefix != "profile" or not dag_id:
+                    self._reply(404, b"not found", "text/plain")
+                    return
+                if not server.profile_token:
+                    self._reply(403, b"profiling is disabled", "text/plain")
+                    return
+                expected = f"Bearer {server.profile_token}".encode()
+                given = self.headers.get("Authorization", "").encode()
+                if not hmac.compare_digest(given, expected):
+                    self._reply(401, b"unauthorized", "text/plain")
+                    return
+                try:
+                    if enable:
+                        runs = parse_qs(url.query).get("runs", [None])[0]
+                        server.croner.enable_profiling(
+                            dag_id, int(runs) if runs else None
+                        )
+                    else:
+                        server.croner.disable_profiling(dag_id)
+                except KeyError as e:
+                    self._reply(404, str(e).encode(), "text/plain")
+                    return
+                except ValueError:
+                    self._reply(400, b"runs must be an integer", "text/plain")
+                    return
+                body = json.dumps(
+                    {"dag_id": dag_id, "profiling": enable}, ensure_ascii=False
+                ).encode()
+                self._reply(200, body, "application/json")
+
+            def _reply(self, code, body, content_type):
+                self.send_response(code)
+                self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Prometheus опрашивает часто: не засоряем вывод
+                pass
+
+        return Handler
+
+    def start(self):
+        try:
+            self._server = ThreadingHTTPServer(
+                (self.host, self.port), self._make_handler()
+            )
+        except OSError as e:
+            logger.error(f"❌ Не удалось открыть порт {self.port} для метрик", e)
+            return
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="croner-metrics", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"📈 Метрики: http://{self.host}:{self.port}/metrics, /health")
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,163 @@
+import threading
+
+from src.config import logger
+
+
+class ResourcePools:
+    """Именованные пулы слотов для задач, нагружающих общий ресурс
+
+    Задача с pool="postgres_write" стартует, только если в пуле есть
+    свободный слот; остальные задачи при этом продолжают выполняться.
+    Пулы общие для всех DAG планировщика, включая DAG в процессах-воркерах
+    (они занимают слоты через родителя, см. PipePoolClient).
+    """
+
+    def __init__(self, sizes=None):
+        self._lock = threading.Lock()
+        self._sizes = dict(sizes or {})
+        self._used = {name: 0 for name in self._sizes}
+        self._owners = {}  # owner -> {pool: занято слотов}
+        self._stats = {
+            name: {"acquired": 0, "denied": 0, "peak": 0} for name in self._sizes
+        }
+        self._listeners = []
+        self._warned = set()
+
+    def __contains__(self, name):
+        return name in self._sizes
+
+    def _slots(self, name, slots):
+        """Слотов к занятию: не больше размера пула, иначе задача не стартует"""
+        size = self._sizes[name]
+        if slots > size:
+            self._warn(name, f"задача просит {slots} слотов, в пуле {size}")
+            return size
+        return slots
+
+    def _warn(self, name, message):
+        if (name, message) not in self._warned:
+            self._warned.add((name, message))
+            logger.warning(f"⚠️ Пул {name}: {message}")
+
+    def try_acquire(self, name, slots=1, owner=None):
+        """Занимает слоты без ожидания
+
+        True - слоты заняты, False - пул заполнен, None - пул не объявлен
+        в конфигурации (задача выполняется без ограничения).
+        """
+        if name not in self._sizes:
+            self._warn(name, "не объявлен в CRONER_POOLS, ограничение не действует")
+            return None
+        with self._lock:
+            slots = self._slots(name, slots)
+            if self._used[name] + slots > self._sizes[name]:
+                self._stats[name]["denied"] += 1
+                return False
+            self._used[name] += slots
+            stats = self._stats[name]
+            stats["acquired"] += 1
+            stats["peak"] = max(stats["peak"], self._used[name])
+            if owner is not None:
+                held = self._owners.setdefault(owner, {})
+                held[name] = held.get(name, 0) + slots
+        return True
+
+    def release(self, name, slots=1, owner=None):
+        """Освобождает слоты и будит ожидающие запуски"""
+        if name not in self._sizes:
+            return
+        with self._lock:
+            slots = self._slots(name, slots)
+            self._used[name] = max(self._used[name] - slots, 0)
+            if owner is not None:
+                held = self._owners.get(owner, {})
+                held[name] = max(held.get(name, 0) - slots, 0)
+                if not any(held.values()):
+                    self._owners.pop(owner, None)
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def release_owner(self, owner):
+        """Освобождает все слоты владельца (например, убитого процесса-воркера)"""
+        with self._lock:
+            held = self._owners.pop(owner, {})
+        for name, slots in held.items():
+            if slots:
+                self.release(name, slots)
+
+    def add_listener(self, callback):
+        """callback() вызывается при каждом освобождении слотов"""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def get_stats(self):
+        """Размер, занятость и счетчики отказов по пулам"""
+        with self._lock:
+            return {
+                name: {"size": size, "used": self._used[name], **self._stats[name]}
+                for name, size in self._sizes.items()
+            }
+
+
+class PipePoolClient:
+    """Пулы в процессе-воркере: слоты занимаются в пулах родителя через Pipe
+
+    try_acquire вызывает только цикл запуска DAG (он же единственный читает
+    канал во время запуска), release из потоков задач только отправляет.
+    """
+
+    def __init__(self, conn, send_lock):
+        self.conn = conn
+        self.send_lock = send_lock
+
+    def try_acquire(self, name, slots=1, owner=None):
+        with self.send_lock:
+            self.conn.send(("pool", ("acquire", name, slots)))
+        return self.conn.recv()
+
+    def release(self, name, slots=1, owner=None):
+        with self.send_lock:
+            self.conn.send(("pool", ("release", name, slots)))
+
+    def add_listener(self, callback):
+        # Освобождения в родителе сюда не приходят: цикл DAG перепроверяет пул
+        pass
+
+    def remove_listener(self, callback):
+        pass
+
+
+class PoolLease:
+    """Занятые задачей слоты; release можно вызывать повторно"""
+
+    def __init__(self, pools, name, slots):
+        self.pools = pools
+        self.name = name
+        self.slots = slots
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.pools.release(self.name, self.slots)
+
+
+_pools = None  # Пулы текущего процесса: ResourcePools или PipePoolClient
+
+
+def set_pools(pools):
+    global _pools
+    _pools = pools
+
+
+def get_pools():
+    return _pools
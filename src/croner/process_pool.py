@@ -0,0 +1,330 @@
+import multiprocessing
+import threading
+import time
+
+import psutil
+
+from src.config import logger, pg_logger
+
+from .dag_run import DagRun
+from .discovery import load_dag
+from .executors import DagJob, WorkerPoolExecutor
+from .pools import PipePoolClient, get_pools, set_pools
+from .profiling import profile_allocations
+
+
+class _PipeLogHandler:
+    """Обработчик логов дочернего процесса: пересылает записи родителю"""
+
+    def __init__(self, conn, send_lock):
+        self.conn = conn
+        self.send_lock = send_lock
+
+    def emit(self, record):
+        try:
+            with self.send_lock:
+                self.conn.send(("log", record))
+        except Exception:
+            pass
+
+    def close(self):
+        pass
+
+
+def _worker_main(conn):
+    """Точка входа процесса-воркера: выполняет DAG по командам родителя"""
+    send_lock = threading.Lock()
+
+    # Логи пишет родитель: дочерний процесс только пересылает записи
+    original_handler = pg_logger.handler
+    original_handler._closed = True
+    forward_handler = _PipeLogHandler(conn, send_lock)
+    pg_logger.handler = forward_handler
+    for child_logger in pg_logger._loggers.values():
+        child_logger.handler = forward_handler
+
+    # Слоты пулов занимаются в родителе: пулы общие для всех DAG
+    set_pools(PipePoolClient(conn, send_lock))
+
+    process = psutil.Process()
+    modules_cache = {}
+
+    def task_listener(event, task_id, timeout):
+        # Родитель следит за таймаутами задач: зависшую задачу, держащую GIL,
+        # сам процесс прервать не может
+        try:
+            with send_lock:
+                conn.send(("task", (event, task_id, timeout)))
+        except Exception:
+            pass
+
+    while True:
+        try:
+            command, payload = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if command == "stop":
+            break
+
+        result = None
+        error = None
+        memory_report = None
+        last_run = payload["last_run"]
+        try:
+            dag = load_dag(payload["file_path"], payload["attr_name"], modules_cache)
+            dag.last_run = payload["last_run"]
+            dag.next_run = payload["next_run"]
+            dag_run = payload["dag_run"] or DagRun(
+                dag.dag_id, payload["scheduled_for"], conf=payload["conf"]
+            )
+            dag_run.task_listener = task_listener
+            if payload["profile_memory"]:
+                result, memory_report = profile_allocations(lambda: dag.run(dag_run))
+            else:
+                result = dag.run(dag_run)
+            last_run = dag.last_run
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            memory_report = getattr(e, "memory_report", None)
+
+        reply = {
+            "result": result,
+            "error": error,
+            "memory_report": memory_report,
+            "last_run": last_run,
+            "rss_mb": process.memory_info().rss / 1024 / 1024,
+        }
+        try:
+            with send_lock:
+                conn.send(("result", reply))
+        except Exception as e:
+            # Итог не сериализуется (задача положила в conf блокировку и т.п.):
+            # запуск считается упавшим, процесс остается рабочим
+            reply["result"] = None
+            reply["memory_report"] = None
+            reply["error"] = (
+                f"итог запуска не передается планировщику: {type(e).__name__}: {e}"
+            )
+            with send_lock:
+                conn.send(("result", reply))
+
+    conn.close()
+
+
+class _ProcessWorker:
+    """Долгоживущий процесс-воркер и канал связи с ним"""
+
+    def __init__(self, mp_context):
+        self.conn, child_conn = mp_context.Pipe()
+        self.process = mp_context.Process(
+            target=_worker_main, args=(child_conn,), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.rss_mb = 0.0
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def stop(self, timeout=5):
+        """Останавливает процесс, при необходимости принудительно"""
+        try:
+            self.conn.send(("stop", None))
+        except Exception:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.conn.close()
+
+
+class ProcessWorkerPoolExecutor(WorkerPoolExecutor):
+    """Пул процессов-воркеров для тяжелых DAG (pandas и т.п.)
+
+    Каждый поток пула владеет одним процессом. Процесс пересоздается
+    после max_runs_per_worker запусков или при превышении max_worker_rss_mb,
+    чтобы память гарантированно возвращалась ОС.
+    """
+
+    # Запас сверх таймаута и CANCEL_GRACE, после которого процесс убивается
+    KILL_SLACK = 5
+
+    def __init__(
+        self,
+        max_workers=2,
+        max_runs_per_worker=20,
+        max_worker_rss_mb=1024,
+        name="croner-process",
+    ):
+        super().__init__(max_workers, name=name)
+        self.max_runs_per_worker = max_runs_per_worker
+        self.max_worker_rss_mb = max_worker_rss_mb
+        self._mp_context = multiprocessing.get_context("spawn")
+        self._processes = {}  # worker name -> _ProcessWorker
+        self.recycled = 0
+
+    def _get_process(self):
+        """Возвращает живой процесс текущего потока пула, создавая при необходимости"""
+        worker_name = threading.current_thread().name
+        worker = self._processes.get(worker_name)
+        if worker is None or not worker.is_alive():
+            worker = _ProcessWorker(self._mp_context)
+            self._processes[worker_name] = worker
+        return worker_name, worker
+
+    def _recycle(self, worker_name, reason):
+        """Останавливает процесс воркера, следующий запуск создаст новый"""
+        worker = self._processes.pop(worker_name, None)
+        if worker is None:
+            return
+        logger.info(f"♻️ Перезапуск процесса-воркера {worker_name}: {reason}")
+        worker.stop()
+        self.recycled += 1
+
+    def execute(self, job: DagJob):
+        """Выполняет DAG в процессе-воркере и переносит результат в родительский DAG"""
+        worker_name, worker = self._get_process()
+        job.worker_pid = worker.process.pid
+        worker.conn.send(
+            (
+                "run",
+                {
+                    "dag_id": job.dag_id,
+                    "file_path": job.file_path,
+                    "attr_name": job.attr_name,
+                    "last_run": job.dag.last_run,
+                    "next_run": job.dag.next_run,
+                    "scheduled_for": job.scheduled_for,
+                    "profile_memory": job.profile_memory,
+                    "dag_run": job.dag_run,
+                    "conf": job.conf,
+                },
+            )
+        )
+
+        # Таймауты задач и DAG воркер соблюдает сам; если он не уложился
+        # с запасом на мягкую отмену, процесс убивается
+        slack = job.dag.CANCEL_GRACE + self.KILL_SLACK
+        kill_deadline = None
+        if job.dag.dagrun_timeout:
+            remaining = job.dag.dagrun_timeout
+            if job.dag_run is not None and job.dag_run.deadline is not None:
+                # Продолжение отложенного запуска: таймаут идет от первого старта
+                remaining = job.dag_run.deadline - time.time()
+            kill_deadline = time.monotonic() + remaining + slack
+        task_deadlines = {}  # task_id -> (когда убить процесс, таймаут задачи)
+
+        try:
+            while True:
+                if worker.conn.poll(1.0):
+                    kind, payload = worker.conn.recv()
+                    if kind == "log":
+                        pg_logger.handler.emit(payload)
+                    elif kind == "pool":
+                        self._handle_pool_request(worker, worker_name, payload)
+                    elif kind == "task":
+                        event, task_id, timeout = payload
+                        if event == "started" and timeout:
+                            task_deadlines[task_id] = (
+                                time.monotonic() + timeout + slack,
+                                timeout,
+                            )
+                        else:
+                            task_deadlines.pop(task_id, None)
+                    elif kind == "result":
+                        break
+                reason = self._kill_reason(job, kill_deadline, task_deadlines)
+                if reason:
+                    self._kill(worker_name, job, reason)
+        except TimeoutError:
+            # Процесс убит по таймауту (TimeoutError - подкласс OSError)
+            raise
+        except (EOFError, OSError) as e:
+            self._recycle(worker_name, "процесс завершился аварийно")
+            raise RuntimeError(
+                f"Процесс-воркер упал при выполнении DAG {job.dag_id}"
+            ) from e
+        finally:
+            # Слоты пулов, не возвращенные процессом (убит, упал), освобождаются
+            pools = get_pools()
+            if pools is not None:
+                pools.release_owner(worker_name)
+
+        worker.runs += 1
+        worker.rss_mb = payload["rss_mb"]
+        job.dag.last_run = payload["last_run"]
+        job.memory_report = payload["memory_report"]
+
+        result = payload["result"]
+        if result is not None and result.abandoned_tasks:
+            # В процессе остались брошенные потоки зависших задач
+            self._recycle(worker_name, "зависшие задачи после таймаута")
+        elif worker.runs >= self.max_runs_per_worker:
+            self._recycle(worker_name, f"выполнено {worker.runs} запусков")
+        elif worker.rss_mb > self.max_worker_rss_mb:
+            self._recycle(worker_name, f"RSS {worker.rss_mb:.0f} MB")
+
+        if payload["error"]:
+            raise RuntimeError(payload["error"])
+        return payload["result"]
+
+    def _handle_pool_request(self, worker, worker_name, request):
+        """Занимает или освобождает слоты пула по запросу процесса-воркера"""
+        op, name, slots = request
+        pools = get_pools()
+        if op == "acquire":
+            acquired = None
+            if pools is not None:
+                acquired = pools.try_acquire(name, slots, owner=worker_name)
+            worker.conn.send(acquired)
+        elif pools is not None:
+            pools.release(name, slots, owner=worker_name)
+
+    @staticmethod
+    def _kill_reason(job: DagJob, kill_deadline, task_deadlines):
+        """Почему процесс-воркер пора убить (None - пусть работает)"""
+        if job.cancel_token.cancelled:
+            return job.cancel_token.reason
+        now = time.monotonic()
+        if kill_deadline and now >= kill_deadline:
+            return f"превышен таймаут DAG {job.dag.dagrun_timeout}с"
+        for task_id, (deadline, timeout) in task_deadlines.items():
+            if now >= deadline:
+                return f"задача {task_id} не завершилась за таймаут {timeout}с"
+        return None
+
+    def _kill(self, worker_name, job, reason):
+        """Принудительно завершает процесс-воркер, выполняющий DAG"""
+        worker = self._processes.pop(worker_name, None)
+        if worker is not None:
+            logger.error(
+                f"💀 Процесс-воркер DAG {job.dag_id} убит: {reason}", dag=job.dag_id
+            )
+            worker.process.kill()
+            worker.process.join(5)
+            worker.conn.close()
+            self.recycled += 1
+        raise TimeoutError(f"DAG {job.dag_id} прерван: {reason}")
+
+    def _worker_loop(self):
+        """Цикл потока пула; при выходе останавливает свой процесс"""
+        try:
+            super()._worker_loop()
+        finally:
+            self._recycle(threading.current_thread().name, "остановка пула")
+
+    def get_stats(self):
+        """Статистика пула и процессов-воркеров"""
+        stats = super().get_stats()
+        stats["recycled"] = self.recycled
+        stats["processes"] = {
+            name: {
+                "pid": worker.process.pid,
+                "runs": worker.runs,
+                "rss_mb": round(worker.rss_mb, 1),
+            }
+            for name, worker in list(self._processes.items())
+        }
+        return stats
@@ -0,0 +1,89 @@
+import threading
+import tracemalloc
+
+_lock = threading.Lock()
+_active = 0  # Сколько профилируемых запусков сейчас выполняется в процессе
+
+
+def _start_tracing(frames):
+    global _active
+    with _lock:
+        if _active == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _active += 1
+
+
+def _stop_tracing():
+    global _active
+    with _lock:
+        _active -= 1
+        if _active == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _filter(snapshot):
+    """Убирает из снимка аллокации самого tracemalloc и импорта модулей"""
+    return snapshot.filter_traces(
+        (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        )
+    )
+
+
+def profile_allocations(func, top=15, frames=1):
+    """Выполняет func() с tracemalloc и возвращает (результат, отчет)
+
+    Отчет: разница снимков до и после запуска, сгруппированная по строкам кода,
+    и пик отслеживаемой памяти. tracemalloc включается только на время запуска.
+    Если параллельно профилируются другие DAG в этом же процессе, их аллокации
+    тоже попадут в разницу.
+    """
+    _start_tracing(frames)
+    try:
+        tracemalloc.reset_peak()
+        before = _filter(tracemalloc.take_snapshot())
+        error = None
+        result = None
+        try:
+            result = func()
+        except Exception as e:
+            error = e
+        after = _filter(tracemalloc.take_snapshot())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        _stop_tracing()
+
+    stats = after.compare_to(before, "lineno")
+    report = {
+        "retained_kb": round(sum(stat.size_diff for stat in stats) / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": [
+            {
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_diff_kb": round(stat.size_diff / 1024, 1),
+                "count_diff": stat.count_diff,
+                "size_kb": round(stat.size / 1024, 1),
+            }
+            for stat in stats[:top]
+            if stat.size_diff
+        ],
+    }
+    if error is not None:
+        error.memory_report = report
+        raise error
+    return result, report
+
+
+def format_report(report, limit=5):
+    """Короткое текстовое представление отчета для лога"""
+    lines = [
+        f"удержано {report['retained_kb']:.0f} KB, пик {report['peak_kb']:.0f} KB"
+    ]
+    for site in report["top"][:limit]:
+        lines.append(
+            f"  {site['size_diff_kb']:+.1f} KB ({site['count_diff']:+d}) "
+            f"{site['location']}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,147 @@
+import pickle
+import threading
+from multiprocessing import shared_memory
+
+from src.config import logger
+
+# Сегменты, которые не удалось закрыть: на них еще ссылались массивы
+_lingering = []
+_lingering_lock = threading.Lock()
+
+
+class TaskResults:
+    """Результаты задач одного запуска DAG (аналог XCom)
+
+    Задача получает результат предшествующей задачи параметром с ее именем.
+    Внутри процесса значения передаются по ссылке, без копирования. Когда
+    запуск переходит в другой процесс (отложенный запуск продолжает другой
+    процесс-воркер), значения сериализуются pickle protocol 5: буферы
+    NumPy/Arrow/pandas кладутся в shared memory, и в получателе массивы
+    ссылаются прямо на нее.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        # task_id -> (pickle без буферов, имя сегмента или None, [(смещение, длина)])
+        self._exported = {}
+        self._segments = {}  # Открытые в этом процессе сегменты shared memory
+
+    def put(self, task_id, value):
+        with self._lock:
+            self._values[task_id] = value
+
+    def __contains__(self, task_id):
+        return task_id in self._values or task_id in self._exported
+
+    def get(self, task_id, default=None):
+        """Результат задачи; из shared memory значение читается без копирования"""
+        with self._lock:
+            if task_id in self._values:
+                return self._values[task_id]
+            if task_id not in self._exported:
+                return default
+            value = self._load(*self._exported[task_id])
+            self._values[task_id] = value
+            return value
+
+    def inputs_for(self, task):
+        """Аргументы задачи: результаты задач, чьи имена совпадают с ее параметрами"""
+        return {name: self.get(name) for name in task.input_names if name in self}
+
+    def _load(self, data, segment_name, spans):
+        if segment_name is None:
+            return pickle.loads(data)
+        segment = self._segments.get(segment_name)
+        if segment is None:
+            segment = shared_memory.SharedMemory(name=segment_name)
+            self._segments[segment_name] = segment
+        buffers = [segment.buf[offset : offset + size] for offset, size in spans]
+        return pickle.loads(data, buffers=buffers)
+
+    def _export(self, value):
+        """Сериализует значение; крупные буферы копируются в shared memory один раз"""
+        buffers = []
+        data = pickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        if not buffers:
+            return data, None, []
+        raws = [buffer.raw() for buffer in buffers]
+        segment = shared_memory.SharedMemory(
+            create=True, size=max(sum(raw.nbytes for raw in raws), 1)
+        )
+        spans = []
+        offset = 0
+        for raw in raws:
+            segment.buf[offset : offset + raw.nbytes] = raw
+            spans.append((offset, raw.nbytes))
+            offset += raw.nbytes
+        # Сегмент живет до close() запуска, отображение в этом процессе не нужно
+        segment.close()
+        return data, segment.name, spans
+
+    def __getstate__(self):
+        with self._lock:
+            for task_id, value in self._values.items():
+                if task_id in self._exported:
+                    continue
+                try:
+                    self._exported[task_id] = self._export(value)
+                except Exception as e:
+                    logger.warning(
+                        f"⚠️ Результат задачи {task_id} не передается в другой "
+                        f"процесс: {type(e).__name__}: {e}"
+                    )
+            return {"exported": dict(self._exported)}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._exported = state["exported"]
+
+    def close(self):
+        """Освобождает результаты и удаляет сегменты shared memory запуска"""
+        with self._lock:
+            # Сначала отпускаем значения: массивы держат отображение сегментов
+            self._values.clear()
+            names = {entry[1] for entry in self._exported.values() if entry[1]}
+            self._exported.clear()
+            for name in names:
+                segment = self._segments.get(name)
+                try:
+                    if segment is None:
+                        segment = shared_memory.SharedMemory(name=name)
+                        self._segments[name] = segment
+                    segment.unlink()
+                except FileNotFoundError:
+                    # Сегмент уже удалил процесс, завершивший запуск
+                    pass
+            with _lingering_lock:
+                _lingering.extend(self._segments.values())
+            self._segments.clear()
+        _close_segments()
+
+
+def describe(value):
+    """Тип и размер результата для лога: содержимое (DataFrame) не печатается"""
+    name = type(value).__name__
+    if isinstance(value, (bool, int, float)):
+        return f"{name} {value}"
+    if isinstance(value, str):
+        return f"{name}, символов: {len(value)}"
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple):
+        return f"{name} {'x'.join(str(size) for size in shape)}"
+    try:
+        return f"{name}, элементов: {len(value)}"
+    except TypeError:
+        return name
+
+
+def _close_segments():
+    """Закрывает отображения сегментов, на которые больше не ссылаются массивы"""
+    with _lingering_lock:
+        for segment in list(_lingering):
+            try:
+                segment.close()
+            except BufferError:
+                continue
+            _lingering.remove(segment)
@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import time
+
+
+class RunQueue:
+    """Очередь запусков DAG с приоритетом и старением
+
+    Эффективный приоритет задания растет со временем ожидания:
+    priority + aging_rate * ожидание (в секундах). Все задания стареют
+    с одной скоростью, поэтому порядок задается статическим ключом
+    aging_rate * enqueued_at - priority и кучу не нужно пересортировывать.
+    Низкоприоритетный DAG обгонит более важный, если ждет дольше на
+    (разница приоритетов / aging_rate) секунд.
+    """
+
+    def __init__(self, aging_rate=1 / 60):
+        self.aging_rate = aging_rate  # Единиц приоритета за секунду ожидания
+        self._heap = []  # [sort_key, seq, job]
+        self._index = {}  # job.queue_key -> запись в куче
+        self._counter = itertools.count()
+        self._wait_stats = {}  # dag_id -> статистика ожидания в очереди
+
+    def _sort_key(self, job):
+        return self.aging_rate * job.enqueued_at - job.dag.priority
+
+    def push(self, job):
+        """Добавляет задание; False, если такое задание DAG уже в очереди"""
+        if job.queue_key in self._index:
+            return False
+        entry = [self._sort_key(job), next(self._counter), job]
+        self._index[job.queue_key] = entry
+        heapq.heappush(self._heap, entry)
+        return True
+
+    def pop_eligible(self, try_start):
+        """Отдает задания в порядке приоритета в try_start(job)
+
+        Задания, для которых try_start вернул False (нет слота в их бэкенде,
+        DAG уже выполняется), остаются в очереди. Возвращает запущенные задания.
+        """
+        started = []
+        waiting = []
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            job = entry[2]
+            if try_start(job):
+                del self._index[job.queue_key]
+                self._record_wait(job)
+                started.append(job)
+            else:
+                waiting.append(entry)
+        for entry in waiting:
+            heapq.heappush(self._heap, entry)
+        return started
+
+    def _record_wait(self, job):
+        """Учитывает, сколько задание простояло в очереди"""
+        waited = time.monotonic() - job.enqueued_at
+        stats = self._wait_stats.setdefault(
+            job.dag_id, {"dequeued": 0, "total_wait": 0.0, "max_wait": 0.0}
+        )
+        stats["dequeued"] += 1
+        stats["total_wait"] += waited
+        stats["max_wait"] = max(stats["max_wait"], waited)
+
+    def effective_priority(self, job, now=None):
+        """Приоритет задания с учетом времени ожидания"""
+        waited = (now or time.monotonic()) - job.enqueued_at
+        return job.dag.priority + self.aging_rate * waited
+
+    def jobs(self):
+        """Задания в порядке запуска"""
+        return [entry[2] for entry in sorted(self._heap)]
+
+    def clear(self):
+        self._heap.clear()
+        self._index.clear()
+
+    def get_wait_stats(self):
+        """Статистика ожидания в очереди по DAG (текущие и завершенные ожидания)"""
+        now = time.monotonic()
+        result = {}
+        for dag_id, stats in self._wait_stats.items():
+            result[dag_id] = {
+                "dequeued": stats["dequeued"],
+                "avg_wait": round(stats["total_wait"] / stats["dequeued"], 3),
+                "max_wait": round(stats["max_wait"], 3),
+            }
+        for entry in self._index.values():
+            job = entry[2]
+            stats = result.setdefault(job.dag_id, {"dequeued": 0})
+            stats["waiting_for"] = round(now - job.enqueued_at, 3)
+            stats["effective_priority"] = round(self.effective_priority(job, now), 3)
+        return result
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, queue_key):
+        return queue_key in self._index
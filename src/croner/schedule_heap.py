@@ -0,0 +1,101 @@
+import heapq
+import itertools
+import threading
+
+from . import clock
+
+
+class ScheduleHeap:
+    """Min-heap DAG, упорядоченный по времени следующего запуска"""
+
+    def __init__(self):
+        self._heap = []  # [due_ts, seq, key, valid]
+        self._entries = {}  # key -> запись в куче
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def push(self, key, due_ts):
+        """Добавляет или переносит ключ на новое время (epoch-секунды)"""
+        with self._condition:
+            self._invalidate(key)
+            if due_ts is None:
+                self._condition.notify_all()
+                return
+            entry = [due_ts, next(self._counter), key, True]
+            self._entries[key] = entry
+            heapq.heappush(self._heap, entry)
+            # Будим планировщик, если новая запись стала ближайшей
+            if self._heap[0] is entry:
+                self._condition.notify_all()
+
+    def remove(self, key):
+        """Удаляет ключ из расписания"""
+        with self._condition:
+            if self._invalidate(key):
+                self._condition.notify_all()
+
+    def _invalidate(self, key):
+        """Помечает запись удаленной (ленивое удаление из кучи)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        entry[3] = False
+        return True
+
+    def _drop_invalid(self):
+        """Выбрасывает удаленные записи с вершины кучи"""
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now_ts):
+        """Извлекает все ключи, время которых наступило"""
+        due = []
+        with self._condition:
+            self._drop_invalid()
+            while self._heap and self._heap[0][0] <= now_ts:
+                entry = heapq.heappop(self._heap)
+                del self._entries[entry[2]]
+                due.append(entry[2])
+                self._drop_invalid()
+        return due
+
+    def peek_time(self):
+        """Возвращает ближайшее время запуска или None"""
+        with self._condition:
+            self._drop_invalid()
+            return self._heap[0][0] if self._heap else None
+
+    def get_due_time(self, key):
+        """Возвращает запланированное время для ключа"""
+        with self._condition:
+            entry = self._entries.get(key)
+            return entry[0] if entry else None
+
+    def wait(self, max_timeout=None):
+        """Спит до ближайшего дедлайна, max_timeout или изменения расписания"""
+        with self._condition:
+            self._drop_invalid()
+            timeout = max_timeout
+            if self._heap:
+                until_due = max(self._heap[0][0] - clock.time_ts(), 0)
+                timeout = until_due if timeout is None else min(timeout, until_due)
+            if timeout is None or timeout > 0:
+                self._condition.wait(timeout)
+
+    def wake(self):
+        """Принудительно будит ожидающий планировщик"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def clear(self):
+        """Очищает расписание"""
+        with self._condition:
+            self._heap.clear()
+            self._entries.clear()
+            self._condition.notify_all()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
@@ -0,0 +1,223 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from src.config import config, logger
+
+from . import watcher
+
+# Сетевые ФС: inotify не видит изменений, сделанных на других машинах
+NETWORK_FILESYSTEMS = {"cifs", "smb3", "smbfs", "nfs", "nfs4", "fuse.sshfs", "9p"}
+
+
+def is_network_mount(path):
+    """Лежит ли папка на сетевой ФС (по /proc/mounts; вне Linux - False)"""
+    try:
+        with open("/proc/mounts", encoding="utf-8") as mounts:
+            entries = [line.split()[1:3] for line in mounts if line.strip()]
+    except OSError:
+        return False
+    real_path = os.path.realpath(path)
+    best_point, best_type = "", None
+    for mount_point, fs_type in entries:
+        mount_point = mount_point.replace("\\040", " ")
+        inside = real_path == mount_point or real_path.startswith(
+            mount_point.rstrip("/") + "/"
+        )
+        if inside and len(mount_point) > len(best_point):
+            best_point, best_type = mount_point, fs_type
+    return best_type in NETWORK_FILESYSTEMS
+
+
+class FileSensor:
+    """Датчик появления файлов: запускает DAG, когда новые файлы перестали меняться
+
+    Использование: DAG("add_sales_dag", sensor=FileSensor(config_dir="sales",
+    pattern="*.xlsx")). Папка задается путем (path) или именем папки из
+    конфига (config_dir="sales" -> config.dir_config.get_sales_dir()): второй
+    вариант вычисляется по AST, и файл DAG не импортируется планировщиком.
+    Файл считается пришедшим, если его размер и mtime не менялись
+    settle_seconds секунд. Запуск получает список файлов в dag_run.conf
+    (задача с параметром conf: conf["files"]). Папки на сетевых ФС (samba,
+    NFS) опрашиваются раз в poll_interval секунд, остальные - через inotify.
+
+    Обработанные файлы (размер и mtime на момент запуска) планировщик
+    сохраняет в хранилище состояния после успешного запуска DAG и передает
+    в start(): после рестарта, перезагрузки DAG или смены лидера датчик не
+    запускает DAG по ним повторно, пока файл не изменится. Без хранилища
+    состояния (CRONER_STATE_BACKEND=none) уже лежащие в папке файлы
+    передаются в DAG при каждом старте.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        pattern="*",
+        settle_seconds=10,
+        poll_interval=30,
+        use_inotify=None,
+        include_existing=True,
+        config_dir=None,
+    ):
+        if (path is None) == (config_dir is None):
+            raise ValueError("FileSensor: укажите либо path, либо config_dir")
+        if config_dir is not None:
+            path = getattr(config.dir_config, f"get_{config_dir}_dir")()
+        self.path = Path(path)
+        self.config_dir = config_dir
+        self.pattern = pattern
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        # None - определить по типу ФС папки
+        self.use_inotify = use_inotify
+        # Файлы, уже лежащие в папке при старте, тоже передаются в DAG
+        # (они могли прийти, пока планировщик был остановлен)
+        self.include_existing = include_existing
+
+        self._lock = threading.Lock()
+        self._pending = {}  # путь -> (размер, mtime_ns, когда менялся)
+        self._processed = {}  # путь -> (размер, mtime_ns) на момент запуска DAG
+        self._on_files = None
+        self._watcher = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self.triggered_runs = 0
+        self.last_files = []
+
+    def start(self, on_files, name="sensor", processed=None):
+        """Запускает наблюдение; on_files(files) -> True, если запуск DAG принят
+
+        processed - уже обработанные файлы {путь: (размер, mtime_ns)}: пока
+        файл не изменился, DAG по нему не запускается.
+        """
+        self._on_files = on_files
+        with self._lock:
+            self._processed = dict(processed or {})
+        self._stop_event.clear()
+        use_inotify = self.use_inotify
+        if use_inotify is None:
+            use_inotify = not is_network_mount(self.path)
+        self._watcher = watcher.create_watcher(
+            self.path,
+            self._on_event,
+            pattern=self.pattern,
+            poll_interval=self.poll_interval,
+            use_inotify=use_inotify,
+        )
+        if self.include_existing:
+            for path in self.path.glob(self.pattern):
+                if path.is_file():
+                    self._touch(path)
+        self._watcher.start()
+        self._thread = threading.Thread(
+            target=self._run, name=f"{name}-{self.path.name}", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"📂 Датчик файлов {self.path}/{self.pattern}: "
+            f"{type(self._watcher).__name__}, файл готов через "
+            f"{self.settle_seconds}с без изменений"
+        )
+
+    def stop(self):
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _on_event(self, kind, path):
+        if kind == watcher.RESCAN:
+            for existing in self.path.glob(self.pattern):
+                if existing.is_file():
+                    self._touch(existing)
+        elif kind == watcher.DELETED:
+            with self._lock:
+                self._pending.pop(str(path), None)
+        else:
+            self._touch(path)
+
+    def _touch(self, path):
+        """Отмечает файл как изменившийся: отсчет settle_seconds начинается заново"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._processed.get(str(path)) == (stat.st_size, stat.st_mtime_ns):
+                return
+            self._pending[str(path)] = (
+                stat.st_size,
+                stat.st_mtime_ns,
+                time.monotonic(),
+            )
+
+    def settled_files(self):
+        """Файлы, не менявшиеся settle_seconds; исчезнувшие забываются"""
+        now = time.monotonic()
+        settled = []
+        with self._lock:
+            for path, (size, mtime_ns, changed_at) in list(self._pending.items()):
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    del self._pending[path]
+                    continue
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    # Файл еще дописывается (событие могло не прийти, например
+                    # при опросе сетевой папки)
+                    self._pending[path] = (stat.st_size, stat.st_mtime_ns, now)
+                elif now - changed_at >= self.settle_seconds:
+                    settled.append(path)
+        return sorted(settled)
+
+    def _run(self):
+        interval = min(max(self.settle_seconds / 2, 0.5), 5)
+        while not self._stop_event.wait(interval):
+            files = self.settled_files()
+            if not files:
+                continue
+            fired_at = time.monotonic()
+            try:
+                accepted = self._on_files(files)
+            except Exception as e:
+                logger.error(f"Ошибка запуска DAG по файлам {self.path}", e)
+                accepted = False
+            if not accepted:
+                # DAG занят: файлы дождутся следующей проверки
+                continue
+            with self._lock:
+                for path in files:
+                    # Файл, изменившийся после запуска, придет еще раз
+                    entry = self._pending.get(path)
+                    if entry is not None and entry[2] <= fired_at:
+                        del self._pending[path]
+                        self._processed[path] = entry[:2]
+            self.triggered_runs += 1
+            self.last_files = files
+
+    def processed_files(self, files):
+        """{путь: (размер, mtime_ns)} переданных в DAG файлов для хранилища"""
+        with self._lock:
+            return {
+                path: self._processed[path]
+                for path in files
+                if path in self._processed
+            }
+
+    def get_status(self):
+        with self._lock:
+            pending = len(self._pending)
+            processed = len(self._processed)
+        return {
+            "path": str(self.path),
+            "pattern": self.pattern,
+            "watcher": type(self._watcher).__name__ if self._watcher else None,
+            "pending_files": pending,
+            "processed_files": processed,
+            "triggered_runs": self.triggered_runs,
+            "last_files": list(self.last_files),
+        }
@@ -0,0 +1,434 @@
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import text
+
+from src.config import logger
+
+
+def _json_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _to_sqlite(value):
+    """datetime -> ISO-строка: стандартный адаптер datetime в sqlite3 устарел"""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    return value
+
+
+def _from_sqlite(value):
+    """ISO-строка из SQLite -> datetime (NULL остается None)"""
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _run_record(dag_id, job):
+    """Готовит запись о запуске DAG из задания бэкенда"""
+    dag_run = job.result if hasattr(job.result, "task_states") else None
+    return {
+        "dag_id": dag_id,
+        "run_time": job.scheduled_for,
+        "started_at": dag_run.started_at if dag_run else None,
+        "finished_at": dag_run.finished_at if dag_run else datetime.now(),
+        "status": job.status,
+        "success": dag_run.success_count if dag_run else 0,
+        "errors": dag_run.error_count if dag_run else 0,
+        "skipped": dag_run.skipped_count if dag_run else 0,
+        "duration": job.run_time,
+        "details": json.dumps(
+            {
+                "tasks": dag_run.task_states if dag_run else {},
+                "task_errors": dag_run.task_errors if dag_run else {},
+                "error": str(job.error) if job.error else None,
+                "timed_out_tasks": dag_run.timed_out_tasks if dag_run else [],
+                "tries": dag_run.task_tries if dag_run else {},
+                "memory_profile": job.memory_report,
+            },
+            default=_json_default,
+            ensure_ascii=False,
+        ),
+    }
+
+
+def require_tables(connection, schema, tables):
+    """Проверяет, что таблицы планировщика созданы; иначе RuntimeError с подсказкой
+
+    DDL в рабочей базе выполняется только при CRONER_STATE_CREATE_SCHEMA,
+    обычно таблицы заводят заранее скриптом src/sql/croner_state.sql.
+    """
+    missing = [
+        table
+        for table in tables
+        if connection.execute(
+            text("SELECT to_regclass(:name)"), {"name": f"{schema}.{table}"}
+        ).scalar()
+        is None
+    ]
+    if missing:
+        raise RuntimeError(
+            f"нет таблиц {', '.join(missing)} в схеме {schema}: "
+            f"примените src/sql/croner_state.sql "
+            f"или включите CRONER_STATE_CREATE_SCHEMA"
+        )
+
+
+class StateStore:
+    """Хранилище состояния DAG (по умолчанию ничего не сохраняет)"""
+
+    def get_status(self):
+        """ok, off или ошибка последнего обращения к хранилищу"""
+        return "off"
+
+    def load_all(self):
+        """Возвращает {dag_id: {"last_run": ..., "next_run": ...}}"""
+        return {}
+
+    def save_state(self, dag_id, last_run, next_run):
+        """Сохраняет время последнего и следующего запуска DAG"""
+
+    def record_run(self, dag_id, job):
+        """Сохраняет историю запуска DAG"""
+
+    def load_sensor_files(self, dag_id):
+        """Файлы, обработанные DAG по датчику: {путь: (размер, mtime_ns)}"""
+        return {}
+
+    def save_sensor_files(self, dag_id, files):
+        """Запоминает обработанные файлы {путь: (размер, mtime_ns)}"""
+
+    def forget_sensor_files(self, dag_id, paths):
+        """Забывает файлы, которых больше нет в папке датчика"""
+
+
+class SqliteStateStore(StateStore):
+    """Состояние DAG в локальном файле SQLite
+
+    Время хранится ISO-строками (тот же формат, что писал стандартный адаптер
+    sqlite3): пишется через _to_sqlite, читается через _from_sqlite.
+    """
+
+    def get_status(self):
+        return "ok"
+
+    def __init__(self, path="croner_state.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dag_state (
+                    dag_id TEXT PRIMARY KEY,
+                    last_run TIMESTAMP,
+                    next_run TIMESTAMP,
+                    updated_at TIMESTAMP
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dag_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    dag_id TEXT NOT NULL,
+                    run_time TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    status TEXT,
+                    success INTEGER,
+                    errors INTEGER,
+                    skipped INTEGER,
+                    duration REAL,
+                    details TEXT
+                )
+                """
+            )
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sensor_files (
+                    dag_id TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    size INTEGER,
+                    mtime_ns INTEGER,
+                    processed_at TIMESTAMP,
+                    PRIMARY KEY (dag_id, path)
+                )
+                """
+            )
+
+    def load_all(self):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT dag_id, last_run, next_run FROM dag_state"
+            ).fetchall()
+        return {
+            dag_id: {
+                "last_run": _from_sqlite(last_run),
+                "next_run": _from_sqlite(next_run),
+            }
+            for dag_id, last_run, next_run in rows
+        }
+
+    def save_state(self, dag_id, last_run, next_run):
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO dag_state (dag_id, last_run, next_run, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (dag_id) DO UPDATE SET
+                    last_run = excluded.last_run,
+                    next_run = excluded.next_run,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    dag_id,
+                    _to_sqlite(last_run),
+                    _to_sqlite(next_run),
+                    _to_sqlite(datetime.now()),
+                ),
+            )
+
+    def record_run(self, dag_id, job):
+        record = {
+            key: _to_sqlite(value) for key, value in _run_record(dag_id, job).items()
+        }
+        with self._lock, self._conn:
+            self._conn.execute(
+                """
+                INSERT INTO dag_runs (dag_id, run_time, started_at, finished_at,
+                    status, success, errors, skipped, duration, details)
+                VALUES (:dag_id, :run_time, :started_at, :finished_at,
+                    :status, :success, :errors, :skipped, :duration, :details)
+                """,
+                record,
+            )
+
+    def load_sensor_files(self, dag_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, size, mtime_ns FROM sensor_files WHERE dag_id = ?",
+                (dag_id,),
+            ).fetchall()
+        return {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+
+    def save_sensor_files(self, dag_id, files):
+        now = _to_sqlite(datetime.now())
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """
+                INSERT INTO sensor_files (dag_id, path, size, mtime_ns, processed_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (dag_id, path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    processed_at = excluded.processed_at
+                """,
+                [
+                    (dag_id, path, size, mtime_ns, now)
+                    for path, (size, mtime_ns) in files.items()
+                ],
+            )
+
+    def forget_sensor_files(self, dag_id, paths):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM sensor_files WHERE dag_id = ? AND path = ?",
+                [(dag_id, path) for path in paths],
+            )
+
+
+class PostgresStateStore(StateStore):
+    """Состояние DAG в таблицах Postgres (схема croner)
+
+    Подключение ленивое: если база недоступна при старте контейнера,
+    хранилище пробует снова при каждом обращении, а не отключается до
+    рестарта. Таблицы создаются только при create_schema
+    (CRONER_STATE_CREATE_SCHEMA); иначе их заводят заранее скриптом
+    src/sql/croner_state.sql.
+    """
+
+    TABLES = ("dag_state", "dag_runs", "sensor_files")
+
+    def __init__(self, engine, schema="croner", create_schema=False):
+        self.engine = engine
+        self.schema = schema
+        self.create_schema = create_schema
+        self.error = None  # Ошибка последнего обращения (None - все в порядке)
+        self._ready = False
+        self._ready_lock = threading.Lock()
+
+    def get_status(self):
+        return "ok" if self.error is None else f"error: {self.error}"
+
+    @contextmanager
+    def _begin(self):
+        """Транзакция; при первом успешном подключении проверяет таблицы"""
+        try:
+            with self.engine.begin() as connection:
+                if not self._ready:
+                    with self._ready_lock:
+                        if not self._ready:
+                            self._prepare(connection)
+                            self._ready = True
+                yield connection
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}".splitlines()[0]
+            raise
+        self.error = None
+
+    def _prepare(self, connection):
+        if not self.create_schema:
+            require_tables(connection, self.schema, self.TABLES)
+            return
+        schema = self.schema
+        connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+        connection.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS {schema}.dag_state (
+                    dag_id VARCHAR(255) PRIMARY KEY,
+                    last_run TIMESTAMP,
+                    next_run TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                """
+            )
+        )
+        connection.execute(
+            text(
+                f"""
+                CREATE TABLE IF NOT EXISTS {schema}.dag_runs (
+                    id SERIAL PRIMARY KEY,
+                    dag_id VARCHAR(255) NOT NULL,
+                    run_time TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    status VARCHAR(20),
+                    success INTEGER,
+                    errors INTEGER,
+                    skipped INTEGER,
+                    duration DOUBLE PRECISION,
+                    details JSONB
+                );
+                CREATE INDEX IF NOT EXISTS idx_dag_runs_dag_id
+                    ON {schema}.dag_runs (dag_id, run_time);
+                CREATE TABLE IF NOT EXISTS {schema}.sensor_files (
+                    dag_id VARCHAR(255) NOT NULL,
+                    path TEXT NOT NULL,
+                    size BIGINT,
+                    mtime_ns BIGINT,
+                    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (dag_id, path)
+                );
+                """
+            )
+        )
+
+    def load_all(self):
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(f"SELECT dag_id, last_run, next_run FROM {self.schema}.dag_state")
+            )
+            return {
+                row.dag_id: {"last_run": row.last_run, "next_run": row.next_run}
+                for row in rows
+            }
+
+    def save_state(self, dag_id, last_run, next_run):
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"""
+                    INSERT INTO {self.schema}.dag_state (dag_id, last_run, next_run, updated_at)
+                    VALUES (:dag_id, :last_run, :next_run, CURRENT_TIMESTAMP)
+                    ON CONFLICT (dag_id) DO UPDATE SET
+                        last_run = EXCLUDED.last_run,
+                        next_run = EXCLUDED.next_run,
+                        updated_at = EXCLUDED.updated_at
+                    """
+                ),
+                {"dag_id": dag_id, "last_run": last_run, "next_run": next_run},
+            )
+
+    def record_run(self, dag_id, job):
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"""
+                    INSERT INTO {self.schema}.dag_runs (dag_id, run_time, started_at,
+                        finished_at, status, success, errors, skipped, duration, details)
+                    VALUES (:dag_id, :run_time, :started_at, :finished_at, :status,
+                        :success, :errors, :skipped, :duration, CAST(:details AS JSONB))
+                    """
+                ),
+                _run_record(dag_id, job),
+            )
+
+    def load_sensor_files(self, dag_id):
+        with self._begin() as connection:
+            rows = connection.execute(
+                text(
+                    f"SELECT path, size, mtime_ns FROM {self.schema}.sensor_files "
+                    f"WHERE dag_id = :dag_id"
+                ),
+                {"dag_id": dag_id},
+            )
+            return {row.path: (row.size, row.mtime_ns) for row in rows}
+
+    def save_sensor_files(self, dag_id, files):
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"""
+                    INSERT INTO {self.schema}.sensor_files (dag_id, path, size,
+                        mtime_ns, processed_at)
+                    VALUES (:dag_id, :path, :size, :mtime_ns, CURRENT_TIMESTAMP)
+                    ON CONFLICT (dag_id, path) DO UPDATE SET
+                        size = EXCLUDED.size,
+                        mtime_ns = EXCLUDED.mtime_ns,
+                        processed_at = EXCLUDED.processed_at
+                    """
+                ),
+                [
+                    {"dag_id": dag_id, "path": path, "size": size, "mtime_ns": mtime_ns}
+                    for path, (size, mtime_ns) in files.items()
+                ],
+            )
+
+    def forget_sensor_files(self, dag_id, paths):
+        with self._begin() as connection:
+            connection.execute(
+                text(
+                    f"DELETE FROM {self.schema}.sensor_files "
+                    f"WHERE dag_id = :dag_id AND path = :path"
+                ),
+                [{"dag_id": dag_id, "path": path} for path in paths],
+            )
+
+
+def create_state_store(
+    backend, sqlite_path="croner_state.db", engine_factory=None, create_schema=False
+):
+    """Создает хранилище состояния по имени бэкенда: postgres, sqlite или none"""
+    try:
+        if backend == "postgres":
+            # Postgres подключается при первом обращении: его недоступность
+            # при старте не отключает хранилище навсегда
+            return PostgresStateStore(engine_factory(), create_schema=create_schema)
+        if backend == "sqlite":
+            return SqliteStateStore(sqlite_path)
+    except Exception as e:
+        logger.error(
+            f"❌ Не удалось подключить хранилище состояния DAG ({backend}), "
+            f"состояние не будет сохраняться",
+            e,
+        )
+        return StateStore()
+
+    if backend not in ("none", "", None):
+        logger.warning(f"Неизвестный бэкенд состояния DAG: {backend}")
+    return StateStore()
@@ -0,0 +1,125 @@
+import asyncio
+import functools
+import inspect
+import random
+
+
+class Task:
+    """Задача DAG: функция и ее зависимости от других задач"""
+
+    def __init__(
+        self,
+        func,
+        dag,
+        task_id=None,
+        execution_timeout=None,
+        retries=0,
+        retry_delay=30,
+        backoff=2.0,
+        max_retry_delay=600,
+        retry_on=(Exception,),
+        pool=None,
+        pool_slots=1,
+    ):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.dag = dag
+        self.task_id = task_id or func.__name__
+        self.upstream_task_ids = []  # Порядок объявления важен для логов
+        self.execution_timeout = execution_timeout  # Секунды, None - без ограничения
+        # Повторы при ошибке: задержка retry_delay * backoff^(попытка-1),
+        # не больше max_retry_delay, с джиттером; только для исключений retry_on
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.backoff = backoff
+        self.max_retry_delay = max_retry_delay
+        self.retry_on = retry_on
+        # Именованный пул (CRONER_POOLS): задача стартует, когда в нем есть
+        # pool_slots свободных слотов
+        self.pool = pool
+        self.pool_slots = pool_slots
+        # async def: выполняется в общем цикле asyncio планировщика, не в потоке
+        self.is_async = inspect.iscoroutinefunction(func)
+        try:
+            parameters = inspect.signature(func).parameters
+        except (TypeError, ValueError):
+            parameters = {}
+        # Токен отмены и параметры запуска передаются только задачам, которые их ждут
+        self.accepts_cancel_token = "cancel_token" in parameters
+        self.accepts_conf = "conf" in parameters
+        # Параметры, которые можно заполнить результатами задач с теми же именами
+        self.input_names = [
+            name
+            for name, parameter in parameters.items()
+            if name not in ("cancel_token", "conf")
+            and parameter.kind
+            in (parameter.POSITIONAL_OR_KEYWORD, parameter.KEYWORD_ONLY)
+        ]
+
+    def __call__(self, *args, **kwargs):
+        if self.is_async:
+            # Вне цикла планировщика (CLI, процессы-воркеры) - свой цикл на вызов
+            return asyncio.run(self.func(*args, **kwargs))
+        return self.func(*args, **kwargs)
+
+    def should_retry(self, error, tries):
+        """Нужно ли повторить задачу после tries неудачных попыток"""
+        return tries <= self.retries and isinstance(error, self.retry_on)
+
+    def get_retry_delay(self, tries):
+        """Задержка перед повтором в секундах (экспоненциальная, с джиттером)"""
+        delay = min(
+            self.retry_delay * self.backoff ** (tries - 1), self.max_retry_delay
+        )
+        # Половина задержки случайная, чтобы повторы разных задач не шли волной
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def set_upstream(self, *others):
+        """Добавляет задачи, которые должны выполниться до этой"""
+        for other in _flatten(others):
+            task_id = other.task_id if isinstance(other, Task) else str(other)
+            if task_id == self.task_id:
+                raise ValueError(f"Задача {self.task_id} не может зависеть от себя")
+            if task_id not in self.upstream_task_ids:
+                self.upstream_task_ids.append(task_id)
+        return self
+
+    def set_downstream(self, *others):
+        """Добавляет задачи, которые должны выполниться после этой"""
+        for other in _flatten(others):
+            if not isinstance(other, Task):
+                raise TypeError(f"Ожидается задача DAG, получено: {other!r}")
+            other.set_upstream(self)
+        return self
+
+    def __rshift__(self, other):
+        """task_a >> task_b или task_a >> [task_b, task_c]"""
+        self.set_downstream(other)
+        return other
+
+    def __lshift__(self, other):
+        """task_b << task_a"""
+        self.set_upstream(other)
+        return other
+
+    def __rrshift__(self, other):
+        """[task_a, task_b] >> task_c"""
+        self.set_upstream(other)
+        return self
+
+    def __rlshift__(self, other):
+        """[task_b, task_c] << task_a"""
+        self.set_downstream(other)
+        return self
+
+    def __repr__(self):
+        return f"Task('{self.task_id}', upstream={self.upstream_task_ids})"
+
+
+def _flatten(items):
+    """Разворачивает вложенные списки/кортежи задач"""
+    for item in items:
+        if isinstance(item, (list, tuple, set)):
+            yield from _flatten(item)
+        else:
+            yield item
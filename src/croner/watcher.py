@@ -0,0 +1,226 @@
+import ctypes
+import ctypes.util
+import errno
+import fnmatch
+import os
+import select
+import struct
+import threading
+from pathlib import Path
+
+from src.config import logger
+
+# События файлов, передаваемые в callback(kind, path)
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+RESCAN = "rescan"  # События потеряны, нужно пересканировать папку целиком
+
+# Константы inotify из <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class DirectoryWatcher:
+    """Базовый наблюдатель за файлами одной папки"""
+
+    def __init__(self, path, callback, pattern="*"):
+        self.path = Path(path)
+        self.callback = callback
+        self.pattern = pattern
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def matches(self, name):
+        return fnmatch.fnmatch(name, self.pattern)
+
+    def _emit(self, kind, path):
+        try:
+            self.callback(kind, path)
+        except Exception as e:
+            logger.error(f"Ошибка обработки события {kind} для {path}", e)
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(
+            target=self._run, name=f"watcher-{self.path.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        raise NotImplementedError
+
+
+class InotifyWatcher(DirectoryWatcher):
+    """Наблюдатель на Linux inotify: реагирует на события без сканирования папки
+
+    Если папку удалили или переместили (деплой подменил каталог), watch
+    снимается, а когда папка появится снова, ставится заново и папка
+    пересканируется целиком.
+    """
+
+    MASK = (
+        IN_CLOSE_WRITE
+        | IN_MOVED_TO
+        | IN_MOVED_FROM
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+    )
+
+    def __init__(self, path, callback, pattern="*"):
+        super().__init__(path, callback, pattern)
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc не найдена, inotify недоступен")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 завершился ошибкой")
+        self._wd = None  # None - папки нет, watch не стоит
+        try:
+            self._add_watch()
+        except OSError:
+            os.close(self._fd)
+            raise
+
+    def _add_watch(self):
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(str(self.path)), ctypes.c_uint32(self.MASK)
+        )
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({self.path}): {os.strerror(err)}")
+        self._wd = wd
+
+    def _rewatch(self):
+        """Ставит watch на появившуюся снова папку; True, если удалось"""
+        if not self.path.is_dir():
+            return False
+        try:
+            self._add_watch()
+        except OSError as e:
+            logger.warning(f"Не удалось снова наблюдать за {self.path}: {e}")
+            return False
+        logger.info(f"📂 Папка {self.path} появилась снова, наблюдение возобновлено")
+        # Файлы могли появиться до того, как watch встал
+        self._emit(RESCAN, None)
+        return True
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                if self._wd is None:
+                    self._rewatch()
+                readable, _, _ = select.select([self._fd], [], [], 1.0)
+                if not readable:
+                    continue
+                try:
+                    data = os.read(self._fd, 64 * 1024)
+                except OSError as e:
+                    if e.errno == errno.EAGAIN:
+                        continue
+                    raise
+                self._dispatch(data)
+        finally:
+            os.close(self._fd)
+
+    def _dispatch(self, data):
+        """Разбирает буфер struct inotify_event и вызывает callback"""
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & IN_Q_OVERFLOW:
+                self._emit(RESCAN, None)
+                continue
+            if wd != self._wd:
+                # Хвост событий снятого watch
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                logger.warning(f"Папка {self.path} удалена или перемещена")
+                if not mask & IN_IGNORED:
+                    # Перемещенная папка продолжила бы присылать события
+                    self._libc.inotify_rm_watch(self._fd, wd)
+                self._wd = None
+                self._emit(RESCAN, None)
+                continue
+            if mask & IN_ISDIR or not name:
+                continue
+
+            file_name = os.fsdecode(name)
+            if not self.matches(file_name):
+                continue
+
+            path = self.path / file_name
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._emit(DELETED, path)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._emit(MODIFIED, path)
+
+
+class PollingWatcher(DirectoryWatcher):
+    """Резервный наблюдатель: один проход по папке за интервал, сравнение mtime"""
+
+    def __init__(self, path, callback, pattern="*", interval=10):
+        super().__init__(path, callback, pattern)
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        try:
+            with os.scandir(self.path) as entries:
+                for entry in entries:
+                    if entry.is_file() and self.matches(entry.name):
+                        snapshot[entry.path] = entry.stat().st_mtime_ns
+        except FileNotFoundError:
+            pass
+        return snapshot
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            current = self._scan()
+            for path, mtime in current.items():
+                previous = self._snapshot.get(path)
+                if previous is None:
+                    self._emit(CREATED, Path(path))
+                elif previous != mtime:
+                    self._emit(MODIFIED, Path(path))
+            for path in self._snapshot.keys() - current.keys():
+                self._emit(DELETED, Path(path))
+            self._snapshot = current
+
+
+def create_watcher(path, callback, pattern="*", poll_interval=10, use_inotify=True):
+    """Создает inotify-наблюдатель, а если он недоступен - опрашивающий"""
+    if use_inotify:
+        try:
+            return InotifyWatcher(path, callback, pattern)
+        except (OSError, AttributeError) as e:
+            logger.warning(
+                f"inotify недоступен для {path} ({e}), используем опрос "
+                f"каждые {poll_interval} секунд"
+            )
+    return PollingWatcher(path, callback, pattern, interval=poll_interval)
@@ -10,10 +10,17 @@ from sqlalchemy import MetaData, Table, create_engine
 from sqlalchemy.dialects.postgresql import insert
 
 from src.config import config, logger
-from src.croner import DAG
+from src.croner import DAG, FileSensor
 
-# cron (каждую минуту с 9 до 18 по будням)
-add_ads_dag = DAG("add_ads_dag", schedule_interval="0 */1 * * *")
+# Запуск по появлению новых файлов рекламы (папка на samba опрашивается).
+# Расписание - страховка: раз в сутки ночью DAG перечитывает всю папку, если
+# датчик пропустил файл (дубли строк отсекает хеш в колонке id)
+add_ads_dag = DAG(
+    "add_ads_dag",
+    schedule_interval="0 3 * * *",
+    executor="process",
+    sensor=FileSensor(config_dir="adds", pattern="*xlsx*"),
+)
 
 cities_mapping = {
     "source_omsk/ads": "Omsk",
@@ -35,11 +42,16 @@ def calculate_hash(row):
     return hashlib.sha256(hash_string.encode("utf-8")).hexdigest()
 
 
-@add_ads_dag.task
-def load_data():
+@add_ads_dag.task(pool="postgres_write")
+def load_data(conf):
     engine = create_engine(config.db_config.get_url())
     load_dttm = datetime.now()
-    files = [x for x in os.listdir(config.dir_config.get_adds_dir()) if "xlsx" in x]
+    # Датчик передает только новые файлы; запуск по расписанию
+    # или вручную читает всю папку
+    if conf.get("files"):
+        files = [os.path.basename(path) for path in conf["files"]]
+    else:
+        files = [x for x in os.listdir(config.dir_config.get_adds_dir()) if "xlsx" in x]
     logger.info(f"Получено {len(files)} файлов")
     for file in files:
         try:
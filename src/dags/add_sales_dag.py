@@ -9,10 +9,17 @@ from sqlalchemy import MetaData, Table, create_engine, text
 from sqlalchemy.dialects.postgresql import insert
 
 from src.config import config, logger
-from src.croner import DAG
+from src.croner import DAG, FileSensor
 
-# cron (каждую минуту с 9 до 18 по будням)
-add_sales_dag = DAG("add_sales_dag", schedule_interval="30 */1 * * *")
+# Запуск по появлению новых файлов продаж (папка на samba опрашивается).
+# Расписание - страховка: раз в сутки ночью DAG перечитывает всю папку, если
+# датчик пропустил файл (дубли строк отсекает hash_256)
+add_sales_dag = DAG(
+    "add_sales_dag",
+    schedule_interval="30 3 * * *",
+    executor="process",
+    sensor=FileSensor(config_dir="sales", pattern="*xlsx*"),
+)
 
 
 def calculate_hash(row):
@@ -22,11 +29,18 @@ def calculate_hash(row):
     return hashlib.sha256(hash_string.encode("utf-8")).hexdigest()
 
 
-@add_sales_dag.task
-def load_data():
+@add_sales_dag.task(pool="postgres_write")
+def load_data(conf):
     engine = create_engine(config.db_config.get_url())
     load_dttm = datetime.now()
-    files = [x for x in os.listdir(config.dir_config.get_sales_dir()) if "xlsx" in x]
+    # Датчик передает только новые файлы; запуск по расписанию
+    # или вручную читает всю папку
+    if conf.get("files"):
+        files = [os.path.basename(path) for path in conf["files"]]
+    else:
+        files = [
+            x for x in os.listdir(config.dir_config.get_sales_dir()) if "xlsx" in x
+        ]
     logger.info(f"Получено {len(files)} файлов")
     for file in files:
         try:
@@ -86,7 +100,7 @@ def load_data():
             logger.error("Ошибка при обработке файлов продаж", e, file=file)
 
 
-@add_sales_dag.task
+@add_sales_dag.task(pool="postgres_write")
 def call_load_offline_sales():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -101,7 +115,7 @@ def call_load_offline_sales():
         logger.error("Ошибка при выполнении процедуры dds.load_offline_sales()", e)
 
 
-@add_sales_dag.task
+@add_sales_dag.task(pool="postgres_write")
 def call_load_sales_data():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -115,7 +129,7 @@ def call_load_sales_data():
     except Exception as e:
         logger.error("Ошибка при выполнении процедуры dds.load_sales_data()", e)
 
-@add_sales_dag.task
+@add_sales_dag.task(pool="postgres_write")
 def call_load_sales_month_data():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -128,3 +142,11 @@ def call_load_sales_month_data():
 
     except Exception as e:
         logger.error("Ошибка при выполнении процедуры dds.load_sales_month_data()", e)
+
+
+# Процедуры витрин читают public.offline_sales, поэтому ждут load_offline_sales,
+# но друг от друга не зависят и выполняются параллельно
+load_data >> call_load_offline_sales >> [
+    call_load_sales_data,
+    call_load_sales_month_data,
+]
@@ -8,8 +8,9 @@ import requests
 from src.config import config
 from src.croner import DAG
 
-# cron (каждую минуту с 9 до 18 по будням)
-bot_week_dag = DAG("bot_week_dag", schedule_interval="10 12 * * 0")
+# cron: по понедельникам в 12:10
+# Короткий отчет в Telegram: при нехватке слотов запускается раньше выгрузок
+bot_week_dag = DAG("bot_week_dag", schedule_interval="10 12 * * 1", priority=10)
 
 
 # Настройки подключения к PostgreSQL
@@ -92,15 +93,8 @@ def get_sales_data():
         # Логируем количество полученных записей
         print(f"Получено {len(df)} записей из базы данных")
 
-        # Конвертируем DataFrame в список словарей с сериализуемыми значениями
-        serializable_data = []
-        for record in df.to_dict("records"):
-            serializable_record = {}
-            for key, value in record.items():
-                serializable_record[key] = convert_to_serializable(value)
-            serializable_data.append(serializable_record)
-
-        return serializable_data
+        # DataFrame передается следующей задаче без копирования
+        return df
 
     except Exception as e:
         print(f"Ошибка выполнения запроса: {e}")
@@ -110,11 +104,16 @@ def get_sales_data():
 
 
 def generate_report(data):
-    if not data:
+    if data is None or data.empty:
         return "Нет данных для формирования отчета"
 
-    # Преобразуем данные обратно в DataFrame
-    df = pd.DataFrame(data)
+    # Приводим значения к простым типам (NaN -> None, даты -> строки)
+    df = pd.DataFrame(
+        [
+            {key: convert_to_serializable(value) for key, value in record.items()}
+            for record in data.to_dict("records")
+        ]
+    )
 
     # Получаем дату из данных
     date_str = df["week_range"].iloc[0]
@@ -216,7 +215,7 @@ def generate_report(data):
 
     report_text = "\n".join(report)
 
-    # Сохраняем отчет в XCom для следующей задачи
+    # Отчет получит следующая задача (параметр report)
     return report_text
 
 
@@ -256,9 +255,16 @@ def setup_locale():
 
 
 @bot_week_dag.task
-def main():
-    # Определяем порядок выполнения задач
+def sales_data():
     setup_locale()
-    data = get_sales_data()
-    report = generate_report(data)
+    return get_sales_data()
+
+
+@bot_week_dag.task
+def report(sales_data):
+    return generate_report(sales_data)
+
+
+@bot_week_dag.task
+def send_report(report):
     send_telegram_report(report)
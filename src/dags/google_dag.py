@@ -30,7 +30,9 @@ CITY_MAPPING = {
     "Набережные Челны": "Nab_chelny",
 }
 
-google_dag = DAG("google_dag", schedule_interval="*/40 * * * *")
+google_dag = DAG(
+    "google_dag", schedule_interval="*/40 * * * *", executor="process"
+)
 
 
 def generate_id(channel, city, date_from):
@@ -261,7 +263,7 @@ def transform_data(df, channel_name):
     return transformed_data
 
 
-@google_dag.task
+@google_dag.task(pool="google_api")
 def main():
     result_df = get_google_sheet_data()
     if result_df is not None:
@@ -271,7 +273,7 @@ def main():
         logger.error("Не удалось получить или преобразовать данные")
 
 
-@google_dag.task
+@google_dag.task(pool="postgres_write")
 def call_load_offline_sales():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -28,7 +28,9 @@ CITY_MAPPING = {
     "Саратов": "Saratov",
     "Набережные Челны": "Nab_chelny",
 }
-google_month_dag = DAG("google_month_dag", schedule_interval="*/40 * * * *")
+google_month_dag = DAG(
+    "google_month_dag", schedule_interval="*/40 * * * *", executor="process"
+)
 
 
 def generate_id(channel, city, date):
@@ -269,7 +271,7 @@ def transform_data(df, channel_name):
     return transformed_data
 
 
-@google_month_dag.task
+@google_month_dag.task(pool="google_api")
 def main():
     result_df = get_google_sheet_data()
     if result_df is not None:
@@ -278,7 +280,7 @@ def main():
     else:
         print("Не удалось получить или преобразовать данные")
 
-@google_month_dag.task
+@google_month_dag.task(pool="postgres_write")
 def call_load_offline_sales():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -293,7 +295,7 @@ def call_load_offline_sales():
         logger.error("Ошибка при выполнении процедуры dds.load_prepared_budgets_month()", e)
 
 
-@google_month_dag.task
+@google_month_dag.task(pool="postgres_write")
 def call_load_offline_sales():
     """Задача для вызова SQL процедуры загрузки оффлайн продаж"""
     try:
@@ -31,9 +31,12 @@ def get_session():
     return thread_local.session
 
 
-def get_all_orders_for_event(event_id: str, headers: dict) -> List[Dict]:
+def get_all_orders_for_event(
+    event_id: str, headers: dict, cancel_token=None
+) -> List[Dict]:
     """
     Получает все заказы для события без пропусков
+    Повторы при ошибках сети прекращаются по отмене (таймаут задачи)
     """
     session = get_session()
     all_orders = []
@@ -45,6 +48,8 @@ def get_all_orders_for_event(event_id: str, headers: dict) -> List[Dict]:
     )
 
     while True:
+        if cancel_token is not None:
+            cancel_token.raise_if_cancelled()
         url = f"https://api.timepad.ru/v1/events/{event_id}/orders?skip={skip}&limit={limit}"
 
         try:
@@ -76,7 +81,11 @@ def get_all_orders_for_event(event_id: str, headers: dict) -> List[Dict]:
 
         except requests.exceptions.RequestException as e:
             print(f"Ошибка сети: {e}")
-            time.sleep(5)  # Пауза при ошибке сети
+            # Пауза при ошибке сети (прерывается отменой)
+            if cancel_token is not None:
+                cancel_token.sleep(5)
+            else:
+                time.sleep(5)
             continue
         except Exception as e:
             print(
@@ -217,7 +226,9 @@ def process_orders_simple(orders: List[Dict], event_id: str) -> List[Dict]:
     return export_data
 
 
-def process_single_event(event: Dict, headers: dict) -> Dict[str, Any]:
+def process_single_event(
+    event: Dict, headers: dict, cancel_token=None
+) -> Dict[str, Any]:
     """
     Обрабатывает одно событие и возвращает результат
     """
@@ -230,7 +241,7 @@ def process_single_event(event: Dict, headers: dict) -> Dict[str, Any]:
 
     try:
         # Получаем все заказы
-        orders = get_all_orders_for_event(event_id, headers)
+        orders = get_all_orders_for_event(event_id, headers, cancel_token)
 
         # Обрабатываем в упрощенном формате
         export_data = process_orders_simple(orders, event_id)
@@ -369,8 +380,8 @@ def get_cities_from_db():
         raise
 
 
-@dag.task
-def sync_timepad_sales():
+@dag.task(execution_timeout=2 * 60 * 60, pool="timepad_api")
+def sync_timepad_sales(cancel_token):
     """
     Основная задача DAG для синхронизации продаж с TimePad
     Обрабатывает города последовательно с интервалом 30 минут
@@ -401,7 +412,8 @@ def sync_timepad_sales():
         
         try:
             # Обрабатываем текущий город
-            result = process_single_event(event, headers)
+            cancel_token.raise_if_cancelled()
+            result = process_single_event(event, headers, cancel_token)
             results.append(result)
 
             if result["status"] == "success":
@@ -0,0 +1,74 @@
+-- Таблицы планировщика в Postgres: состояние DAG (CRONER_STATE_BACKEND=postgres),
+-- отметки запусков ведущего и очередь задач распределенного режима. Планировщик
+-- и воркеры сами их не создают, пока не включен CRONER_STATE_CREATE_SCHEMA.
+CREATE SCHEMA IF NOT EXISTS croner;
+
+CREATE TABLE IF NOT EXISTS croner.dag_state (
+    dag_id VARCHAR(255) PRIMARY KEY,
+    last_run TIMESTAMP,
+    next_run TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS croner.dag_runs (
+    id SERIAL PRIMARY KEY,
+    dag_id VARCHAR(255) NOT NULL,
+    run_time TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP,
+    status VARCHAR(20),
+    success INTEGER,
+    errors INTEGER,
+    skipped INTEGER,
+    duration DOUBLE PRECISION,
+    details JSONB
+);
+
+CREATE INDEX IF NOT EXISTS idx_dag_runs_dag_id
+    ON croner.dag_runs (dag_id, run_time);
+
+-- Файлы, уже обработанные DAG с датчиком (FileSensor)
+CREATE TABLE IF NOT EXISTS croner.sensor_files (
+    dag_id VARCHAR(255) NOT NULL,
+    path TEXT NOT NULL,
+    size BIGINT,
+    mtime_ns BIGINT,
+    processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dag_id, path)
+);
+
+-- Отметки плановых запусков при выборе ведущего (CRONER_LEADER_LOCK)
+CREATE TABLE IF NOT EXISTS croner.run_claims (
+    dag_id VARCHAR(255) NOT NULL,
+    run_time TIMESTAMP NOT NULL,
+    owner VARCHAR(255),
+    claimed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dag_id, run_time)
+);
+
+-- Очередь задач распределенного режима (CRONER_DISTRIBUTED_MODE). В payload
+-- и result лежит pickle: писать в таблицу должны только планировщик и воркеры
+CREATE TABLE IF NOT EXISTS croner.task_queue (
+    id BIGSERIAL PRIMARY KEY,
+    dag_id VARCHAR(255) NOT NULL,
+    task_id VARCHAR(255) NOT NULL,
+    run_time TIMESTAMP,
+    file_path TEXT NOT NULL,
+    attr_name VARCHAR(255) NOT NULL,
+    payload BYTEA,
+    priority INTEGER DEFAULT 0,
+    state VARCHAR(16) NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker VARCHAR(255),
+    cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+    result BYTEA,
+    error TEXT,
+    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    heartbeat_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Частичный индекс: выборка следующей задачи не читает историю
+CREATE INDEX IF NOT EXISTS task_queue_queued_idx
+    ON croner.task_queue (priority DESC, id) WHERE state = 'queued';
@@ -0,0 +1,84 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from types import SimpleNamespace
+
+# Конфиг читается при импорте src.config: без .env нужны значения по умолчанию
+for name in ("DB_HOST", "DB_NAME", "DB_USER", "DB_PASS", "DB_PORT"):
+    os.environ.setdefault(name, "localhost" if name == "DB_HOST" else "croner_test")
+os.environ.setdefault("base_flie_dir", "/tmp/croner_test")
+for name in ("API_KEY", "TG_TOKEN", "CHAT_ID", "timepad_api"):
+    os.environ.setdefault(name, "croner_test")
+
+from src.config import pg_logger  # noqa: E402
+
+# Тесты не пишут логи в Postgres: буфер не сбрасывается и не ждет базу
+pg_logger.close()
+
+import pytest  # noqa: E402
+
+from src.croner import clock  # noqa: E402
+from src.croner.admission import MemoryAdmission  # noqa: E402
+from src.croner.croner import Croner  # noqa: E402
+from src.croner.executors import WorkerPoolExecutor  # noqa: E402
+from src.croner.state_store import StateStore  # noqa: E402
+
+
+@pytest.fixture
+def make_croner(tmp_path):
+    """Планировщик без Postgres, HTTP-сервера и процессов-воркеров"""
+    created = []
+
+    def factory(**kwargs):
+        kwargs.setdefault("state_store", StateStore())
+        kwargs.setdefault("executor", WorkerPoolExecutor(max_workers=2))
+        kwargs.setdefault("process_executor", WorkerPoolExecutor(max_workers=1))
+        kwargs.setdefault("admission", MemoryAdmission(budget_mb=10**9))
+        kwargs.setdefault("metrics_port", 0)
+        croner = Croner(tmp_path / "dags", **kwargs)
+        croner.dags_folder.mkdir(exist_ok=True)
+        croner.leader = None
+        created.append(croner)
+        return croner
+
+    yield factory
+    for croner in created:
+        for dag_executor in croner.executors.values():
+            dag_executor.shutdown(timeout=5)
+        croner.async_runner.stop()
+
+
+@pytest.fixture
+def virtual_clock():
+    """Часы планировщика, которые идут только по advance()/advance_to()"""
+    virtual = clock.VirtualClock(datetime(2026, 3, 2, 10, 14))
+    previous = clock.set_clock(virtual)
+    yield virtual
+    clock.set_clock(previous)
+
+
+class RecordingEngine:
+    """Engine SQLAlchemy без базы: запоминает SQL, to_regclass видит tables"""
+
+    def __init__(self, tables=()):
+        self.tables = set(tables)
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement, params=None):
+        sql = " ".join(str(statement).split())
+        self.statements.append(sql)
+        if "to_regclass" in sql:
+            return SimpleNamespace(
+                scalar=lambda: params["name"] if params["name"] in self.tables else None
+            )
+        return SimpleNamespace(scalar=lambda: None)
+
+
+@pytest.fixture
+def recording_engine():
+    """Фабрика RecordingEngine(tables): проверка DDL без Postgres"""
+    return RecordingEngine
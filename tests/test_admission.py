@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+from src.croner.admission import MemoryAdmission
+
+
+class FakeMemory:
+    """RSS планировщика и процессов-воркеров, задаваемый тестом"""
+
+    def __init__(self, rss_mb):
+        self.rss_mb = rss_mb
+        self.pids = {}
+
+    def install(self, admission, monkeypatch):
+        monkeypatch.setattr(admission, "current_rss_mb", lambda: self.rss_mb)
+        monkeypatch.setattr(admission, "_pid_rss_mb", self.pids.get)
+        return admission
+
+
+def make_job(dag_id, worker_pid=None):
+    return SimpleNamespace(dag_id=dag_id, worker_pid=worker_pid)
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    fake = FakeMemory(rss_mb=200)
+
+    def factory(**kwargs):
+        kwargs.setdefault("budget_mb", 750)
+        kwargs.setdefault("default_peak_mb", 300)
+        return fake.install(MemoryAdmission(**kwargs), monkeypatch)
+
+    fake.admission = factory
+    return fake
+
+
+def test_refuses_when_projection_exceeds_budget(memory):
+    admission = memory.admission()
+    first = make_job("sales")
+
+    # 200 сейчас + 300 ожидаемый пик
+    assert admission.try_admit(first)
+    # 200 + 300 еще не занятых первым запуском + 300 > 750
+    assert not admission.try_admit(make_job("ads"))
+    assert admission.is_waiting("ads")
+    assert admission.denied_total == 1
+
+    admission.finish(first)
+    assert admission.try_admit(make_job("ads"))
+    assert not admission.is_waiting("ads")
+
+
+def test_admits_when_nothing_is_running(memory):
+    memory.rss_mb = 900
+    admission = memory.admission(default_peak_mb=5000)
+
+    # Прогноз больше бюджета, но иначе DAG не запустится никогда
+    assert admission.try_admit(make_job("huge"))
+    assert not admission.try_admit(make_job("small"))
+
+
+def test_finish_learns_peak(memory):
+    admission = memory.admission()
+    job = make_job("sales")
+    assert admission.try_admit(job)
+
+    memory.rss_mb = 350
+    admission._sample()
+    memory.rss_mb = 260
+    admission.finish(job)
+
+    assert admission.estimate_mb("sales") == 150
+    assert admission.estimate_mb("other") == 300
+    assert admission.get_stats()["dag_peaks_mb"] == {"sales": 150}
+
+
+def test_worker_peak_is_measured_from_its_first_sample(memory):
+    admission = memory.admission()
+    job = make_job("heavy", worker_pid=4242)
+    assert admission.try_admit(job)
+
+    memory.pids[4242] = 80
+    admission._sample()
+    memory.pids[4242] = 480
+    # Рост RSS планировщика к пику DAG в процессе-воркере не относится
+    memory.rss_mb = 900
+    admission.finish(job)
+
+    assert admission.estimate_mb("heavy") == 400
+
+
+def test_release_does_not_record_peak(memory):
+    admission = memory.admission()
+    job = make_job("sales")
+    assert admission.try_admit(job)
+
+    memory.rss_mb = 700
+    admission.release(job)
+
+    assert admission.estimate_mb("sales") == 300
+    assert admission.get_stats()["running"] == 0
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.croner import DAG
+from src.croner.async_runner import AsyncTaskRunner, get_async_runner, set_async_runner
+from src.croner.dag_run import TaskState
+
+
+@pytest.fixture
+def async_runner():
+    previous = get_async_runner()
+    runner = AsyncTaskRunner(name="croner-async-test")
+    set_async_runner(runner)
+    yield runner
+    set_async_runner(previous)
+    runner.stop()
+
+
+def test_async_tasks_run_on_shared_loop(async_runner):
+    threads = []
+
+    for dag_id in ("telegram", "timepad"):
+        dag = DAG(dag_id)
+
+        @dag.task
+        async def fetch():
+            threads.append(threading.current_thread().name)
+            await asyncio.sleep(0)
+            return [1, 2]
+
+        @dag.task
+        def count(fetch):
+            threads.append(threading.current_thread().name)
+            return len(fetch)
+
+        assert dag.run().status == TaskState.SUCCESS
+
+    # async-задачи обоих DAG идут в одном потоке цикла, обычные - в своих
+    assert threads[0] == threads[2] == "croner-async-test"
+    assert "croner-async-test" not in (threads[1], threads[3])
+    assert async_runner.get_stats()["completed"] == 2
+
+
+def test_max_async_tasks_limits_concurrency(async_runner):
+    # Лимит потоков async-задачам не мешает: они выполняются в цикле
+    dag = DAG("notify", max_active_tasks=1, max_async_tasks=2)
+    active = []
+    peak = []
+
+    async def send():
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.05)
+        active.pop()
+
+    @dag.task
+    def prepare():
+        pass
+
+    for i in range(5):
+        dag.task(send, task_id=f"send{i}", depends_on=[prepare])
+    dag_run = dag.run()
+
+    assert dag_run.status == TaskState.SUCCESS
+    assert max(peak) == 2
+    assert async_runner.get_stats() == {"running": 0, "waiting": 0, "completed": 5}
+    assert len(peak) == 5
+
+
+def test_coroutine_error_fails_task(async_runner):
+    dag = DAG("broken_api")
+
+    @dag.task
+    async def fetch():
+        await asyncio.sleep(0)
+        raise ConnectionError("API недоступен")
+
+    @dag.task(depends_on=[fetch])
+    async def publish():
+        pass
+
+    dag_run = dag.run()
+
+    assert dag_run.get_state("fetch") == TaskState.FAILED
+    assert dag_run.task_errors["fetch"] == "ConnectionError: API недоступен"
+    assert dag_run.get_state("publish") == TaskState.SKIPPED
+    assert dag_run.status == "failed"
@@ -0,0 +1,60 @@
+import pytest
+
+from benchmarks import scheduler_benchmark
+from src.croner import clock
+
+
+@pytest.fixture
+def bench_dags(tmp_path):
+    scheduler_benchmark.generate_dags(tmp_path, 40, sleep_share=0.2, sleep_ms=1)
+    return tmp_path
+
+
+def simulate(folder, hours=2, **kwargs):
+    benchmark = scheduler_benchmark.SchedulerBenchmark(folder, slots=40, **kwargs)
+    try:
+        count, bytes_per_dag = benchmark.load()
+        stats = benchmark.simulate(hours)
+    finally:
+        benchmark.close()
+    return benchmark, count, stats
+
+
+def test_generated_dags_are_loaded(bench_dags):
+    files = sorted(path.name for path in bench_dags.glob("*.py"))
+    _, count, _ = simulate(bench_dags, hours=0)
+
+    assert files == ["bench_0000.py"]
+    assert count == 40
+
+
+def test_simulation_runs_on_virtual_clock(bench_dags):
+    system_clock = clock.get_clock()
+    benchmark, _, stats = simulate(bench_dags)
+
+    runs = sum(benchmark.croner.get_run_counts().values())
+    # Раз в 30 секунд (самое частое выражение) за 2 часа
+    assert stats["ticks"] == 240
+    assert runs > stats["ticks"]
+    assert len(benchmark.lags) == runs
+    # Два часа виртуального времени проходят за секунды
+    assert stats["wall_seconds"] < 60
+    assert clock.get_clock() is system_clock
+
+
+def test_executed_and_instant_runs_match(bench_dags):
+    instant, _, _ = simulate(bench_dags)
+    executed, _, _ = simulate(bench_dags, execute=True)
+    eager, _, _ = simulate(bench_dags, lazy=False)
+
+    counts = instant.croner.get_run_counts()
+    assert executed.croner.get_run_counts() == counts
+    assert eager.croner.get_run_counts() == counts
+
+
+def test_percentile():
+    values = [1.0, 2.0, 3.0, 4.0, 5.0]
+
+    assert scheduler_benchmark._percentile(values, 50) == 3.0
+    assert scheduler_benchmark._percentile(values, 100) == 5.0
+    assert scheduler_benchmark._percentile([], 99) == 0.0
@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import pytest
+
+
+class FakeLeader:
+    """Таблица run_claims в памяти, общая для нескольких экземпляров"""
+
+    is_leader = True
+
+    def __init__(self, claims, owner):
+        self.claims = claims
+        self.owner = owner
+
+    def claim_run(self, dag_id, run_time):
+        if (dag_id, run_time) in self.claims:
+            return False
+        self.claims[(dag_id, run_time)] = self.owner
+        return True
+
+
+@pytest.mark.parametrize(
+    "schedule, slot",
+    [
+        ("once", datetime(1970, 1, 1)),
+        ("daily", datetime(2026, 3, 2)),
+        ("hourly", datetime(2026, 3, 2, 10)),
+        ("*/15 * * * *", datetime(2026, 3, 2, 10, 15)),
+    ],
+)
+def test_instances_claim_the_same_slot(make_croner, virtual_clock, schedule, slot):
+    claims = {}
+    instances = []
+    for owner, offset in (("a", 0), ("b", 20)):
+        croner = make_croner()
+        (croner.dags_folder / "report.py").write_text(
+            "from src.croner import DAG\n"
+            f'report = DAG("report", schedule_interval="{schedule}")\n'
+        )
+        croner.scan_dags_folder()
+        croner.dags["report_report"]["dag"].set_start_offset(offset)
+        croner.schedule_dag("report_report")
+        croner.leader = FakeLeader(claims, owner)
+        instances.append(croner)
+
+    # Экземпляры замечают запуск в разные тики и с разным сдвигом старта
+    virtual_clock.advance_to(datetime(2026, 3, 2, 10, 15, 1))
+    instances[0].run_scheduled_dags()
+    virtual_clock.advance_to(datetime(2026, 3, 2, 10, 15, 40))
+    instances[1].run_scheduled_dags()
+
+    assert claims == {("report_report", slot): "a"}
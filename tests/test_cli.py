@@ -0,0 +1,89 @@
+import pytest
+
+from src.croner.cli import main
+
+REPORT_DAG = """
+from src.croner import DAG
+
+report = DAG("report", schedule_interval="0 9 * * *")
+
+
+@report.task
+def extract(conf):
+    return conf.get("rows", 3)
+
+
+@report.task
+def check(extract):
+    if extract == 0:
+        raise ValueError("пустая выгрузка")
+"""
+
+SENSOR_DAG = """
+from src.croner import DAG, FileSensor
+
+uploads = DAG("uploads", sensor=FileSensor("/data/uploads", pattern="*.xlsx"))
+
+
+@uploads.task
+def load():
+    pass
+"""
+
+
+@pytest.fixture
+def dags_folder(tmp_path):
+    (tmp_path / "report.py").write_text(REPORT_DAG)
+    (tmp_path / "uploads.py").write_text(SENSOR_DAG)
+    (tmp_path / "_helpers.py").write_text("raise RuntimeError('не DAG')\n")
+    return tmp_path
+
+
+def run_cli(dags_folder, *argv):
+    return main(["--dags-folder", str(dags_folder), *argv])
+
+
+def test_list_shows_schedules(dags_folder, capsys):
+    assert run_cli(dags_folder, "list") == 0
+
+    lines = capsys.readouterr().out.splitlines()
+    # Перед таблицей идут логи создания DAG
+    header = next(i for i, line in enumerate(lines) if "расписание" in line)
+    assert lines[header].startswith("DAG")
+    report, uploads = lines[header + 1 :]
+    assert report.split()[:4] == ["report_report", "0", "9", "*"]
+    assert report.rstrip().endswith(":00:00")
+    assert "thread" in report and " 2  " in report
+    assert uploads.startswith("uploads_uploads")
+    assert uploads.endswith("по файлам в /data/uploads")
+
+
+def test_run_prints_tasks_and_returns_zero(dags_folder, capsys):
+    assert run_cli(dags_folder, "run", "report") == 0
+
+    out = capsys.readouterr().out
+    assert "DAG report: success" in out
+    assert "extract" in out and "check" in out
+
+
+def test_run_returns_non_zero_on_failed_task(dags_folder, capsys):
+    code = run_cli(dags_folder, "run", "report_report", "--conf", '{"rows": 0}')
+
+    assert code == 1
+    out = capsys.readouterr().out
+    assert "DAG report: failed" in out
+    assert "ValueError: пустая выгрузка" in out
+
+
+def test_run_single_task_inline(dags_folder, capsys):
+    assert run_cli(dags_folder, "run", "report", "--task", "extract") == 0
+
+    out = capsys.readouterr().out
+    assert "extract" in out and "check" not in out
+
+
+def test_unknown_dag_or_task_exits(dags_folder):
+    with pytest.raises(SystemExit, match="missing"):
+        run_cli(dags_folder, "run", "missing")
+    with pytest.raises(SystemExit, match="load_all"):
+        run_cli(dags_folder, "run", "report", "--task", "load_all")
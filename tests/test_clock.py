@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from src.croner import DAG, clock
+from src.croner.dag_run import DagRun
+
+
+def test_virtual_clock_moves_only_forward():
+    virtual = clock.VirtualClock(datetime(2026, 3, 2, 10, 0))
+
+    assert virtual.advance(90) == datetime(2026, 3, 2, 10, 1, 30)
+    assert virtual.advance_to(datetime(2026, 3, 2, 12, 0)) == datetime(2026, 3, 2, 12)
+    # Назад часы не идут
+    assert virtual.advance_to(datetime(2026, 3, 2, 11, 0)) == datetime(2026, 3, 2, 12)
+    assert virtual.time() == datetime(2026, 3, 2, 12).timestamp()
+
+
+def test_set_clock_returns_previous():
+    virtual = clock.VirtualClock(datetime(2026, 3, 2))
+    previous = clock.set_clock(virtual)
+    try:
+        assert clock.get_clock() is virtual
+        assert clock.now() == datetime(2026, 3, 2)
+        assert clock.time_ts() == datetime(2026, 3, 2).timestamp()
+    finally:
+        assert clock.set_clock(previous) is virtual
+
+    assert isinstance(clock.get_clock(), clock.SystemClock)
+    assert abs(clock.now() - datetime.now()) < timedelta(seconds=5)
+
+
+def test_dag_run_uses_scheduler_clock(virtual_clock):
+    dag = DAG("report")
+
+    @dag.task
+    def extract():
+        virtual_clock.advance(30)
+
+    assert DagRun("report").run_time == datetime(2026, 3, 2, 10, 14)
+    dag_run = dag.run()
+
+    assert dag_run.run_time == datetime(2026, 3, 2, 10, 14)
+    assert dag_run.started_at == datetime(2026, 3, 2, 10, 14)
+    assert dag_run.finished_at == datetime(2026, 3, 2, 10, 14, 30)
+    assert dag.last_run == datetime(2026, 3, 2, 10, 14)
+
+
+def test_cron_schedule_follows_virtual_clock(virtual_clock):
+    dag = DAG("quarterly", schedule_interval="*/15 * * * *")
+
+    assert dag.next_run == datetime(2026, 3, 2, 10, 15)
+    virtual_clock.advance_to(datetime(2026, 3, 2, 10, 15))
+    assert dag.should_run(clock.now())
+    assert dag.advance_schedule(clock.now()) == datetime(2026, 3, 2, 10, 30)
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import pytest
+
+from src.croner.cron_parser import CronParser
+
+
+def fires(expression, start, n):
+    return list(CronParser.parse(expression).iter_fires(start, n))
+
+
+def test_five_fields_default_to_zero_seconds():
+    fields = CronParser.parse("*/15 9-10 * * mon-fri").as_dict()
+
+    assert fields["second"] == [0]
+    assert fields["minute"] == [0, 15, 30, 45]
+    assert fields["hour"] == [9, 10]
+    assert fields["day_of_week"] == [1, 2, 3, 4, 5]
+
+
+def test_six_fields_macros_and_names():
+    assert CronParser.parse("*/20 * * * * *").as_dict()["second"] == [0, 20, 40]
+    daily = CronParser.parse("0 0 * * *").as_dict()
+    assert CronParser.parse("@daily").as_dict() == daily
+    assert CronParser.parse("0 0 1 jan,jul *").as_dict()["month"] == [1, 7]
+    # 7 - тоже воскресенье; a/n - от a до конца диапазона
+    assert CronParser.parse("0 0 * * 7").as_dict()["day_of_week"] == [0]
+    assert CronParser.parse("10/20 * * * *").as_dict()["minute"] == [10, 30, 50]
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "* * * *",
+        "60 * * * *",
+        "* 24 * * *",
+        "*/0 * * * *",
+        "* * * foo *",
+        "5-1 * * * *",
+    ],
+)
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronParser.parse(expression)
+
+
+def test_is_cron():
+    assert CronParser.is_cron("@hourly")
+    assert CronParser.is_cron("0 * * * *")
+    assert not CronParser.is_cron("daily")
+
+
+def test_next_fire_is_strictly_after():
+    assert fires("*/15 * * * *", datetime(2026, 3, 2, 10, 7, 30), 3) == [
+        datetime(2026, 3, 2, 10, 15),
+        datetime(2026, 3, 2, 10, 30),
+        datetime(2026, 3, 2, 10, 45),
+    ]
+    assert fires("*/15 * * * *", datetime(2026, 3, 2, 10, 15), 1) == [
+        datetime(2026, 3, 2, 10, 30)
+    ]
+
+
+def test_next_fire_carries_into_months_and_years():
+    assert fires("0 12 31 * *", datetime(2026, 4, 1), 2) == [
+        datetime(2026, 5, 31, 12),
+        datetime(2026, 7, 31, 12),
+    ]
+    assert fires("0 0 29 2 *", datetime(2026, 3, 1), 1) == [datetime(2028, 2, 29)]
+
+
+def test_day_of_month_or_day_of_week():
+    # Оба поля ограничены: 13-е число ИЛИ пятница, как в Vixie cron
+    assert fires("0 0 13 * fri", datetime(2026, 3, 1), 3) == [
+        datetime(2026, 3, 6),
+        datetime(2026, 3, 13),
+        datetime(2026, 3, 20),
+    ]
+    # День месяца через *: только пятницы
+    assert fires("0 0 * * fri", datetime(2026, 3, 7), 1) == [datetime(2026, 3, 13)]
+
+
+def test_prev_fire_and_matches():
+    schedule = CronParser.parse("30 9 * * mon")
+
+    assert schedule.prev_fire(datetime(2026, 3, 2, 9, 30)) == datetime(
+        2026, 2, 23, 9, 30
+    )
+    assert schedule.prev_fire(datetime(2026, 3, 4)) == datetime(2026, 3, 2, 9, 30)
+    assert schedule.matches(datetime(2026, 3, 2, 9, 30))
+    assert not schedule.matches(datetime(2026, 3, 3, 9, 30))
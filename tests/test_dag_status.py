@@ -0,0 +1,25 @@
+from src.croner import DAG, FileSensor
+
+
+def test_next_run_local_reported_for_timezone_dags():
+    status = DAG(
+        "moscow", schedule_interval="0 9 * * *", tz="Europe/Moscow"
+    ).get_status()
+
+    assert status["tz"] == "Europe/Moscow"
+    assert status["next_run_local"].endswith("09:00:00+03:00")
+
+
+def test_sensor_dag_without_timezone_has_no_local_time(tmp_path):
+    status = DAG("files", sensor=FileSensor(tmp_path, "*.xlsx")).get_status()
+
+    assert status["sensor"]["pattern"] == "*.xlsx"
+    assert "next_run_local" not in status
+    assert "tz" not in status
+
+
+def test_plain_dag_status():
+    status = DAG("plain", schedule_interval="0 9 * * *").get_status()
+
+    assert "next_run_local" not in status
+    assert "sensor" not in status
@@ -0,0 +1,109 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from src.croner.discovery import LazyDAG, discover_dags, load_file_dags
+
+DAG_FILES = sorted(
+    (Path(__file__).resolve().parent.parent / "src" / "dags").glob("*.py")
+)
+
+
+@pytest.mark.parametrize("dag_file", DAG_FILES, ids=lambda path: path.name)
+def test_shipped_dags_are_discovered_without_import(dag_file):
+    modules_before = set(sys.modules)
+
+    dags = load_file_dags(dag_file, lazy=True)
+
+    assert dags, f"{dag_file.name}: объявления DAG не найдены"
+    for dag in dags.values():
+        assert isinstance(dag, LazyDAG)
+        assert not dag.resolved
+        assert dag.declared_tasks
+    # Модуль DAG и его тяжелые зависимости (pandas) не импортированы
+    assert not {
+        name
+        for name in set(sys.modules) - modules_before
+        if name.startswith("dag_module_") or name.split(".")[0] == "pandas"
+    }
+
+
+def test_declared_tasks_follow_the_decorators(tmp_path):
+    dag_file = tmp_path / "report.py"
+    dag_file.write_text(
+        "import pandas\n"
+        "from src.croner import DAG\n"
+        "report = DAG('report', schedule_interval='0 9 * * *', priority=2 * 5)\n"
+        "@report.task(pool='db')\n"
+        "def extract():\n"
+        "    pass\n"
+        "@report.task\n"
+        "async def publish():\n"
+        "    pass\n"
+        "def helper():\n"
+        "    pass\n",
+        encoding="utf-8",
+    )
+
+    declarations = discover_dags(dag_file)
+
+    assert declarations == {
+        "report": {
+            "kwargs": {
+                "dag_id": "report",
+                "schedule_interval": "0 9 * * *",
+                "priority": 10,
+            },
+            "tasks": ["extract", "publish"],
+        }
+    }
+
+
+def test_dynamic_declaration_falls_back_to_import(tmp_path):
+    dag_file = tmp_path / "dynamic.py"
+    dag_file.write_text(
+        "import os\n"
+        "from src.croner import DAG\n"
+        "dynamic = DAG('dynamic', schedule_interval=os.environ.get('CRON'))\n",
+        encoding="utf-8",
+    )
+
+    assert discover_dags(dag_file) is None
+
+
+def test_annotated_declaration_is_discovered(tmp_path):
+    dag_file = tmp_path / "typed.py"
+    dag_file.write_text(
+        "from src.croner import DAG\n"
+        "typed: DAG = DAG('typed', schedule_interval='hourly')\n"
+        "config: dict\n"
+        "@typed.task\n"
+        "def extract():\n"
+        "    pass\n",
+        encoding="utf-8",
+    )
+
+    declarations = discover_dags(dag_file)
+
+    assert declarations == {
+        "typed": {
+            "kwargs": {"dag_id": "typed", "schedule_interval": "hourly"},
+            "tasks": ["extract"],
+        }
+    }
+
+
+def test_dag_created_in_loop_falls_back_to_import(tmp_path):
+    dag_file = tmp_path / "regions.py"
+    dag_file.write_text(
+        "from src.croner import DAG\n"
+        "main = DAG('main', schedule_interval='daily')\n"
+        "for region in ('omsk', 'tomsk'):\n"
+        "    globals()[region] = DAG(f'sales_{region}', schedule_interval='daily')\n",
+        encoding="utf-8",
+    )
+
+    assert discover_dags(dag_file) is None
+    # Импорт находит все DAG файла, а не только объявленный явно
+    assert sorted(load_file_dags(dag_file)) == ["main", "omsk", "tomsk"]
@@ -0,0 +1,132 @@
+import pickle
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.croner.cancellation import CancelToken, TaskCancelled
+from src.croner.distributed import PostgresTaskQueue, RemoteTaskError
+
+
+class MemoryTaskQueue(PostgresTaskQueue):
+    """Очередь со строками в памяти: SQL заменен, ожидание итогов настоящее"""
+
+    def __init__(self, **kwargs):
+        super().__init__(engine=None, poll_interval=0.05, **kwargs)
+        self.rows = {}
+        self.fetches = []
+        self.cancelled = []
+        self._ids = iter(range(1, 10**6))
+
+    def enqueue(self, dag_run, task, inputs):
+        row_id = next(self._ids)
+        self.rows[row_id] = {"id": row_id, "state": self.QUEUED, "result": None}
+        return row_id
+
+    def finish(self, row_id, value):
+        self.rows[row_id] = {
+            "id": row_id,
+            "state": self.SUCCESS,
+            "result": pickle.dumps(value),
+            "error": None,
+            "worker": "w1",
+        }
+
+    def _fetch_many(self, row_ids):
+        self.fetches.append(sorted(row_ids))
+        return {row_id: self.rows[row_id] for row_id in row_ids if row_id in self.rows}
+
+    def cancel(self, row_id, reason):
+        self.cancelled.append(row_id)
+
+
+DAG_RUN = SimpleNamespace(dag_id="dag")
+
+
+def run_in_thread(queue, task_id, token):
+    outcome = {}
+
+    def target():
+        try:
+            outcome["value"] = queue.run_task(
+                DAG_RUN, SimpleNamespace(task_id=task_id), {}, token
+            )
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target)
+    thread.start()
+    return thread, outcome
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_one_query_polls_all_waiting_tasks():
+    queue = MemoryTaskQueue()
+    started = [run_in_thread(queue, f"t{i}", CancelToken()) for i in range(5)]
+    # Пять ожидающих задач читаются одним запросом за опрос
+    assert wait_for(lambda: [1, 2, 3, 4, 5] in queue.fetches)
+
+    for row_id in range(1, 6):
+        queue.finish(row_id, row_id * 10)
+    for thread, _ in started:
+        thread.join(timeout=5)
+
+    assert sorted(outcome["value"] for _, outcome in started) == [10, 20, 30, 40, 50]
+    # Ждать больше некого: опросчик завершается
+    assert wait_for(lambda: queue._poller is None)
+
+
+def test_missing_row_fails_the_task():
+    queue = MemoryTaskQueue()
+    thread, outcome = run_in_thread(queue, "lost", CancelToken())
+    assert wait_for(lambda: queue.rows)
+    queue.rows.clear()
+    thread.join(timeout=5)
+
+    assert isinstance(outcome["error"], RemoteTaskError)
+
+
+@pytest.mark.parametrize("worker_answers", [True, False])
+def test_cancel_wakes_the_task_at_once(worker_answers):
+    queue = MemoryTaskQueue()
+    queue.cancel_wait = 0.5 if worker_answers else 0.2
+    token = CancelToken()
+    thread, outcome = run_in_thread(queue, "slow", token)
+    assert wait_for(lambda: queue.rows)
+
+    token.cancel("таймаут")
+    assert wait_for(lambda: queue.cancelled == [1])
+    if worker_answers:
+        queue.rows[1] = {"id": 1, "state": queue.CANCELLED, "error": "таймаут"}
+    thread.join(timeout=5)
+
+    assert isinstance(outcome["error"], TaskCancelled)
+
+
+def test_missing_queue_table_is_reported_not_created(recording_engine):
+    engine = recording_engine()
+    queue = PostgresTaskQueue(engine)
+
+    with pytest.raises(RuntimeError, match="CRONER_STATE_CREATE_SCHEMA"):
+        queue._begin()
+
+    assert not any("CREATE" in sql for sql in engine.statements)
+
+
+def test_queue_ddl_only_with_create_schema(recording_engine):
+    existing = recording_engine(tables={"croner.task_queue"})
+    PostgresTaskQueue(existing)._begin()
+    created = recording_engine()
+    PostgresTaskQueue(created, create_schema=True)._begin()
+
+    assert not any("CREATE" in sql for sql in existing.statements)
+    assert any("task_queue_queued_idx" in sql for sql in created.statements)
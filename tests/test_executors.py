@@ -0,0 +1,158 @@
+import threading
+import time
+
+from src.croner import DAG
+from src.croner.executors import DagJob, WorkerPoolExecutor
+
+
+class Gate:
+    """Задачи ждут release(); считает одновременно выполняемые"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.active = 0
+        self.peak = 0
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def make_dag(self, dag_id, fail=False):
+        dag = DAG(dag_id)
+
+        @dag.task
+        def work():
+            with self._lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            try:
+                assert self.release.wait(5)
+                if fail:
+                    raise ValueError("сбой задачи")
+            finally:
+                with self._lock:
+                    self.active -= 1
+                    self.finished.append(dag_id)
+
+        return dag
+
+    def wait_active(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if self.active == count:
+                    return True
+            time.sleep(0.01)
+        return False
+
+
+class Completions:
+    """on_complete пула: ждет заданное число завершений"""
+
+    def __init__(self):
+        self.jobs = []
+        self._cond = threading.Condition()
+
+    def __call__(self, job):
+        with self._cond:
+            self.jobs.append(job)
+            self._cond.notify_all()
+
+    def wait(self, count, timeout=5):
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.jobs) >= count, timeout)
+
+
+def make_pool(max_workers):
+    executor = WorkerPoolExecutor(max_workers=max_workers)
+    completions = Completions()
+    executor.on_complete = completions
+    return executor, completions
+
+
+def test_pool_runs_at_most_max_workers():
+    executor, completions = make_pool(2)
+    gate = Gate()
+    try:
+        jobs = [DagJob(f"dag{i}", gate.make_dag(f"dag{i}")) for i in range(3)]
+
+        assert executor.try_submit(jobs[0])
+        assert executor.try_submit(jobs[1])
+        # Слотов нет: третий запуск не принят пулом
+        assert not executor.try_submit(jobs[2])
+        assert gate.wait_active(2)
+        assert executor.free_slots() == 0
+        assert len(executor.running_jobs()) == 2
+
+        gate.release.set()
+        assert completions.wait(2)
+    finally:
+        executor.shutdown(timeout=5)
+
+    assert gate.peak == 2
+    assert executor.submitted == 2
+
+
+def test_slot_is_freed_after_success_and_error():
+    executor, completions = make_pool(1)
+    gate = Gate()
+    gate.release.set()
+    try:
+        assert executor.try_submit(DagJob("ok", gate.make_dag("ok")))
+        assert completions.wait(1)
+        assert executor.free_slots() == 1
+
+        # DAG падает целиком, а не отдельной задачей
+        broken = DAG("broken")
+        broken.run = lambda dag_run: 1 / 0
+        assert executor.try_submit(DagJob("broken", broken))
+        assert completions.wait(2)
+        assert executor.free_slots() == 1
+
+        assert executor.try_submit(DagJob("after", gate.make_dag("after")))
+        assert completions.wait(3)
+    finally:
+        executor.shutdown(timeout=5)
+
+    assert [job.status for job in completions.jobs] == ["success", "error", "success"]
+    assert isinstance(completions.jobs[1].error, ZeroDivisionError)
+    assert executor.completed == 2 and executor.failed == 1
+    assert executor.dag_stats["broken"]["failures"] == 1
+
+
+def test_failed_task_frees_slot():
+    executor, completions = make_pool(1)
+    gate = Gate()
+    gate.release.set()
+    try:
+        assert executor.try_submit(DagJob("failing", gate.make_dag("failing", True)))
+        assert completions.wait(1)
+        assert executor.free_slots() == 1
+    finally:
+        executor.shutdown(timeout=5)
+
+    assert completions.jobs[0].status == "failed"
+
+
+def test_jobs_over_limit_stay_queued(make_croner):
+    croner = make_croner(executor=WorkerPoolExecutor(max_workers=2))
+    croner.running = True
+    gate = Gate()
+    dags = {f"dag{i}": gate.make_dag(f"dag{i}") for i in range(4)}
+    for dag_id, dag in dags.items():
+        croner.add_dag_to_queue(croner.create_job(dag_id, dag))
+
+    croner.process_queue()
+
+    assert gate.wait_active(2)
+    # Запуски сверх лимита ждут в очереди, а не отбрасываются
+    assert len(croner.dag_queue) == 2
+    assert croner.executor.free_slots() == 0
+
+    gate.release.set()
+    deadline = time.monotonic() + 5
+    while len(gate.finished) < 4 and time.monotonic() < deadline:
+        time.sleep(0.02)
+    croner.running = False
+
+    assert sorted(gate.finished) == sorted(dags)
+    assert len(croner.dag_queue) == 0
+    assert gate.peak == 2
@@ -0,0 +1,34 @@
+import pytest
+
+from src.croner.leader import PostgresLeaderElection
+
+
+def test_missing_claims_table_is_reported_not_created(recording_engine):
+    engine = recording_engine()
+    leader = PostgresLeaderElection(engine)
+
+    with pytest.raises(RuntimeError, match="croner_state.sql"):
+        leader._create_schema()
+
+    assert not any("CREATE" in sql for sql in engine.statements)
+    assert not leader._schema_ready
+
+
+def test_existing_claims_table_is_accepted(recording_engine):
+    engine = recording_engine(tables={"croner.run_claims"})
+    leader = PostgresLeaderElection(engine)
+
+    leader._create_schema()
+
+    assert leader._schema_ready
+    assert not any("CREATE" in sql for sql in engine.statements)
+
+
+def test_create_schema_runs_ddl_when_enabled(recording_engine):
+    engine = recording_engine()
+    leader = PostgresLeaderElection(engine, create_schema=True)
+
+    leader._create_schema()
+
+    ddl = "CREATE TABLE IF NOT EXISTS croner.run_claims"
+    assert any(ddl in sql for sql in engine.statements)
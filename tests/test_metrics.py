@@ -0,0 +1,145 @@
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from sqlalchemy import create_engine
+
+import docker_health
+from src.croner.metrics import MetricsServer, _MetricsBuilder, render_metrics
+
+
+def test_run_seconds_exposed_as_summary():
+    metrics = _MetricsBuilder()
+    metrics.add("croner_dag_run_seconds_sum", 12.5, dag_id="sales")
+    metrics.add("croner_dag_run_seconds_count", 3, dag_id="sales")
+    lines = metrics.render().splitlines()
+
+    assert lines == [
+        "# HELP croner_dag_run_seconds Время выполнения DAG",
+        "# TYPE croner_dag_run_seconds summary",
+        'croner_dag_run_seconds_sum{dag_id="sales"} 12.5',
+        'croner_dag_run_seconds_count{dag_id="sales"} 3.0',
+    ]
+
+
+def test_samples_follow_their_type_line(make_croner):
+    family = None
+    for line in render_metrics(make_croner()).splitlines():
+        if line.startswith("# TYPE "):
+            family, metric_type = line.split()[2:4]
+            assert metric_type in ("counter", "gauge", "summary")
+        elif not line.startswith("#"):
+            assert line.split("{")[0].split(" ")[0].startswith(family)
+
+
+@pytest.fixture
+def serve(make_croner):
+    servers = []
+
+    def start(profile_token=""):
+        croner = make_croner()
+        (croner.dags_folder / "sales.py").write_text(
+            "from src.croner import DAG\n"
+            'sales = DAG("sales", schedule_interval="0 * * * *")\n'
+        )
+        croner.scan_dags_folder()
+        server = MetricsServer(
+            croner, host="127.0.0.1", port=0, profile_token=profile_token
+        )
+        server.start()
+        servers.append(server)
+        return croner, server._server.server_address[1]
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def post_profile(port, token=None):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/profile/sales_sales?runs=1", method="POST"
+    )
+    if token:
+        request.add_header("Authorization", f"Bearer {token}")
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_profile_disabled_without_token(serve):
+    croner, port = serve()
+
+    assert post_profile(port, "anything") == 403
+    assert croner.profiling == {}
+
+
+def test_profile_requires_token(serve):
+    croner, port = serve(profile_token="s3cret")
+
+    assert post_profile(port) == 401
+    assert post_profile(port, "wrong") == 401
+    assert croner.profiling == {}
+    assert post_profile(port, "s3cret") == 200
+    assert croner.profiling == {"sales_sales": 1}
+
+
+def get_health(port):
+    try:
+        with urllib.request.urlopen(
+            f"http://127.0.0.1:{port}/health", timeout=5
+        ) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def mark_running(croner):
+    """Цикл планировщика только что отработал, база (SQLite в памяти) отвечает"""
+    croner.running = True
+    croner.scan_interval = 60
+    croner.last_loop_at = time.monotonic()
+    croner.get_db_engine = lambda: create_engine("sqlite://")
+
+
+def test_health_reports_ready_scheduler(serve):
+    croner, port = serve()
+    mark_running(croner)
+
+    status, body = get_health(port)
+
+    assert status == 200
+    assert body["status"] == "ok" and body["db"] == "ok"
+    assert body["scheduler"] == "ok" and body["dags"] == 1
+
+
+def test_health_fails_when_scheduler_stalled(serve):
+    croner, port = serve()
+    croner.get_db_engine = lambda: create_engine("sqlite://")
+
+    status, body = get_health(port)
+
+    assert status == 503
+    assert body["status"] == "error" and body["scheduler"] == "stalled"
+
+
+def test_docker_health_check(serve, monkeypatch, capsys):
+    croner, port = serve()
+    mark_running(croner)
+
+    monkeypatch.setenv("CRONER_METRICS_PORT", str(port))
+    assert docker_health.scheduler_health_check()
+    croner.running = False
+    assert not docker_health.scheduler_health_check()
+    assert "503" in capsys.readouterr().out
+
+
+def test_docker_health_check_passes_without_http_server(monkeypatch):
+    # Сервер выключен: обращения к /health быть не должно
+    monkeypatch.setenv("CRONER_METRICS_PORT", "0")
+    monkeypatch.setattr(urllib.request, "urlopen", None)
+
+    assert docker_health.scheduler_health_check()
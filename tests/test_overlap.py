@@ -0,0 +1,109 @@
+import threading
+import time
+from datetime import datetime
+
+from src.croner import DAG
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def add_dag(croner, on_overlap, release, fail=False):
+    """DAG каждые 5 минут; запуск держит слот, пока не выставлен release"""
+    dag = DAG("report", schedule_interval="*/5 * * * *", on_overlap=on_overlap)
+    runs = []
+
+    @dag.task
+    def build():
+        runs.append(len(runs) + 1)
+        assert release.wait(5)
+        if fail:
+            raise ValueError("отчет не собран")
+
+    croner.dags["report"] = {"dag": dag, "file_path": None, "attr_name": "report"}
+    croner.schedule_dag("report")
+    return dag, runs
+
+
+def tick(croner, virtual_clock, minute):
+    virtual_clock.advance_to(datetime(2026, 3, 2, 10, minute, 1))
+    croner.run_scheduled_dags()
+
+
+def finished_runs(croner, status):
+    return croner.run_counts.get(("report", status), 0)
+
+
+def test_skip_drops_run_while_active(make_croner, virtual_clock):
+    croner = make_croner()
+    croner.running = True
+    release = threading.Event()
+    dag, runs = add_dag(croner, "skip", release)
+
+    tick(croner, virtual_clock, 15)
+    assert wait_for(lambda: runs == [1])
+    tick(croner, virtual_clock, 20)
+
+    # Запуск 10:20 пропущен, расписание ушло дальше
+    assert not croner.is_queued("report")
+    assert dag.next_run == datetime(2026, 3, 2, 10, 25)
+    release.set()
+    assert wait_for(lambda: finished_runs(croner, "success") == 1)
+    croner.running = False
+
+    assert runs == [1]
+    assert dag.active_runs == 0
+
+
+def test_queue_runs_after_active_run(make_croner, virtual_clock):
+    croner = make_croner()
+    croner.running = True
+    release = threading.Event()
+    dag, runs = add_dag(croner, "queue", release)
+
+    tick(croner, virtual_clock, 15)
+    assert wait_for(lambda: runs == [1])
+    tick(croner, virtual_clock, 20)
+    tick(croner, virtual_clock, 25)
+
+    # В очереди один запуск, а не по одному на каждый тик
+    assert croner.is_queued("report")
+    assert len(croner.dag_queue) == 1
+    assert dag.active_runs == 1
+    release.set()
+    assert wait_for(lambda: finished_runs(croner, "success") == 2)
+    croner.running = False
+
+    assert runs == [1, 2]
+    assert not croner.is_queued("report")
+
+
+def test_failed_run_releases_guard(make_croner, virtual_clock):
+    croner = make_croner()
+    croner.running = True
+    release = threading.Event()
+    release.set()
+    dag, runs = add_dag(croner, "skip", release, fail=True)
+
+    tick(croner, virtual_clock, 15)
+    assert wait_for(lambda: finished_runs(croner, "failed") == 1)
+    assert dag.active_runs == 0
+
+    # DAG падает целиком, а не отдельной задачей
+    dag.run = lambda dag_run: 1 / 0
+    tick(croner, virtual_clock, 20)
+    assert wait_for(lambda: finished_runs(croner, "error") == 1)
+    assert dag.active_runs == 0
+
+    del dag.run
+    tick(croner, virtual_clock, 25)
+    assert wait_for(lambda: finished_runs(croner, "failed") == 2)
+    croner.running = False
+
+    assert runs == [1, 2]
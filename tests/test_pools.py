@@ -0,0 +1,78 @@
+import threading
+import time
+
+import pytest
+
+from src.config.config_loader import parse_pools
+from src.croner import DAG
+from src.croner.dag_run import TaskState
+from src.croner.discovery import load_file_dags
+from src.croner.pools import ResourcePools, get_pools, set_pools
+
+
+@pytest.fixture
+def pools():
+    previous = get_pools()
+    resource_pools = ResourcePools({"db": 1, "api": 2})
+    set_pools(resource_pools)
+    yield resource_pools
+    set_pools(previous)
+
+
+def test_pool_of_one_serialises_tasks(pools):
+    dag = DAG("writes", max_active_tasks=4)
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def write():
+        with lock:
+            active.append(1)
+            peak.append(len(active))
+        time.sleep(0.1)
+        with lock:
+            active.pop()
+
+    for name in ("orders", "refunds"):
+        dag.task(write, task_id=name, pool="db")
+    dag_run = dag.run()
+
+    assert dag_run.status == TaskState.SUCCESS
+    assert max(peak) == 1
+    stats = pools.get_stats()["db"]
+    assert stats["acquired"] == 2 and stats["peak"] == 1 and stats["used"] == 0
+
+
+def test_unknown_pool_is_rejected_at_load(pools, tmp_path):
+    dag_file = tmp_path / "report.py"
+    dag_file.write_text(
+        "from src.croner import DAG\n"
+        "report = DAG('report')\n"
+        "@report.task(pool='postgres_wrte')\n"
+        "def load():\n"
+        "    pass\n"
+    )
+
+    with pytest.raises(ValueError, match="postgres_wrte"):
+        load_file_dags(dag_file, lazy=False)
+    with pytest.raises(ValueError, match="CRONER_POOLS"):
+        load_file_dags(dag_file, lazy=True)["report"].resolve()
+
+
+def test_declared_pools_pass_validation(pools):
+    dag = DAG("report")
+    dag.task(lambda: None, task_id="load", pool="api")
+
+    dag.validate()
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        ("postgres_write=2,google_api=1", {"postgres_write": 2, "google_api": 1}),
+        (" postgres_write = 2 , google_api=1,", {"postgres_write": 2, "google_api": 1}),
+        ("", {}),
+    ],
+)
+def test_parse_pools(value, expected):
+    assert parse_pools(value) == expected
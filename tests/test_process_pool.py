@@ -0,0 +1,150 @@
+import os
+import threading
+
+import pytest
+
+from src.croner import DAG
+from src.croner.discovery import load_file_dags
+from src.croner.executors import DagJob
+from src.croner.process_pool import ProcessWorkerPoolExecutor
+
+REPORT_DAG = """
+import os
+import threading
+
+from src.croner import DAG
+
+report = DAG("report", executor="process")
+
+
+@report.task
+def extract():
+    return [1, 2, 3]
+
+
+@report.task
+def total(extract, conf):
+    # Результаты задач закрываются с запуском: итог пишем в файл
+    with open(conf["out"], "w") as f:
+        f.write(f"{sum(extract)} {os.getpid()}")
+
+
+@report.task
+def broken():
+    raise ValueError("нет данных")
+
+
+@report.task(depends_on=[total])
+def keep_handle(conf):
+    if conf.get("keep_handle"):
+        # Блокировка не сериализуется: итог запуска не передать родителю
+        conf["handle"] = threading.Lock()
+"""
+
+
+class Completions:
+    """on_complete пула: ждет заданное число завершений"""
+
+    def __init__(self):
+        self.jobs = []
+        self._cond = threading.Condition()
+
+    def __call__(self, job):
+        with self._cond:
+            self.jobs.append(job)
+            self._cond.notify_all()
+
+    def wait(self, count, timeout=60):
+        with self._cond:
+            return self._cond.wait_for(lambda: len(self.jobs) >= count, timeout)
+
+
+@pytest.fixture
+def process_pool():
+    executor = ProcessWorkerPoolExecutor(max_workers=1)
+    completions = Completions()
+    executor.on_complete = completions
+    yield executor, completions
+    executor.shutdown(timeout=10)
+
+
+def make_job(tmp_path, **conf):
+    dag_file = tmp_path / "report.py"
+    if not dag_file.exists():
+        dag_file.write_text(REPORT_DAG)
+    dag = load_file_dags(dag_file)["report"]
+    job = DagJob("report", dag, file_path=str(dag_file), attr_name="report")
+    job.conf = {"out": str(tmp_path / "total.txt"), **conf}
+    return job
+
+
+def test_module_level_dag_runs_in_worker_process(process_pool, tmp_path):
+    executor, completions = process_pool
+    job = make_job(tmp_path)
+
+    assert executor.try_submit(job)
+    assert completions.wait(1)
+
+    dag_run = job.result
+    assert job.error is None
+    total, pid = (tmp_path / "total.txt").read_text().split()
+    assert total == "6"
+    assert int(pid) == job.worker_pid != os.getpid()
+    assert dag_run.task_errors == {"broken": "ValueError: нет данных"}
+    assert job.status == "failed"
+    assert executor.free_slots() == 1
+
+
+def test_unpicklable_conf_fails_run_and_frees_slot(process_pool, tmp_path):
+    executor, completions = process_pool
+    job = make_job(tmp_path, callback=lambda: None)
+
+    assert executor.try_submit(job)
+    assert completions.wait(1)
+
+    assert job.status == "error"
+    assert executor.free_slots() == 1
+
+
+def test_unpicklable_result_fails_run_and_frees_slot(process_pool, tmp_path):
+    executor, completions = process_pool
+    failing = make_job(tmp_path, keep_handle=True)
+
+    assert executor.try_submit(failing)
+    assert completions.wait(1)
+    assert failing.status == "error"
+    assert "не передается" in str(failing.error)
+    assert "handle" not in failing.conf
+    assert executor.free_slots() == 1
+
+    # Следующий запуск выполняется, слот не завис
+    assert executor.try_submit(make_job(tmp_path))
+    assert completions.wait(2)
+    assert completions.jobs[1].error is None
+    # Процесс-воркер пережил неудачную передачу итога
+    assert executor.recycled == 0
+
+
+def test_missing_dag_in_module_fails_run(process_pool, tmp_path):
+    executor, completions = process_pool
+    job = make_job(tmp_path)
+    job.attr_name = "missing"
+
+    assert executor.try_submit(job)
+    assert completions.wait(1)
+
+    assert isinstance(job.error, RuntimeError)
+    assert "missing" in str(job.error)
+    assert executor.free_slots() == 1
+
+
+def test_dag_defined_outside_module_is_not_sent(process_pool):
+    executor, completions = process_pool
+    dag = DAG("inline", executor="process")
+    dag.task(lambda: None, task_id="noop")
+
+    assert executor.try_submit(DagJob("inline", dag))
+    assert completions.wait(1)
+
+    assert completions.jobs[0].status == "error"
+    assert executor.free_slots() == 1
@@ -0,0 +1,86 @@
+import tracemalloc
+
+import pytest
+
+from src.croner import DAG
+from src.croner.executors import DagJob, WorkerPoolExecutor
+from src.croner.profiling import format_report, profile_allocations
+
+# Удерживается между запусками: утечка, которую должен показать профиль
+LEAKED = []
+
+
+def make_dag():
+    dag = DAG("leaky")
+
+    @dag.task
+    def build_cache():
+        LEAKED.append([str(i) * 10 for i in range(20000)])
+
+    return dag
+
+
+def leak_location(report):
+    return [site for site in report["top"] if __file__ in site["location"]]
+
+
+def test_profiled_run_reports_top_allocations():
+    executor = WorkerPoolExecutor(max_workers=1)
+    job = DagJob("leaky", make_dag())
+    job.profile_memory = True
+    assert not tracemalloc.is_tracing()
+
+    executor.execute(job)
+
+    report = job.memory_report
+    assert report["retained_kb"] > 500
+    assert report["peak_kb"] >= report["retained_kb"]
+    assert leak_location(report)
+    assert "удержано" in format_report(report)
+    # tracemalloc работает только на время профилируемого запуска
+    assert not tracemalloc.is_tracing()
+    LEAKED.clear()
+
+
+def test_failed_run_keeps_report_and_stops_tracing():
+    executor = WorkerPoolExecutor(max_workers=1)
+    job = DagJob("leaky", make_dag())
+    job.profile_memory = True
+
+    def run(dag_run):
+        # DAG падает целиком, а не отдельной задачей
+        LEAKED.append([str(i) * 10 for i in range(20000)])
+        raise MemoryError("кеш не поместился")
+
+    job.dag.run = run
+
+    with pytest.raises(MemoryError):
+        executor.execute(job)
+
+    assert leak_location(job.memory_report)
+    assert not tracemalloc.is_tracing()
+    LEAKED.clear()
+
+
+def test_nested_profiling_keeps_tracing_until_last_run():
+    def inner():
+        assert tracemalloc.is_tracing()
+        return profile_allocations(lambda: "готово")
+
+    (result, inner_report), outer_report = profile_allocations(inner)
+
+    assert result == "готово"
+    assert "top" in inner_report and "top" in outer_report
+    assert not tracemalloc.is_tracing()
+
+
+def test_profiling_runs_are_counted(make_croner):
+    croner = make_croner()
+    dag = make_dag()
+    croner.dags["leaky"] = {"dag": dag}
+    croner.enable_profiling("leaky", runs=2)
+
+    profiled = [croner.create_job("leaky", dag).profile_memory for _ in range(3)]
+
+    assert profiled == [True, True, False]
+    assert "leaky" not in croner.profiling
@@ -0,0 +1,80 @@
+import pickle
+
+from src.croner import DAG
+from src.croner.cli import run_inline
+from src.croner.dag_run import TaskState
+from src.croner.results import TaskResults, describe
+
+
+def make_dag(sales, reports):
+    dag = DAG("results_test", schedule_interval="0 12 * * 1")
+
+    @dag.task
+    def sales_data():
+        return sales
+
+    @dag.task
+    def report(sales_data):
+        reports.append(sales_data)
+
+    return dag
+
+
+def test_result_passed_by_parameter_name():
+    reports = []
+    dag_run = make_dag([1, 2, 3], reports).run()
+
+    assert dag_run.get_state("report") == TaskState.SUCCESS
+    assert reports == [[1, 2, 3]]
+
+
+def test_none_result_is_passed_downstream():
+    reports = []
+    dag_run = make_dag(None, reports).run()
+
+    assert dag_run.get_state("report") == TaskState.SUCCESS
+    assert reports == [None]
+
+
+def test_none_result_is_passed_in_inline_run():
+    reports = []
+    dag_run = run_inline(make_dag(None, reports))
+
+    assert dag_run.get_state("report") == TaskState.SUCCESS
+    assert reports == [None]
+
+
+def test_failed_upstream_skips_consumer():
+    dag = DAG("results_failed", schedule_interval="0 12 * * 1")
+
+    @dag.task
+    def sales_data():
+        raise ValueError("нет выгрузки")
+
+    @dag.task
+    def report(sales_data):
+        return sales_data
+
+    dag_run = dag.run()
+
+    assert dag_run.get_state("sales_data") == TaskState.FAILED
+    assert dag_run.get_state("report") == TaskState.SKIPPED
+
+
+def test_results_survive_pickling():
+    results = TaskResults()
+    results.put("sales_data", [1, 2])
+    results.put("empty", None)
+    restored = pickle.loads(pickle.dumps(results))
+
+    assert restored.get("sales_data") == [1, 2]
+    assert "empty" in restored and restored.get("empty", "нет") is None
+    results.close()
+    restored.close()
+
+
+def test_describe_does_not_print_contents():
+    assert describe([1, 2, 3]) == "list, элементов: 3"
+    assert describe("отчет") == "str, символов: 5"
+    assert describe(42) == "int 42"
+    assert "secret" not in describe({"token": "secret"})
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from src.croner import DAG
+from src.croner.dag_run import TaskState
+
+
+def make_task(**options):
+    dag = DAG("retry_delays")
+
+    @dag.task(**options)
+    def call_api():
+        pass
+
+    return dag.get_task("call_api")
+
+
+@pytest.mark.parametrize(
+    "tries, expected", [(1, 10), (2, 20), (3, 40), (4, 80), (6, 100)]
+)
+def test_retry_delay_is_exponential_with_jitter(tries, expected):
+    task = make_task(retries=6, retry_delay=10, backoff=2, max_retry_delay=100)
+
+    for _ in range(50):
+        assert expected / 2 <= task.get_retry_delay(tries) <= expected
+
+
+def test_retry_only_for_listed_errors_and_attempts():
+    task = make_task(retries=2, retry_on=(ConnectionError,))
+
+    assert task.should_retry(ConnectionError(), 1)
+    assert task.should_retry(ConnectionError(), 2)
+    assert not task.should_retry(ConnectionError(), 3)
+    assert not task.should_retry(ValueError(), 1)
+
+
+def test_long_retry_defers_run():
+    dag = DAG("deferred_retry")
+
+    @dag.task(retries=1, retry_delay=60)
+    def flaky():
+        raise ConnectionError("сервис недоступен")
+
+    dag_run = dag.run()
+
+    assert dag_run.is_deferred
+    assert dag_run.get_state("flaky") == TaskState.UP_FOR_RETRY
+    assert dag_run.task_tries == {"flaky": 1}
+    assert dag_run.next_retry_at() == dag_run.retry_at["flaky"]
+
+
+def test_retry_due_during_long_sibling_is_not_delayed():
+    dag = DAG("retry_sibling")
+    attempts = []
+
+    @dag.task
+    def root():
+        pass
+
+    @dag.task(depends_on=[root])
+    def long_export(cancel_token):
+        cancel_token.sleep(3)
+
+    @dag.task(depends_on=[root], retries=1, retry_delay=0.2)
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ConnectionError("сервис недоступен")
+
+    dag_run = dag.run()
+
+    assert dag_run.get_state("flaky") == TaskState.SUCCESS
+    assert dag_run.get_state("long_export") == TaskState.SUCCESS
+    # Повтор через ~0.2с, а не после окончания long_export через 3с
+    assert attempts[1] - attempts[0] < 1.5
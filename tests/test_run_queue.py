@@ -0,0 +1,73 @@
+import time
+
+from src.croner import DAG
+from src.croner.executors import DagJob
+from src.croner.run_queue import RunQueue
+
+
+def make_job(dag_id, priority=0, waited=0.0):
+    dag = DAG(dag_id, priority=priority)
+    return DagJob(dag_id, dag, enqueued_at=time.monotonic() - waited)
+
+
+def start_all(queue):
+    return [job.dag_id for job in queue.pop_eligible(lambda job: True)]
+
+
+def test_higher_priority_starts_first():
+    queue = RunQueue(aging_rate=1 / 60)
+    for job in (make_job("low"), make_job("high", priority=10), make_job("mid", 5)):
+        queue.push(job)
+
+    assert start_all(queue) == ["high", "mid", "low"]
+    assert len(queue) == 0
+
+
+def test_waiting_job_ages_past_higher_priority():
+    queue = RunQueue(aging_rate=1 / 60)
+    # 10 единиц приоритета - 600 секунд ожидания
+    queue.push(make_job("fresh_important", priority=10))
+    queue.push(make_job("old_low", priority=0, waited=660))
+    queue.push(make_job("recent_low", priority=0, waited=540))
+
+    assert start_all(queue) == ["old_low", "fresh_important", "recent_low"]
+
+
+def test_equal_priority_is_fifo():
+    queue = RunQueue()
+    now = time.monotonic()
+    for i in range(5):
+        queue.push(DagJob(f"dag{i}", DAG(f"dag{i}"), enqueued_at=now))
+
+    assert start_all(queue) == [f"dag{i}" for i in range(5)]
+
+
+def test_duplicate_runs_are_merged_until_started():
+    queue = RunQueue()
+    first = make_job("sales")
+
+    assert queue.push(first)
+    assert not queue.push(make_job("sales"))
+    assert "sales" in queue and len(queue) == 1
+
+    # Запуск по датчику не сливается с плановым
+    sensor_job = make_job("sales")
+    sensor_job.conf = {"files": ["a.xlsx"]}
+    assert queue.push(sensor_job)
+    assert ("sales", "sensor") in queue
+
+    assert start_all(queue) == ["sales", "sales"]
+    assert queue.push(make_job("sales"))
+
+
+def test_blocked_jobs_stay_queued_in_order():
+    queue = RunQueue()
+    for job in (make_job("a", 3), make_job("b", 2), make_job("c", 1)):
+        queue.push(job)
+
+    started = queue.pop_eligible(lambda job: job.dag_id == "b")
+
+    assert [job.dag_id for job in started] == ["b"]
+    assert [job.dag_id for job in queue.jobs()] == ["a", "c"]
+    assert queue.get_wait_stats()["b"]["dequeued"] == 1
+    assert "waiting_for" in queue.get_wait_stats()["a"]
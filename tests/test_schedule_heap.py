@@ -0,0 +1,86 @@
+import threading
+import time
+
+from src.croner.schedule_heap import ScheduleHeap
+
+
+def test_push_reschedules_existing_key():
+    heap = ScheduleHeap()
+    heap.push("sales", 100)
+    heap.push("ads", 150)
+    heap.push("sales", 200)
+
+    assert len(heap) == 2
+    assert heap.get_due_time("sales") == 200
+    assert heap.pop_due(180) == ["ads"]
+    assert heap.pop_due(250) == ["sales"]
+    assert heap.pop_due(1000) == []
+
+
+def test_push_none_unschedules_key():
+    heap = ScheduleHeap()
+    heap.push("once", 100)
+    heap.push("once", None)
+
+    assert "once" not in heap
+    assert heap.pop_due(1000) == []
+
+
+def test_remove_invalidates_lazily():
+    heap = ScheduleHeap()
+    heap.push("a", 100)
+    heap.push("b", 200)
+    heap.remove("a")
+    heap.remove("missing")
+
+    assert "a" not in heap and len(heap) == 1
+    # Удаленная запись еще лежит в куче, но не видна
+    assert heap.peek_time() == 200
+    assert heap.pop_due(1000) == ["b"]
+
+
+def test_pop_due_returns_only_due_keys_in_order():
+    heap = ScheduleHeap()
+    for key, due in (("c", 300), ("a", 100), ("b", 200), ("d", 400)):
+        heap.push(key, due)
+
+    assert heap.pop_due(99) == []
+    assert heap.pop_due(250) == ["a", "b"]
+    assert sorted(heap._entries) == ["c", "d"]
+    assert heap.peek_time() == 300
+
+
+def test_wait_wakes_early_for_nearer_entry():
+    heap = ScheduleHeap()
+    heap.push("far", time.time() + 60)
+    woke = threading.Event()
+
+    def sleeper():
+        heap.wait(max_timeout=30)
+        woke.set()
+
+    thread = threading.Thread(target=sleeper)
+    thread.start()
+    time.sleep(0.1)
+    assert not woke.is_set()
+
+    heap.push("near", time.time() + 0.05)
+
+    # Без пробуждения поток спал бы 30 секунд
+    assert woke.wait(2)
+    thread.join()
+
+
+def test_wait_is_not_woken_by_later_entry():
+    heap = ScheduleHeap()
+    heap.push("near", time.time() + 0.3)
+    woke = threading.Event()
+
+    thread = threading.Thread(target=lambda: (heap.wait(), woke.set()))
+    thread.start()
+    time.sleep(0.05)
+    heap.push("later", time.time() + 60)
+
+    assert not woke.wait(0.1)
+    assert woke.wait(5)
+    thread.join()
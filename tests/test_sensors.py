@@ -0,0 +1,113 @@
+import os
+import time
+from pathlib import Path
+
+from src.config import config
+from src.croner.discovery import discover_dags
+from src.croner.sensors import FileSensor
+from src.croner.state_store import SqliteStateStore
+
+DAGS_DIR = Path(__file__).resolve().parent.parent / "src" / "dags"
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_sensor_dags_are_discovered_without_import():
+    for file_name, attr_name, directory in (
+        ("add_sales_dag.py", "add_sales_dag", config.dir_config.get_sales_dir()),
+        ("add_ads_dag.py", "add_ads_dag", config.dir_config.get_adds_dir()),
+    ):
+        declarations = discover_dags(DAGS_DIR / file_name)
+
+        assert declarations is not None, file_name
+        kwargs = declarations[attr_name]["kwargs"]
+        assert kwargs["schedule_interval"]
+        assert kwargs["sensor"].path == Path(directory)
+        assert kwargs["sensor"].pattern == "*xlsx*"
+
+
+def test_non_literal_sensor_falls_back_to_import(tmp_path):
+    dag_file = tmp_path / "dynamic_dag.py"
+    dag_file.write_text(
+        "from src.croner import DAG, FileSensor\n"
+        "folder = '/tmp'\n"
+        "dag = DAG('dynamic', sensor=FileSensor(folder, '*.csv'))\n",
+        encoding="utf-8",
+    )
+
+    assert discover_dags(dag_file) is None
+
+
+def test_processed_files_are_not_triggered_again(tmp_path):
+    old_file = tmp_path / "old.xlsx"
+    old_file.write_bytes(b"old")
+    stat = os.stat(old_file)
+    new_file = tmp_path / "new.xlsx"
+    new_file.write_bytes(b"new")
+    batches = []
+    sensor = FileSensor(tmp_path, "*.xlsx", settle_seconds=0, use_inotify=False)
+
+    sensor.start(
+        lambda files: batches.append(files) or True,
+        processed={str(old_file): (stat.st_size, stat.st_mtime_ns)},
+    )
+    try:
+        assert wait_for(lambda: batches)
+    finally:
+        sensor.stop()
+
+    assert batches == [[str(new_file)]]
+    assert sensor.processed_files([str(new_file)]) == {
+        str(new_file): (3, os.stat(new_file).st_mtime_ns)
+    }
+
+
+def test_changed_processed_file_is_triggered(tmp_path):
+    data_file = tmp_path / "sales.xlsx"
+    data_file.write_bytes(b"v1")
+    stat = os.stat(data_file)
+    data_file.write_bytes(b"v2 longer")
+    batches = []
+    sensor = FileSensor(tmp_path, "*.xlsx", settle_seconds=0, use_inotify=False)
+
+    sensor.start(
+        lambda files: batches.append(files) or True,
+        processed={str(data_file): (stat.st_size, stat.st_mtime_ns)},
+    )
+    try:
+        assert wait_for(lambda: batches)
+    finally:
+        sensor.stop()
+
+    assert batches == [[str(data_file)]]
+
+
+def test_sqlite_store_keeps_sensor_files(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    store.save_sensor_files("add_sales_dag", {"/data/a.xlsx": (10, 5), "/b": (1, 2)})
+    store.save_sensor_files("add_sales_dag", {"/data/a.xlsx": (20, 6)})
+    store.forget_sensor_files("add_sales_dag", ["/b"])
+
+    assert store.load_sensor_files("add_sales_dag") == {"/data/a.xlsx": (20, 6)}
+    assert store.load_sensor_files("add_ads_dag") == {}
+
+
+def test_croner_forgets_deleted_sensor_files(make_croner, tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    kept = tmp_path / "kept.xlsx"
+    kept.write_bytes(b"x")
+    store.save_sensor_files(
+        "add_sales_dag",
+        {str(kept): (1, 1), str(tmp_path / "deleted.xlsx"): (1, 1)},
+    )
+    croner = make_croner(state_store=store)
+
+    assert croner.load_sensor_files("add_sales_dag") == {str(kept): (1, 1)}
+    assert store.load_sensor_files("add_sales_dag") == {str(kept): (1, 1)}
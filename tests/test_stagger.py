@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from src.croner import DAG
+
+DAG_FILES = {
+    "sales.py": 'sales = DAG("sales", schedule_interval="0 * * * *")',
+    "ads.py": 'ads = DAG("ads", schedule_interval="0 */2 * * *", priority=5)',
+    "stock.py": 'stock = DAG("stock", schedule_interval="0 10 * * *")',
+    "night.py": 'night = DAG("night", schedule_interval="30 3 * * *")',
+    "spread.py": 'spread = DAG("spread", schedule_interval="0 * * * *", spread=300)',
+}
+
+
+def load_croner(make_croner):
+    croner = make_croner()
+    croner.stagger_window = 60
+    for name, declaration in DAG_FILES.items():
+        (croner.dags_folder / name).write_text(
+            f"from src.croner import DAG\n{declaration}\n"
+        )
+    croner.scan_dags_folder()
+    return croner
+
+
+def offsets(croner):
+    return {
+        dag_id: dag_info["dag"].start_offset for dag_id, dag_info in croner.dags.items()
+    }
+
+
+def test_dags_sharing_a_slot_get_different_offsets(make_croner, virtual_clock):
+    croner = load_croner(make_croner)
+    result = offsets(croner)
+
+    # ads, sales и stock вместе срабатывают в 10:00; ads важнее - без сдвига
+    assert result["ads_ads"] == 0
+    assert {result["sales_sales"], result["stock_stock"]} == {20, 40}
+    # night ни с кем не совпадает
+    assert result["night_night"] == 0
+    assert croner.dags["sales_sales"]["dag"].next_run.second == result["sales_sales"]
+
+
+def test_offsets_are_stable_across_restarts(make_croner, virtual_clock):
+    first = offsets(load_croner(make_croner))
+    virtual_clock.advance_to(datetime(2026, 3, 2, 17, 45))
+    second = offsets(load_croner(make_croner))
+
+    assert first == second
+
+
+def test_spread_offset_is_stable_and_within_window(make_croner, virtual_clock):
+    croner = load_croner(make_croner)
+    offset = croner.dags["spread_spread"]["dag"].start_offset
+
+    # Явный spread не участвует в разнесении, сдвиг считается из dag_id
+    assert offset == DAG("spread", spread=300).start_offset
+    assert 0 <= offset < 300
+    assert all(
+        0 <= DAG(f"dag{i}", spread=30).start_offset < 30 for i in range(100)
+    )
+    assert len({DAG(f"dag{i}", spread=30).start_offset for i in range(100)}) > 1
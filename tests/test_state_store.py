@@ -0,0 +1,111 @@
+import sqlite3
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+
+from src.croner.state_store import (
+    PostgresStateStore,
+    SqliteStateStore,
+    StateStore,
+    create_state_store,
+)
+
+
+class FlakyStore(StateStore):
+    """Хранилище, недоступное первые failures обращений"""
+
+    def __init__(self, states, failures=1):
+        self.states = states
+        self.failures = failures
+        self.saved = {}
+
+    def load_all(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("база недоступна")
+        return dict(self.states)
+
+    def save_state(self, dag_id, last_run, next_run):
+        self.saved[dag_id] = (last_run, next_run)
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_sqlite_store_round_trip(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    last_run = datetime(2026, 1, 5, 12, 0)
+    store.save_state("sales", last_run, last_run + timedelta(hours=1))
+
+    assert store.load_all() == {
+        "sales": {"last_run": last_run, "next_run": last_run + timedelta(hours=1)}
+    }
+    assert store.get_status() == "ok"
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_sqlite_store_keeps_iso_timestamps(tmp_path):
+    path = str(tmp_path / "state.db")
+    # Файл, записанный прежним адаптером sqlite3, читается как раньше
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE dag_state (dag_id TEXT PRIMARY KEY, last_run TIMESTAMP, "
+            "next_run TIMESTAMP, updated_at TIMESTAMP)"
+        )
+        conn.execute(
+            "INSERT INTO dag_state VALUES "
+            "('ads', '2026-01-05 12:00:00.250000', NULL, '2026-01-05 12:00:01')"
+        )
+    store = SqliteStateStore(path)
+    job = SimpleNamespace(
+        result=None,
+        scheduled_for=datetime(2026, 1, 5, 13, 0),
+        status="error",
+        run_time=1.5,
+        error=RuntimeError("сбой"),
+        memory_report=None,
+    )
+
+    store.record_run("ads", job)
+    store.save_sensor_files("ads", {"/data/a.xlsx": (10, 20)})
+
+    assert store.load_all() == {
+        "ads": {"last_run": datetime(2026, 1, 5, 12, 0, 0, 250000), "next_run": None}
+    }
+    run_time, finished_at = store._conn.execute(
+        "SELECT run_time, finished_at FROM dag_runs"
+    ).fetchone()
+    assert run_time == "2026-01-05 13:00:00"
+    assert datetime.fromisoformat(finished_at)
+
+
+def test_postgres_outage_at_start_keeps_store():
+    engine = create_engine("postgresql+psycopg2://croner@127.0.0.1:1/croner")
+    store = create_state_store("postgres", engine_factory=lambda: engine)
+
+    # Не no-op хранилище: при следующем обращении попробует снова
+    assert isinstance(store, PostgresStateStore)
+    with pytest.raises(Exception):
+        store.load_all()
+    assert store.get_status().startswith("error: ")
+
+
+def test_restore_retried_after_store_recovers(make_croner):
+    last_run = datetime.now().replace(microsecond=0) - timedelta(minutes=5)
+    store = FlakyStore({"hourly": {"last_run": last_run, "next_run": None}})
+    croner = make_croner(state_store=store)
+    (croner.dags_folder / "hourly.py").write_text(
+        "from src.croner import DAG\n"
+        'hourly = DAG("hourly", schedule_interval="0 * * * *")\n'
+    )
+    croner.scan_dags_folder()
+    dag = croner.dags["hourly_hourly"]["dag"]
+
+    assert dag.last_run is None
+    assert croner._restore_failed
+
+    croner.retry_state_restore()
+
+    assert not croner._restore_failed
+    assert dag.last_run == last_run
+    assert "hourly" in store.saved
@@ -0,0 +1,118 @@
+import threading
+
+import pytest
+
+from src.croner import DAG
+from src.croner.dag_run import TaskState
+from src.croner.discovery import load_file_dags
+
+CYCLIC_DAG = """
+from src.croner import DAG
+
+cyclic = DAG("cyclic")
+
+
+@cyclic.task
+def extract():
+    pass
+
+
+@cyclic.task
+def load():
+    pass
+
+
+extract >> load >> extract
+"""
+
+
+def test_independent_tasks_run_in_parallel():
+    dag = DAG("parallel", max_active_tasks=3)
+    # Барьер пройдут, только если все три задачи выполняются одновременно
+    barrier = threading.Barrier(3, timeout=5)
+
+    @dag.task
+    def root():
+        pass
+
+    for name in ("sales", "ads", "stock"):
+        dag.task(lambda: barrier.wait(), task_id=name, depends_on=[root])
+
+    dag_run = dag.run()
+
+    assert dag_run.status == "success"
+    assert {dag_run.get_state(t) for t in ("sales", "ads", "stock")} == {
+        TaskState.SUCCESS
+    }
+
+
+def test_failed_task_skips_only_downstream():
+    dag = DAG("partial_failure")
+
+    @dag.task
+    def extract():
+        raise ValueError("источник недоступен")
+
+    @dag.task(depends_on=[extract])
+    def transform():
+        pass
+
+    @dag.task(depends_on=[transform])
+    def load():
+        pass
+
+    @dag.task
+    def independent():
+        pass
+
+    dag_run = dag.run()
+
+    assert dag_run.get_state("extract") == TaskState.FAILED
+    assert dag_run.get_state("transform") == TaskState.SKIPPED
+    assert dag_run.get_state("load") == TaskState.SKIPPED
+    assert dag_run.get_state("independent") == TaskState.SUCCESS
+    assert dag_run.status == "failed"
+
+
+def test_unknown_dependency_is_rejected_before_run():
+    dag = DAG("unknown_upstream")
+    calls = []
+
+    @dag.task(depends_on=["missing"])
+    def report():
+        calls.append("report")
+
+    with pytest.raises(ValueError, match="missing"):
+        dag.validate()
+    with pytest.raises(ValueError, match="missing"):
+        dag.run()
+    assert not calls
+
+
+def test_cycle_is_rejected_when_file_is_loaded(tmp_path):
+    dag_file = tmp_path / "cyclic.py"
+    dag_file.write_text(CYCLIC_DAG)
+
+    with pytest.raises(ValueError, match="Цикл"):
+        load_file_dags(dag_file, lazy=False)
+
+    # В ленивом режиме граф проверяется при импорте модуля, до выполнения задач
+    lazy_dag = load_file_dags(dag_file, lazy=True)["cyclic"]
+    with pytest.raises(ValueError, match="extract -> load -> extract"):
+        lazy_dag.run()
+
+
+def test_broken_graph_keeps_previous_dags_loaded(make_croner):
+    croner = make_croner()
+    croner.dag_discovery = "eager"
+    dag_file = croner.dags_folder / "etl.py"
+    dag_file.write_text(CYCLIC_DAG.replace("extract >> load >> extract", ""))
+    croner.scan_dags_folder()
+    loaded = croner.dags["etl_cyclic"]["dag"]
+
+    dag_file.write_text(CYCLIC_DAG)
+    # mtime с грубым разрешением мог не измениться
+    croner.dags["etl_cyclic"]["mtime"] = 0
+    croner.scan_dags_folder()
+
+    assert croner.dags["etl_cyclic"]["dag"] is loaded
@@ -0,0 +1,69 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from src.croner import DAG
+from src.croner.dag_run import TaskState
+from src.croner.discovery import load_file_dags
+from src.croner.executors import DagJob
+from src.croner.process_pool import ProcessWorkerPoolExecutor
+
+# Задача зависает в C-вызове, не отпуская GIL: поток цикла DAG в процессе
+# стоит, отменить ее изнутри процесса нельзя
+HUNG_DAG = """
+import ctypes
+
+from src.croner import DAG
+
+hung = DAG("hung", executor="process", execution_timeout=0.5)
+hung.CANCEL_GRACE = 0.2
+
+
+@hung.task
+def stuck():
+    ctypes.PyDLL(None).sleep(60)
+"""
+
+
+def test_process_worker_killed_after_task_timeout(tmp_path):
+    dag_file = tmp_path / "hung.py"
+    dag_file.write_text(HUNG_DAG)
+    dag = load_file_dags(dag_file, lazy=False)["hung"]
+    executor = ProcessWorkerPoolExecutor(max_workers=1)
+    executor.KILL_SLACK = 0.5
+    job = DagJob("hung", dag, file_path=str(dag_file), attr_name="hung")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError, match="stuck"):
+        executor.execute(job)
+
+    assert time.monotonic() - started < 30
+    assert executor.recycled == 1
+    assert threading.current_thread().name not in executor._processes
+
+
+def test_resumed_run_keeps_original_dagrun_timeout():
+    dag = DAG("deferred", dagrun_timeout=0.5)
+    attempts = []
+
+    @dag.task(retries=1, retry_delay=60)
+    def flaky():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise ConnectionError("сервис недоступен")
+
+    dag_run = dag.run()
+    assert dag_run.is_deferred
+    deadline = dag_run.deadline
+
+    # Повтор наступил, когда таймаут всего запуска уже истек
+    time.sleep(0.6)
+    dag_run.retry_at["flaky"] = datetime.now()
+    dag_run = dag.run(dag_run)
+
+    assert dag_run.deadline == deadline
+    assert dag_run.timed_out
+    assert len(attempts) == 1
+    assert dag_run.get_state("flaky") != TaskState.SUCCESS
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from src.croner import DAG
+from src.croner.cron_parser import CronParser
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def fires(expression, start, n):
+    return [
+        fire.astimezone(timezone.utc)
+        for fire in CronParser.parse(expression).iter_fires(start, n)
+    ]
+
+
+def test_spring_forward_shifts_skipped_time():
+    # 29.03.2026 в Берлине часы переводят с 02:00 на 03:00: 02:30 нет
+    start = datetime(2026, 3, 28, 3, 0, tzinfo=BERLIN)
+
+    assert fires("30 2 * * *", start, 2) == [
+        utc(2026, 3, 29, 1, 30),  # 03:30 CEST
+        utc(2026, 3, 30, 0, 30),  # 02:30 CEST
+    ]
+
+
+def test_fall_back_runs_fixed_time_once():
+    # 25.10.2026 часы переводят с 03:00 на 02:00: 02:30 бывает дважды
+    start = datetime(2026, 10, 25, 0, 0, tzinfo=BERLIN)
+
+    assert fires("30 2 * * *", start, 2) == [
+        utc(2026, 10, 25, 0, 30),  # 02:30 CEST, повтор в 02:30 CET пропущен
+        utc(2026, 10, 26, 1, 30),  # 02:30 CET
+    ]
+
+
+def test_fall_back_repeats_wildcard_hour():
+    start = datetime(2026, 10, 25, 2, 45, tzinfo=BERLIN)
+
+    assert fires("*/30 * * * *", start, 3) == [
+        utc(2026, 10, 25, 1, 0),  # 02:00 CET - повторившийся час
+        utc(2026, 10, 25, 1, 30),  # 02:30 CET
+        utc(2026, 10, 25, 2, 0),  # 03:00 CET
+    ]
+
+
+def test_fire_times_are_evenly_spaced_in_utc_across_dst():
+    start = datetime(2026, 3, 29, 0, 0, tzinfo=BERLIN)
+    hourly = fires("0 * * * *", start, 5)
+
+    assert {b - a for a, b in zip(hourly, hourly[1:])} == {timedelta(hours=1)}
+
+
+def test_dag_keeps_local_wall_time_across_dst():
+    dag = DAG("berlin", schedule_interval="0 9 * * *", tz="Europe/Berlin")
+    # Наивное время планировщика - местное время контейнера
+    before = datetime(2026, 3, 28, 12, tzinfo=BERLIN).astimezone().replace(tzinfo=None)
+
+    first = dag._calculate_next_run(before)
+    second = dag._calculate_next_run(first)
+
+    assert [dag.local_time(run).isoformat() for run in (first, second)] == [
+        "2026-03-29T09:00:00+02:00",
+        "2026-03-30T09:00:00+02:00",
+    ]
+
+
+def test_dag_slot_ignores_start_offset():
+    dag = DAG("berlin", schedule_interval="0 9 * * *", tz="Europe/Berlin")
+    before = datetime(2026, 3, 28, 12, tzinfo=BERLIN).astimezone().replace(tzinfo=None)
+    slot = dag._calculate_next_run(before)
+    dag.set_start_offset(90)
+
+    shifted = dag._calculate_next_run(before)
+
+    assert shifted == slot + timedelta(seconds=90)
+    assert dag._schedule_slot(shifted) == slot
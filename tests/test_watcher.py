@@ -0,0 +1,123 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+from src.croner import watcher
+
+
+class Events:
+    """События наблюдателя, собранные из его потока"""
+
+    def __init__(self):
+        self.items = []
+        self._lock = threading.Lock()
+
+    def __call__(self, kind, path):
+        with self._lock:
+            self.items.append((kind, path.name if path else None))
+
+    def wait_for(self, event, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if event in self.items:
+                    return True
+            time.sleep(0.02)
+        return False
+
+
+@pytest.fixture
+def inotify_watcher(tmp_path):
+    folder = tmp_path / "dags"
+    folder.mkdir()
+    events = Events()
+    try:
+        dags_watcher = watcher.InotifyWatcher(folder, events, pattern="*.py")
+    except OSError as e:
+        pytest.skip(f"inotify недоступен: {e}")
+    dags_watcher.start()
+    yield folder, events
+    dags_watcher.stop()
+
+
+def test_inotify_reports_matching_files(inotify_watcher):
+    folder, events = inotify_watcher
+
+    (folder / "notes.txt").write_text("x")
+    (folder / "sales.py").write_text("x")
+    assert events.wait_for((watcher.MODIFIED, "sales.py"))
+    (folder / "sales.py").unlink()
+    assert events.wait_for((watcher.DELETED, "sales.py"))
+
+    assert all(name != "notes.txt" for _, name in events.items)
+
+
+def test_inotify_watches_recreated_folder(inotify_watcher):
+    folder, events = inotify_watcher
+
+    shutil.rmtree(folder)
+    assert events.wait_for((watcher.RESCAN, None))
+    events.items.clear()
+    folder.mkdir()
+    # Папка снова под наблюдением: пересканирование и события новых файлов
+    assert events.wait_for((watcher.RESCAN, None))
+    (folder / "ads.py").write_text("x")
+
+    assert events.wait_for((watcher.MODIFIED, "ads.py"))
+
+
+def test_inotify_ignores_folder_moved_away(inotify_watcher, tmp_path):
+    folder, events = inotify_watcher
+
+    folder.rename(tmp_path / "old_dags")
+    assert events.wait_for((watcher.RESCAN, None))
+    events.items.clear()
+    (tmp_path / "old_dags" / "stale.py").write_text("x")
+    folder.mkdir()
+    assert events.wait_for((watcher.RESCAN, None))
+    (folder / "fresh.py").write_text("x")
+
+    assert events.wait_for((watcher.MODIFIED, "fresh.py"))
+    assert all(name != "stale.py" for _, name in events.items)
+
+
+def test_polling_watcher_compares_snapshots(tmp_path):
+    (tmp_path / "kept.py").write_text("x")
+    (tmp_path / "gone.py").write_text("x")
+    events = Events()
+    polling = watcher.PollingWatcher(tmp_path, events, pattern="*.py", interval=0.05)
+    polling.start()
+    try:
+        (tmp_path / "new.py").write_text("x")
+        (tmp_path / "gone.py").unlink()
+        assert events.wait_for((watcher.CREATED, "new.py"))
+        assert events.wait_for((watcher.DELETED, "gone.py"))
+    finally:
+        polling.stop()
+
+    assert all(name != "kept.py" for _, name in events.items)
+
+
+def test_file_written_during_initial_scan_is_loaded(make_croner):
+    croner = make_croner()
+    initial_scan = croner.scan_dags_folder
+
+    def scan_then_write():
+        initial_scan()
+        # Файл появляется уже после прохода по папке
+        (croner.dags_folder / "late.py").write_text(
+            "from src.croner import DAG\n"
+            'late = DAG("late", schedule_interval="0 9 * * *")\n'
+        )
+
+    croner.scan_dags_folder = scan_then_write
+    croner.start_scheduler(scan_interval=60)
+    try:
+        deadline = time.monotonic() + 5
+        while "late_late" not in croner.dags and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert "late_late" in croner.dags
+    finally:
+        croner.stop_scheduler()